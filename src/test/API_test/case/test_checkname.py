@@ -3,13 +3,13 @@ import unittest
 
 from test.API_test.common.BaseCaseOperate import BaseCaseOperate
 
-from src.utils import ReadXML
+from src.utils.filereader.xml_reader import XMLReader
 
 
 class TestCheckName(unittest.TestCase):
     def setUp(self):
         self.sheet_name = 'CheckName'
-        self.url = ReadXML('zhigou1.xml').get_url(self.sheet_name)
+        self.url = XMLReader('zhigou1.xml').get_url(self.sheet_name)
 
     def test_checkname(self):
         results = BaseCaseOperate(self.url, sheet_name=self.sheet_name).run()
@@ -1,7 +1,6 @@
 # -*- coding: utf-8 -*-
 import json
 
-import requests
 from tools.encrypt import Encrypt
 from tools.logger import log
 from tools.read_xls import ReadXls
@@ -9,6 +8,7 @@ from tools.read_xls import ReadXls
 from MerchantCenter import MerchantCenter
 from OnlinePurchase import OnlinePurchase
 from PersonalCenter import PersonalCenter
+from src.utils.interface.session_pool import PooledSession
 from src.utils.randomGen import random_number_str
 
 
@@ -190,8 +190,8 @@ class BaseCaseOperate:
         return params
 
     def _header(self):
-        u"""创建session，修改header，参数为json格式"""
-        session = requests.session()
+        u"""创建session，修改header，参数为json格式。连接来自进程级连接池，可复用keep-alive连接"""
+        session = PooledSession()
         session.headers.update({'Content-Type': 'application/json'})
         return session
 
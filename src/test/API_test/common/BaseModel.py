@@ -1,19 +1,20 @@
 # -*- coding: utf-8 -*-
 import json
 
-import requests
-
 from src.utils import Config
 from src.utils import Encrypt
-from src.utils import ReadXML
 from src.utils import log
+from src.utils.filereader.xml_reader import XMLReader
+from src.utils.interface.session_pool import PooledSession
 
 
 class BaseModel:
+    url_xml = None  # 接口文件名，第一次发送时从配置中读取
+    _xml_reader = None  # 接口文件的 XMLReader，第一次发送时创建，之后的请求直接查找接口地址
 
     def _header(self):
-        u"""创建session，修改header，参数为json格式"""
-        session = requests.session()
+        u"""创建session，修改header，参数为json格式。连接来自进程级连接池，可复用keep-alive连接"""
+        session = PooledSession()
         session.headers.update({'Content-Type': 'application/json'})
         return session
 
@@ -25,5 +26,9 @@ class BaseModel:
         # print params_json
         log(name, params_json, 'info')
 
-        url = ReadXML(Config().get('data', 'url_xml')).get_url(name)
+        if BaseModel._xml_reader is None:
+            if BaseModel.url_xml is None:
+                BaseModel.url_xml = Config().get('data', 'url_xml')
+            BaseModel._xml_reader = XMLReader(BaseModel.url_xml)
+        url = BaseModel._xml_reader.get_url(name)
         return self._header().post(url, params_json).content
@@ -6,7 +6,7 @@ from test.API_test.common.BaseCaseOperate import BaseCaseOperate
 from test.API_test.common.Merchant import Merchant
 
 from src.utils import Config
-from src.utils import ReadXML
+from src.utils.filereader.xml_reader import XMLReader
 
 url_xml = Config().get('data', 'url_xml')
 
@@ -18,7 +18,7 @@ def generator(datafile='shopping.xlsx', sheet_name='sheet0', userid=None, prepar
         #  基本类，同一类型的接口都可以用这个类来组织测试用例
         def setUp(self):
             u"""在setup中新生成一个user与merchant"""
-            self.url = ReadXML(url_xml).get_url(sheet_name)
+            self.url = XMLReader(url_xml).get_url(sheet_name)
             print u'接口地址：{0}'.format(self.url)
             if userid is None:
                 self.merchant = Merchant()
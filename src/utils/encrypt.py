@@ -6,6 +6,9 @@ from src.utils.utils_exception import EncryptError
 
 logger = Logger(__name__).get_logger()
 
+HASH_FUNCTIONS = {'MD5': hashlib.md5, 'SHA1': hashlib.sha1}
+HASH_CACHE_SIZE = 100000  # 每种加密方式与盐最多缓存的加密结果数，超出后清空
+
 
 class Encrypt:
 
@@ -37,6 +40,8 @@ class Encrypt:
             self.salt = salt
             self.encrypt_way = 'MD5'
 
+        self._hashes = dict()  # (加密方式, 盐) -> {明文: 密文}
+
     def sign(self, sign_dict, priv=None):
         """传入待签名的字典，返回签名后字符串
         1.字典排序
@@ -69,17 +74,31 @@ class Encrypt:
         if encryway:
             self.encrypt_way = encryway
 
-        befstr += self.salt
-        if self.encrypt_way.upper() == 'MD5':
-            hashstr = hashlib.md5()
-        elif self.encrypt_way.upper() == 'SHA1':
-            hashstr = hashlib.sha1()
-        else:
-            logger.error('请输入正确的加密方式，目前仅支持 MD5 或 SHA1')
-            return None
+        return self.encrypt_many([befstr])[0]
+
+    def encrypt_many(self, values, salt=None, encryway=None):
+        """批量加密，返回密文列表。salt、encryway 只用于本次加密，不修改实例的默认值。
 
-        hashstr.update(befstr)
-        return hashstr.hexdigest()
+        加密方式只查找一次，重复的明文直接使用缓存的结果。
+        """
+        salt = self.salt if salt is None else salt
+        way = (encryway or self.encrypt_way).upper()
+        hash_function = HASH_FUNCTIONS.get(way)
+        if hash_function is None:
+            logger.error('请输入正确的加密方式，目前仅支持 MD5 或 SHA1')
+            return [None] * len(values)
+
+        hashes = self._hashes.setdefault((way, salt), dict())
+        result = list()
+        for value in values:
+            hashed = hashes.get(value)
+            if hashed is None:
+                hashed = hash_function(value + salt).hexdigest()
+                if len(hashes) >= HASH_CACHE_SIZE:
+                    hashes.clear()
+                hashes[value] = hashed
+            result.append(hashed)
+        return result
 
 if __name__ == '__main__':
     print Encrypt(salt='111111').encrypt('100000307', encryway='MD5')
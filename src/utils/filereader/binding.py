@@ -1,11 +1,23 @@
 # -*- coding: utf-8 -*-
+import threading
 import types
+from src.utils.filereader import generators as generator_utils
 from src.utils.logger import Logger
 
 """
 这个类是把变量名与变量值绑定、生成器名与生成器绑定的类，添加进来后，可以管理所有变量与生成器供test使用。
 
 Basic context implementation for binding variables to values
+
+Context 可以创建子 context（child），子 context 能读到父 context 的变量与生成器，
+但绑定的变量只写到自己这里（copy-on-write），不会影响父 context 与其他子 context：
+
+    base = build_context(testset.config)
+    for row in rows:
+        scoped = base.child()
+        scoped.bind_variables(row)  # 每行数据的变量只在这个子 context 中可见
+
+绑定变量与取生成器的下一个值都是加锁的，多个线程可以共用同一个 context 或同一个父 context 的生成器。
 """
 
 logger = Logger(__name__).get_logger()
@@ -14,17 +26,40 @@ logger = Logger(__name__).get_logger()
 class Context(object):
     """ Manages binding of variables & generators, with both variable name and generator name being strings """
 
-    variables = dict()  # Maps variable name to current value
+    variables = dict()  # Maps variable name to current value, only the ones bound in this context
     generators = dict()  # Maps generator name to generator function
-    mod_count = 0  # Lets us see if something has been altered, avoiding needless retemplating
+    versions = dict()  # Maps variable name to the mod_count at which it was last altered
+    parent = None  # Parent context, variables and generators not bound here are read from it
+    _mod_count = 0  # Number of alterations made in this context itself
+
+    @property
+    def mod_count(self):
+        """ Lets us see if something has been altered, avoiding needless retemplating
+            Alterations of the parent context count as well """
+        if self.parent is None:
+            return self._mod_count
+        return self._mod_count + self.parent.mod_count
+
+    def child(self):
+        """ 创建子 context：读取时继承本 context 的变量与生成器，写入只在子 context 中 """
+        return Context(parent=self)
+
+    def _set_variable(self, str_name, value):
+        """ Set variable if its value changes, caller holds the lock; returns True if it changed """
+        if self.get_value(str_name) == value:
+            return False
+        self.variables[str_name] = value
+        self._mod_count += 1
+        self.versions[str_name] = self.mod_count
+        self._merged = None
+        return True
 
     def bind_variable(self, variable_name, variable_value):
         """ 绑定一个变量名到value上，即赋值，可在test中使用该变量 """
         str_name = str(variable_name)
-        prev = self.variables.get(str_name)
-        if prev != variable_value:
-            self.variables[str(variable_name)] = variable_value
-            self.mod_count += 1
+        with self._lock:
+            changed = self._set_variable(str_name, variable_value)
+        if changed:
             logger.debug('Context: altered variable named {0} to value {1}'.format(str_name, variable_value))
 
     def bind_variables(self, variable_map):
@@ -43,32 +78,83 @@ class Context(object):
         self.generators[str(generator_name)] = generator
         logger.debug('Context: Added generator named {0}'.format(generator_name))
 
+    def _generator_owner(self, str_gen_name):
+        """ Return the context, in this one and its parents, where the generator was added """
+        context = self
+        while context is not None:
+            if str_gen_name in context.generators:
+                return context
+            context = context.parent
+        raise KeyError(str_gen_name)
+
     def bind_generator_next(self, variable_name, generator_name):
-        """ Binds the next value for generator_name to variable_name and return value used """
+        """ Binds the next value for generator_name to variable_name and return value used
+            Generator is advanced under the lock of the context owning it, so threads never share a value
+            Values of batched generators are read from their prefetched buffer """
         str_gen_name = str(generator_name)
         str_name = str(variable_name)
-        val = next(self.generators[str_gen_name])
+        owner = self._generator_owner(str_gen_name)
+        with owner._lock:
+            val = generator_utils.next_value(owner.generators[str_gen_name])
 
-        prev = self.variables.get(str_name)
-        if prev != val:
-            self.variables[str_name] = val
-            self.mod_count += 1
+        with self._lock:
+            changed = self._set_variable(str_name, val)
+        if changed:
             logger.debug('Context: Set variable named {0} to next value {1} from generator named {2}'.format(variable_name, val, generator_name))
         return val
 
     def get_values(self):
-        return self.variables
+        """ All variables, including the ones inherited from parent contexts """
+        if self.parent is None:
+            return self.variables
+        merged = self._merged
+        mod_count = self.mod_count
+        if merged is None or merged[0] != mod_count:
+            values = dict(self.parent.get_values())
+            with self._lock:
+                values.update(self.variables)
+            merged = (mod_count, values)
+            self._merged = merged
+        return merged[1]
+
+    def has_variable(self, variable_name):
+        """ Whether the variable is bound in this context or a parent """
+        str_name = str(variable_name)
+        return str_name in self.variables or (self.parent is not None and self.parent.has_variable(str_name))
+
+    def get_version(self, variable_name):
+        """ 变量最后一次被修改时的 mod_count，未绑定过的变量返回 0；版本不变说明变量值没有变化 """
+        str_name = str(variable_name)
+        if str_name in self.versions or self.parent is None:
+            return self.versions.get(str_name, 0)
+        return self.parent.get_version(str_name)
 
     def get_value(self, variable_name):
         """ Get bound variable value, or return none if not set """
-        return self.variables.get(str(variable_name))
+        str_name = str(variable_name)
+        if str_name in self.variables or self.parent is None:
+            return self.variables.get(str_name)
+        return self.parent.get_value(str_name)
 
     def get_generators(self):
-        return self.generators
+        """ All generators, including the ones added to parent contexts """
+        if self.parent is None:
+            return self.generators
+        generators = dict(self.parent.get_generators())
+        generators.update(self.generators)
+        return generators
 
     def get_generator(self, generator_name):
-        return self.generators.get(str(generator_name))
+        str_name = str(generator_name)
+        if str_name in self.generators or self.parent is None:
+            return self.generators.get(str_name)
+        return self.parent.get_generator(str_name)
 
-    def __init__(self):
+    def __init__(self, parent=None):
         self.variables = dict()
         self.generators = dict()
+        self.versions = dict()
+        self.parent = parent
+        self._mod_count = 0
+        self._merged = None  # (mod_count, variables merged with the parent's)
+        self._lock = threading.RLock()
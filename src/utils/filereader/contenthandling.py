@@ -25,6 +25,7 @@ class ContentHandler:
     is_file = False
     is_template_path = False
     is_template_content = False
+    _template = None  # (content, compiled string.Template) for inline templated content
 
     def is_dynamic(self):
         """ Is templating used? """
@@ -48,10 +49,18 @@ class ContentHandler:
                 return data
         else:
             if self.is_template_content and context:
-                return safe_substitute_unicode_template(self.content, context.get_values())
+                return self.get_template().safe_substitute(escape_unicode_values(context.get_values()))
             else:
                 return self.content
 
+    def get_template(self):
+        """ Compiled template of inline content, compiled once and reused until content changes """
+        compiled = self._template
+        if compiled is None or compiled[0] is not self.content:
+            compiled = (self.content, string.Template(encode_unicode_bytes(self.content)))
+            self._template = compiled
+        return compiled[1]
+
     def create_noread_version(self):
         """ Read file content if it is static and return content handler with no I/O """
         if not self.is_file or self.is_template_path:
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""数据文件解析结果的磁盘缓存
+
+xlsx、yaml、xml 解析后的结果以 pickle 格式保存在 data/.cache/ 中，以源文件路径与解析方式区分，
+并记录源文件的修改时间与大小。源文件没有变化时直接读取缓存，不再解析源文件。
+
+For example:
+
+    rows = load(path, ('excel', 'CheckCode'), lambda: ExcelReader('zhigou.xlsx', 'CheckCode').data)
+
+缓存读写失败时只记录日志，直接调用 loader 解析源文件。设置 ENABLED = False 可关闭缓存。
+
+"""
+import cPickle as pickle
+import hashlib
+import os
+import tempfile
+
+from src.utils.config import DefaultConfig
+from src.utils.logger import Logger
+
+CACHE_DIR_NAME = '.cache'
+CACHE_VERSION = 1  # 缓存格式变化时修改，使旧缓存失效
+ENABLED = True
+
+logger = Logger(__name__).get_logger()
+
+
+def cache_dir():
+    """缓存目录：data/.cache/"""
+    return os.path.join(DefaultConfig().data_path, CACHE_DIR_NAME)
+
+
+def cache_file(source, key):
+    """source 文件以 key 方式解析的结果所对应的缓存文件"""
+    name = hashlib.sha1(repr((os.path.abspath(source), key, CACHE_VERSION))).hexdigest()
+    return os.path.join(cache_dir(), name + '.pickle')
+
+
+def _signature(source):
+    stat = os.stat(source)
+    return stat.st_mtime, stat.st_size
+
+
+def _read(path, source, key, signature):
+    try:
+        with open(path, 'rb') as f:
+            cached = pickle.load(f)
+    except IOError:
+        return False, None
+    except Exception as e:
+        logger.warning('Broken cache file {0}: {1}'.format(path, e))
+        return False, None
+
+    if (isinstance(cached, dict) and cached.get('source') == os.path.abspath(source)
+            and cached.get('key') == key and cached.get('signature') == signature):
+        return True, cached['data']
+    return False, None
+
+
+def _write(path, source, key, signature, data):
+    directory = os.path.dirname(path)
+    try:
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        fd, temp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump({'source': os.path.abspath(source), 'key': key, 'signature': signature, 'data': data},
+                        f, pickle.HIGHEST_PROTOCOL)
+        if os.path.exists(path):
+            os.remove(path)  # Windows 下 rename 不能覆盖已存在的文件
+        os.rename(temp, path)
+    except (IOError, OSError, pickle.PicklingError, TypeError) as e:
+        logger.warning('Can not write cache file {0}: {1}'.format(path, e))
+
+
+def load(source, key, loader):
+    """读取 source 文件的解析结果
+
+    :param source: 源文件路径。
+    :param key: 解析方式，如 ('excel', sheet)，同一个文件不同的解析方式分别缓存。
+    :param loader: 缓存不可用时调用，返回解析结果。
+    :return: 解析结果。
+    """
+    if not ENABLED:
+        return loader()
+    try:
+        signature = _signature(source)
+    except OSError:
+        return loader()  # 源文件不存在，由 loader 抛出相应的异常
+
+    path = cache_file(source, key)
+    hit, data = _read(path, source, key, signature)
+    if hit:
+        logger.debug('Read {0} from cache {1}'.format(source, path))
+        return data
+
+    data = loader()
+    _write(path, source, key, signature, data)
+    return data
+
+
+def clear():
+    """删除所有缓存文件"""
+    directory = cache_dir()
+    if not os.path.isdir(directory):
+        return
+    for name in os.listdir(directory):
+        if name.endswith('.pickle') or name.endswith('.tmp'):
+            os.remove(os.path.join(directory, name))
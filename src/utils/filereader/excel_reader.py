@@ -60,82 +60,208 @@ ReadXls -- read xls and return a list (zipped first line and other rows)
         nums
             return line numbers of sheet(without first line). Case nums.
 
+        iter_rows()
+            yield rows one by one, in the same type as data.
+
+打开的workbook在进程内按文件路径缓存，文件修改时间变化时才重新打开；title、data在实例中只计算一次。
+
+数据量很大时可以使用stream模式，workbook不会被缓存，iter_rows逐行从文件中读取，内存占用与行数无关。
+xlsx文件在安装了openpyxl时使用其read-only模式读取，否则使用xlrd的on_demand模式只加载指定的sheet：
+
+    for row in ExcelReader('params.xlsx', 'sheet0', stream=True).iter_rows():
+        print row
+
 """
+import os
+import threading
+
 from xlrd import open_workbook
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
 from src.utils.config import DefaultConfig
 from src.utils.utils_exception import DataFileNotAvailableException, DataError, SheetTypeError, SheetError
 from src.utils.logger import Logger
 
 
+def _xlrd_value(value):
+    """openpyxl读出的值转为与xlrd一致：空单元格为u''，数字为float。"""
+    if value is None:
+        return u''
+    if isinstance(value, (int, long)) and not isinstance(value, bool):
+        return float(value)
+    return value
+
+
 class ExcelReader(object):
-    def __init__(self, book, sheet=0):
+    _books = dict()  # 文件路径 -> (修改时间, workbook)
+    _lock = threading.Lock()
+
+    def __init__(self, book, sheet=0, stream=False):
         """Read workbook
 
         :param book: work_book name.Not path.
         :param sheet: index of sheet or sheet name.
+        :param stream: if True, workbook is not loaded into cache, rows are read from file one by one in iter_rows.
         """
         self.logger = Logger(self.__class__.__name__).get_logger()
         self.book_name = '{0}\\{1}'.format(DefaultConfig().data_path, book)
         self.sheet_locator = sheet
+        self.stream = stream
+
+        self._title = None
+        self._data = None
 
-        self.book = self._book()
-        self.sheet = self._sheet()
+        if self.stream:
+            self.book = None
+            self.sheet = None
+        else:
+            self.book = self._book()
+            self.sheet = self._sheet(self.book)
 
     def _book(self):
+        """Return workbook from cache, reopen it if file has been modified."""
         try:
-            work_book = open_workbook(self.book_name)
-        except IOError as e:
+            mtime = os.path.getmtime(self.book_name)
+        except OSError as e:
             raise DataFileNotAvailableException(e)
-        self.logger.info('open workbook {0}'.format(self.book_name))
-        return work_book
 
-    def _sheet(self):
+        cached = self._books.get(self.book_name)
+        if cached is None or cached[0] != mtime:
+            with self._lock:
+                cached = self._books.get(self.book_name)
+                if cached is None or cached[0] != mtime:
+                    try:
+                        work_book = open_workbook(self.book_name)
+                    except IOError as e:
+                        raise DataFileNotAvailableException(e)
+                    self.logger.info('open workbook {0}'.format(self.book_name))
+                    cached = (mtime, work_book)
+                    self._books[self.book_name] = cached
+        return cached[1]
+
+    @classmethod
+    def clear_cache(cls):
+        """Close all cached workbooks."""
+        with cls._lock:
+            cls._books.clear()
+
+    def _sheet(self, book):
         """Return sheet"""
         if type(self.sheet_locator) not in [int, str]:
             raise SheetTypeError('Please pass in <type \'int\'> or <type \'str\'>, not {0}'.format(type(self.sheet)))
         elif type(self.sheet_locator) == int:
             try:
-                sheet = self.book.sheet_by_index(self.sheet_locator)  # by index
+                sheet = book.sheet_by_index(self.sheet_locator)  # by index
             except:
                 raise SheetError('Sheet \'{0}\' not exists.'.format(self.sheet_locator))
         else:
             try:
-                sheet = self.book.sheet_by_name(self.sheet_locator)  # by name
+                sheet = book.sheet_by_name(self.sheet_locator)  # by name
             except:
                 raise SheetError('Sheet \'{0}\' not exists.'.format(self.sheet_locator))
         self.logger.info('read sheet {0}'.format(self.sheet_locator))
         return sheet
 
+    def _stream_xlsx(self):
+        """Yield row values of xlsx with openpyxl read-only mode."""
+        try:
+            work_book = openpyxl.load_workbook(self.book_name, read_only=True, data_only=True)
+        except IOError as e:
+            raise DataFileNotAvailableException(e)
+        try:
+            try:
+                if type(self.sheet_locator) == int:
+                    sheet = work_book.worksheets[self.sheet_locator]
+                else:
+                    sheet = work_book[self.sheet_locator]
+            except (IndexError, KeyError):
+                raise SheetError('Sheet \'{0}\' not exists.'.format(self.sheet_locator))
+            for row in sheet.iter_rows():
+                yield [_xlrd_value(cell.value) for cell in row]
+        finally:
+            work_book.close()
+
+    def _stream_xls(self):
+        """Yield row values with xlrd, load only the specified sheet and release it after reading."""
+        try:
+            work_book = open_workbook(self.book_name, on_demand=True)
+        except IOError as e:
+            raise DataFileNotAvailableException(e)
+        try:
+            sheet = self._sheet(work_book)
+            for index in xrange(sheet.nrows):
+                yield sheet.row_values(index)
+        finally:
+            work_book.release_resources()
+
+    def _row_values(self):
+        """Yield values of every row, title included."""
+        if not self.stream:
+            for index in xrange(self.sheet.nrows):
+                yield self.sheet.row_values(index)
+        elif openpyxl is not None and self.book_name.endswith('.xlsx'):
+            for values in self._stream_xlsx():
+                yield values
+        else:
+            for values in self._stream_xls():
+                yield values
+
     @property
     def title(self):
         """First row is title."""
+        if self._title is None:
+            if not self.stream:
+                try:
+                    self._title = self.sheet.row_values(0)
+                except IndexError:
+                    raise DataError('This is a empty sheet, please check your file.')
+            else:
+                rows = self._row_values()
+                try:
+                    self._title = next(rows)
+                except StopIteration:
+                    raise DataError('This is a empty sheet, please check your file.')
+                finally:
+                    rows.close()
+        return self._title
+
+    def iter_rows(self):
+        """Yield data rows one by one, in the same type as data. Rows are not kept in memory."""
+        rows = self._row_values()
         try:
-            return self.sheet.row_values(0)
-        except IndexError:
-            raise DataError('This is a empty sheet, please check your file.')
+            try:
+                title = next(rows)
+            except StopIteration:
+                raise DataError('This is a empty sheet, please check your file.')
+            self._title = title
+            for values in rows:
+                yield dict(zip(title, [unicode(s).encode('utf-8') for s in values]))  # utf-8 encoding
+        finally:
+            rows.close()
 
     @property
     def data(self):
         """Return data in specified type:
 
             [{row1:row2},{row1:row3},{row1:row4}...]
-        """
-        sheet = self.sheet
-        title = self.title
-        data = list()
 
-        # zip title and rows
-        for col in range(1, sheet.nrows):
-            s1 = sheet.row_values(col)
-            s2 = [unicode(s).encode('utf-8') for s in s1]  # utf-8 encoding
-            data.append(dict(zip(title, s2)))
-        return data
+        In stream mode data is read from file on every access, use iter_rows instead.
+        """
+        if self.stream:
+            return list(self.iter_rows())
+        if self._data is None:
+            self._data = list(self.iter_rows())
+        return self._data
 
     @property
     def nums(self):
         """Return the number of cases."""
-        return len(self.data)
-
+        if self.stream:
+            return max(sum(1 for _ in self._row_values()) - 1, 0)
+        return max(self.sheet.nrows - 1, 0)
 
 if __name__ == '__main__':
     phone = ExcelReader('phone.xlsx', 0)
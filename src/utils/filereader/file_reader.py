@@ -1,8 +1,43 @@
 # -*- coding: utf-8 -*-
 
+from itertools import islice
+
+import data_cache
 from excel_reader import ExcelReader
 from xml_reader import XMLReader
 from yaml_reader import YamlReader
+from src.utils.config import DefaultConfig
+
+
+def select_rows(rows, iteration):
+    """从rows中取出第0行与iteration指定的行，只读取到需要的最后一行为止。
+
+    :param rows: 行的迭代器，如ExcelReader.iter_rows()。
+    :param iteration: list [start, end]，取出第start到第end行（包含end）；tuple (i, j, ...)，依次取出第i、j...行。
+    :return: [第0行, [第start到end行]] 或 [第0行, 第i行, 第j行, ...]
+    """
+    if isinstance(iteration, list):
+        indexes = [iteration[0], iteration[1]]
+    elif isinstance(iteration, tuple):
+        indexes = list(iteration)
+    else:
+        indexes = list()
+
+    if any(index < 0 for index in indexes):
+        data = list(rows)  # 负数下标需要知道总行数
+    else:
+        data = list(islice(rows, max(indexes + [0]) + 1))
+        if hasattr(rows, 'close'):
+            rows.close()
+
+    re_list = list()
+    re_list.append(data[0])
+    if isinstance(iteration, list):
+        re_list.append(data[iteration[0]:iteration[1]+1])
+    elif isinstance(iteration, tuple):
+        for item in iteration:
+            re_list.append(data[item])
+    return re_list
 
 
 class FileReader(object):
@@ -31,18 +66,20 @@ class FileReader(object):
     def read(self):
         if self.reader == 'ExcelReader':
             sheet = self.file_info['sheet'] if 'sheet' in self.file_info else 0
-            r = ExcelReader(self.file, sheet=sheet)
+            stream = self.file_info.get('stream', False) if isinstance(self.file_info, dict) else False
+            if stream:
+                r = ExcelReader(self.file, sheet=sheet, stream=stream)
+                if 'iteration' in self.file_info:
+                    return select_rows(r.iter_rows(), self.file_info['iteration'])
+                return r.iter_rows()
+
+            # 源文件没有变化时从 data/.cache/ 中读取解析结果
+            path = '{0}\\{1}'.format(DefaultConfig().data_path, self.file)
+            data = data_cache.load(path, ('excel', sheet), lambda: ExcelReader(self.file, sheet=sheet).data)
             if 'iteration' in self.file_info:
-                re_list = list()
-                re_list.append(r.data[0])
-                if isinstance(self.file_info['iteration'], list):
-                    re_list.append(r.data[self.file_info['iteration'][0]:self.file_info['iteration'][1]+1])
-                elif isinstance(self.file_info['iteration'], tuple):
-                    for item in self.file_info['iteration']:
-                        re_list.append(r.data[item])
-                return re_list
+                return select_rows(iter(data), self.file_info['iteration'])
             else:
-                return r.data
+                return data
         elif self.reader == 'XMLReader':
             return XMLReader(self.file)
         elif self.reader == 'YamlReader':
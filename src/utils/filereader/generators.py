@@ -1,8 +1,20 @@
 # -*- coding: utf-8 -*-
 
+import hashlib
+import math
 import random
 import string
 import os
+import struct
+import threading
+import weakref
+from collections import deque
+from itertools import islice
+
+try:
+    import numpy  # Optional, random values are produced in bulk with numpy if installed
+except ImportError:
+    numpy = None
 
 from src.utils.filereader.parsing import flatten_dictionaries, lowercase_keys, safe_to_bool
 from src.utils.logger import Logger
@@ -11,9 +23,47 @@ from src.utils.logger import Logger
 
 Plans: extend these by allowing generators that take generators for input
 Example: generators that case-swap
+
+Random generators produce values in batches: next() hands out values from a prefetched buffer,
+and take(generator, n) returns n values at once as an array (numpy array if numpy is installed):
+
+    ids = take(generator_random_int32(), 100000)
+
+Every random generator has its own random state. Set seed in the generator config to make runs reproducible;
+seeded generators draw from Python's random only, so the values are the same whether numpy is installed or not.
+With shards, each of N parallel workers gets disjoint ids and an independent random stream derived from the
+seed. The worker sets its shard once with set_shard(index, count), or shard/shards are given in the config:
+
+    - generators:
+        - id: {type: number_sequence, start: 1000}
+        - name: {type: random_text, length: 12, seed: 42}
+
+    set_shard(worker_index, worker_count)  # before parsing test files in each worker
+
+The unique generator never yields the same value twice. Its value space is strings of characters with a fixed
+length (plus an optional prefix) or integers in [min, max]; shards get disjoint parts of the space:
+
+    - phone: {type: unique, prefix: '138', character_set: digits, length: 8}
+    - code: {type: unique, min: 100000, max: 999999, mode: permutation, seed: 1}
+    - org: {type: unique, generator: {type: random_text, character_set: alphanumeric_upper, length: 9}}
+
+mode random (default) draws random values and remembers the ones used in a bitset with one bit per value,
+or in a Bloom filter sized from capacity when the space is larger than BITSET_MAX_SIZE.
+mode permutation walks the whole space in a seeded pseudo-random order (a Feistel network) without remembering
+anything.
+With generator, values of another generator are filtered through a Bloom filter.
 """
 
 INT32_MAX_VALUE = 2147483647  # Max of 32 bit unsigned int
+BATCH_SIZE = 1024  # Number of values prefetched at a time by batched generators
+
+BITSET_MAX_SIZE = 1 << 28  # Largest value space tracked with one bit per value (32MB)
+UNIQUE_CAPACITY = 1000000  # Default number of values a unique generator's Bloom filter is sized for
+UNIQUE_ERROR_RATE = 1e-6  # Default false positive rate of the Bloom filter
+UNIQUE_MAX_TRIES = 1000  # Consecutive duplicates after which a unique generator gives up
+
+SHARD = 0  # Index of this worker, used when a generator config doesn't give shard
+SHARDS = 1  # Number of workers sharing generator configs
 
 logger = Logger(__name__).get_logger()
 
@@ -41,12 +91,158 @@ CHARACTER_SETS = {
 }
 
 
-def factory_generate_ids(starting_id=1, increment=1):
+class BatchBuffer(object):
+    """ Hands out one by one values produced in batches by take_batch(n) """
+
+    def __init__(self, take_batch, batch_size=BATCH_SIZE):
+        self.take_batch = take_batch
+        self.batch_size = batch_size
+        self._buffer = deque()
+        self._lock = threading.Lock()
+
+    def next(self):
+        with self._lock:
+            if not self._buffer:
+                self._buffer.extend(_to_list(self.take_batch(self.batch_size)))
+            return self._buffer.popleft()
+
+    def take(self, n):
+        """ Return n values, the buffered ones first
+            Values are always produced in batches of batch_size, so a seeded generator yields the same
+            values whether they are read with next() or take() """
+        with self._lock:
+            parts = [[self._buffer.popleft() for _ in xrange(min(n, len(self._buffer)))]]
+            missing = n - len(parts[0])
+            while missing > 0:
+                batch = self.take_batch(self.batch_size)
+                parts.append(batch[:missing])
+                self._buffer.extend(_to_list(batch[missing:]))
+                missing -= len(parts[-1])
+        return _concat(parts)
+
+
+_BUFFERS = weakref.WeakKeyDictionary()  # Batched generator -> its BatchBuffer
+
+
+def _to_list(values):
+    if numpy is not None and isinstance(values, numpy.ndarray):
+        return values.tolist()
+    return values
+
+
+def _concat(parts):
+    """ Join lists or arrays of values into one array (a list if numpy is not installed) """
+    parts = [part for part in parts if len(part)]
+    if numpy is None:
+        return [value for part in parts for value in part]
+    if len(parts) == 1 and isinstance(parts[0], numpy.ndarray):
+        return parts[0]
+    if not parts:
+        return numpy.array([])
+    return numpy.concatenate([numpy.asarray(part) for part in parts])
+
+
+def batched_generator(take_batch, batch_size=BATCH_SIZE):
+    """ Return a generator yielding values produced in batches by take_batch(n) """
+    buffer = BatchBuffer(take_batch, batch_size)
+
+    def generate_batched():
+        while(True):
+            yield buffer.next()
+    generator = generate_batched()
+    _BUFFERS[generator] = buffer
+    return generator
+
+
+def take(generator, n):
+    """ Return the next n values of generator, in bulk for batched generators """
+    buffer = _BUFFERS.get(generator)
+    if buffer is not None:
+        return buffer.take(n)
+    return list(islice(generator, n))
+
+
+def next_value(generator):
+    """ Next value of generator, read directly from the prefetched buffer for batched generators """
+    buffer = _BUFFERS.get(generator)
+    if buffer is not None:
+        return buffer.next()
+    return next(generator)
+
+
+def set_shard(shard=0, shards=1):
+    """ Set the index of this worker and the number of workers, for generators without shard config """
+    global SHARD, SHARDS
+    if not 0 <= shard < shards:
+        raise ValueError('Shard index {0} is not in range of {1} shards'.format(shard, shards))
+    SHARD, SHARDS = shard, shards
+
+
+def derive_seed(seed, shard):
+    """ Seed of the random stream of one shard, derived from the master seed """
+    if seed is None:
+        return None
+    return int(hashlib.sha1('{0}:{1}'.format(seed, shard)).hexdigest()[:16], 16)
+
+
+def portable_seed(seed):
+    """ Integer seed giving the same stream on every machine
+        random.Random seeds with hash() for values other than int, which differs between builds """
+    if seed is None or isinstance(seed, (int, long)):
+        return seed
+    if isinstance(seed, unicode):
+        seed = seed.encode('utf-8')
+    return int(hashlib.sha1(str(seed)).hexdigest()[:16], 16)
+
+
+class RandomSource(object):
+    """ Random state of one generator
+        Seeded streams only draw from Python's random, so a seed gives the same values with or without numpy;
+        unseeded streams use numpy, if installed, to draw batches faster """
+
+    def __init__(self, seed=None):
+        self.random = random.Random(portable_seed(seed))
+        self.numpy = None
+        if numpy is not None and seed is None:
+            self.numpy = numpy.random.RandomState(self.random.getrandbits(32))
+
+
+def random_int32_batch(n, source=None):
+    """ n random integers in [0, INT32_MAX_VALUE] """
+    source = source or RandomSource()
+    if source.numpy is not None:
+        return source.numpy.randint(0, INT32_MAX_VALUE + 1, size=n, dtype=numpy.int64)
+    return [source.random.randint(0, INT32_MAX_VALUE) for _ in xrange(n)]
+
+
+def random_text_batch(n, legal_characters=string.ascii_letters, min_length=8, max_length=8, source=None):
+    """ n random strings of legal_characters, length between min_length and max_length """
+    source = source or RandomSource()
+    if (source.numpy is not None and isinstance(legal_characters, str) and max_length > 0
+            and '\0' not in legal_characters):
+        characters = numpy.frombuffer(legal_characters, dtype='S1')
+        picked = characters[source.numpy.randint(0, len(characters), size=(n, max_length))]
+        texts = picked.view('S{0}'.format(max_length)).ravel()
+        if min_length == max_length:
+            return texts
+        lengths = source.numpy.randint(min_length, max_length + 1, size=n)
+        return [text[:length] for text, length in zip(texts.tolist(), lengths.tolist())]
+
+    choice = source.random.choice
+    texts = list()
+    for _ in xrange(n):
+        length = source.random.randint(min_length, max_length)
+        texts.append(''.join([choice(legal_characters) for x in xrange(0, length)]))
+    return texts
+
+
+def factory_generate_ids(starting_id=1, increment=1, shard=0, shards=1):
     """ Return function generator for ids starting at starting_id
+        With shards, shard i of N gets every N-th id starting at its own offset, so workers never collide
         Note: needs to be called with () to make generator """
     def generate_started_ids():
-        val = starting_id
-        local_increment = increment
+        val = starting_id + shard * increment
+        local_increment = increment * shards
         while(True):
             yield val
             val += local_increment
@@ -58,28 +254,21 @@ def generator_basic_ids():
     return factory_generate_ids(1)()
 
 
-def generator_random_int32():
+def generator_random_int32(seed=None):
     """ Random integer generator for up to 32-bit signed ints """
-    rand = random.Random()
-    while (True):
-        yield random.randint(0, INT32_MAX_VALUE)
+    source = RandomSource(seed)
+    return batched_generator(lambda n: random_int32_batch(n, source))
 
 
-def factory_generate_text(legal_characters=string.ascii_letters, min_length=8, max_length=8):
+def factory_generate_text(legal_characters=string.ascii_letters, min_length=8, max_length=8, seed=None):
     """ Returns a generator function for text with given legal_characters string and length
         Default is ascii letters, length 8
 
         For hex digits, combine with string.hexstring, etc
         """
     def generate_text():
-        local_min_len = min_length
-        local_max_len = max_length
-        rand = random.Random()
-        while(True):
-            length = random.randint(local_min_len, local_max_len)
-            array = [random.choice(legal_characters)
-                     for x in xrange(0, length)]
-            yield ''.join(array)
+        source = RandomSource(seed)
+        return batched_generator(lambda n: random_text_batch(n, legal_characters, min_length, max_length, source))
 
     return generate_text
 
@@ -107,14 +296,14 @@ def parse_fixed_sequence(config):
     return factory_fixed_sequence(vals)()
 
 
-def factory_choice_generator(values):
+def factory_choice_generator(values, seed=None):
     """ Return a generator that picks values from a list randomly """
 
     def choice_generator():
         my_list = list(values)
-        rand = random.Random()
+        rand = random.Random(portable_seed(seed))
         while(True):
-            yield random.choice(my_list)
+            yield rand.choice(my_list)
     return choice_generator
 
 
@@ -125,7 +314,7 @@ def parse_choice_generator(config):
         raise ValueError('Values for choice sequence must exist')
     if not isinstance(vals, list):
         raise ValueError('Values must be a list of entries')
-    return factory_choice_generator(vals)()
+    return factory_choice_generator(vals, seed=stream_seed(config))()
 
 
 def factory_env_variable(env_variable):
@@ -149,9 +338,166 @@ def factory_env_string(env_string):
 
     return return_variable
 
+class BitSet(object):
+    """ One bit for each integer in range(size) """
+
+    def __init__(self, size):
+        self.size = size
+        self.bits = bytearray((size + 7) // 8)
+
+    def add(self, index):
+        """ Set bit of index, return False if it was already set """
+        byte, bit = index >> 3, 1 << (index & 7)
+        if self.bits[byte] & bit:
+            return False
+        self.bits[byte] |= bit
+        return True
+
+    def __contains__(self, index):
+        return bool(self.bits[index >> 3] & (1 << (index & 7)))
+
+
+class BloomFilter(object):
+    """ Compact set of values, a value never added is reported as added with probability error_rate
+        as long as no more than capacity values are added """
+
+    def __init__(self, capacity=UNIQUE_CAPACITY, error_rate=UNIQUE_ERROR_RATE):
+        self.size = max(8, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.hashes = max(1, int(round(self.size / float(capacity) * math.log(2))))
+        self.bits = BitSet(self.size)
+
+    def _indexes(self, value):
+        h1, h2 = struct.unpack('<QQ', hashlib.md5(repr(value)).digest())
+        return [(h1 + i * h2) % self.size for i in xrange(self.hashes)]
+
+    def add(self, value):
+        """ Add value, return False if it was (probably) added before """
+        added = False
+        for index in self._indexes(value):
+            if self.bits.add(index):
+                added = True
+        return added
+
+    def __contains__(self, value):
+        return all(index in self.bits for index in self._indexes(value))
+
+
+def text_from_index(index, characters, length):
+    """ The index-th string of length characters, counting in base len(characters) """
+    base = len(characters)
+    text = list()
+    for _ in xrange(length):
+        index, digit = divmod(index, base)
+        text.append(characters[digit])
+    return ''.join(reversed(text))
+
+
+class FeistelPermutation(object):
+    """ Seeded pseudo-random permutation of range(size): a balanced Feistel network over the smallest even
+        number of bits covering size, with cycle walking for values outside range(size)
+        Unlike a stride, a few consecutive values don't reveal the rest of the order """
+    ROUNDS = 4
+
+    def __init__(self, size, rand):
+        self.size = size
+        self.half_bits = max(1, ((size - 1).bit_length() + 1) // 2)
+        self.mask = (1 << self.half_bits) - 1
+        self.keys = [rand.getrandbits(64) for _ in xrange(self.ROUNDS)]
+
+    def _round(self, value, key):
+        value = ((value ^ key) * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+        value ^= value >> 29
+        return value & self.mask
+
+    def _encrypt(self, value):
+        left, right = value >> self.half_bits, value & self.mask
+        for key in self.keys:
+            left, right = right, left ^ self._round(right, key)
+        return (left << self.half_bits) | right
+
+    def __call__(self, position):
+        """ Value at position, each position in range(size) maps to a different value in range(size) """
+        value = self._encrypt(position)
+        while value >= self.size:  # Walk the cycle back into range, still a bijection on range(size)
+            value = self._encrypt(value)
+        return int(value)
+
+
+def factory_unique_index(space, encode, mode='random', seed=None, shard=0, shards=1,
+                         capacity=UNIQUE_CAPACITY, error_rate=UNIQUE_ERROR_RATE):
+    """ Return a generator function for unique values encode(index), index in range(space)
+        Shard i of N only uses indexes i, i + N, i + 2N... so shards never collide """
+    size = (space - shard + shards - 1) // shards  # Number of indexes of this shard
+    if size <= 0:
+        raise ValueError('Value space of {0} is too small for shard {1} of {2}'.format(space, shard, shards))
+
+    def generate_unique():
+        rand = random.Random(portable_seed(seed))
+        if mode == 'permutation':
+            permutation = FeistelPermutation(size, rand)
+            position = 0
+            while position < size:
+                yield encode(permutation(position) * shards + shard)
+                position += 1
+        else:
+            seen = BitSet(size) if size <= BITSET_MAX_SIZE else BloomFilter(capacity, error_rate)
+            count = 0
+            tries = 0
+            while count < size:
+                index = rand.randrange(size)
+                if seen.add(index):
+                    count += 1
+                    tries = 0
+                    yield encode(index * shards + shard)
+                else:
+                    tries += 1
+                    if tries >= UNIQUE_MAX_TRIES and size > BITSET_MAX_SIZE:
+                        raise ValueError('No new unique value found after {0} tries'.format(tries))
+        raise ValueError('All {0} unique values have been generated'.format(size))
+
+    return generate_unique
+
+
+def factory_unique_filter(generator, capacity=UNIQUE_CAPACITY, error_rate=UNIQUE_ERROR_RATE):
+    """ Return a generator function yielding the values of generator that were not yielded before """
+
+    def filter_unique():
+        seen = BloomFilter(capacity, error_rate)
+        tries = 0
+        while(True):
+            value = next_value(generator)
+            if seen.add(value):
+                tries = 0
+                yield value
+            else:
+                tries += 1
+                if tries >= UNIQUE_MAX_TRIES:
+                    raise ValueError('No new unique value found after {0} tries'.format(tries))
+
+    return filter_unique
+
 """ Implements the parsing logic for YAML, and acts as single point for reading configuration """
 
 
+def shard_config(configuration):
+    """ (shard, shards) of a generator config, module defaults set by set_shard if not given """
+    shards = int(configuration.get(u'shards') or SHARDS)
+    shard = configuration.get(u'shard')
+    shard = SHARD if shard is None else int(shard)
+    if not 0 <= shard < shards:
+        raise ValueError('Shard index {0} is not in range of {1} shards'.format(shard, shards))
+    return shard, shards
+
+
+def stream_seed(configuration):
+    """ Seed of a random generator: the config seed, derived per shard when there are several shards """
+    seed = configuration.get(u'seed')
+    shard, shards = shard_config(configuration)
+    if seed is None or shards == 1:
+        return seed
+    return derive_seed(seed, shard)
+
+
 def parse_random_text_generator(configuration):
     """ Parses configuration options for a random text generator """
     character_set = configuration.get(u'character_set')
@@ -178,10 +524,51 @@ def parse_random_text_generator(configuration):
         min_length = length
         max_length = length
 
+    seed = stream_seed(configuration)
     if characters:
-        return factory_generate_text(legal_characters=characters, min_length=min_length, max_length=max_length)()
+        return factory_generate_text(legal_characters=characters, min_length=min_length, max_length=max_length,
+                                     seed=seed)()
+    else:
+        return factory_generate_text(min_length=min_length, max_length=max_length, seed=seed)()
+
+
+def parse_unique_generator(configuration):
+    """ Parses configuration options for a unique generator """
+    mode = str(configuration.get(u'mode') or 'random').lower()
+    if mode not in ('random', 'permutation'):
+        raise ValueError('Unique generator mode must be random or permutation, not {0}'.format(mode))
+    capacity = int(configuration.get(u'capacity') or UNIQUE_CAPACITY)
+    error_rate = float(configuration.get(u'error_rate') or UNIQUE_ERROR_RATE)
+
+    if configuration.get(u'generator'):
+        if mode == 'permutation':
+            raise ValueError('Permutation mode needs a value space, it can not wrap a generator')
+        return factory_unique_filter(parse_generator(configuration[u'generator']), capacity, error_rate)()
+
+    if configuration.get(u'min') is not None or configuration.get(u'max') is not None:
+        if configuration.get(u'max') is None:
+            raise ValueError('Unique generator with min needs max, the largest value to generate')
+        low = int(configuration.get(u'min') or 0)
+        high = int(configuration[u'max'])
+        space = high - low + 1
+        encode = lambda index: low + index
     else:
-        return factory_generate_text(min_length=min_length, max_length=max_length)()
+        character_set = configuration.get(u'character_set')
+        if character_set:
+            if character_set.lower() not in CHARACTER_SETS:
+                raise ValueError(
+                    "Illegal character set name, is not defined: {0}".format(character_set))
+            characters = CHARACTER_SETS[character_set.lower()]
+        else:
+            characters = str(configuration.get(u'characters') or string.ascii_letters)
+        length = int(configuration.get(u'length') or 8)
+        prefix = str(configuration.get(u'prefix') or '')
+        space = len(characters) ** length
+        encode = lambda index: prefix + text_from_index(index, characters, length)
+
+    shard, shards = shard_config(configuration)
+    return factory_unique_index(space, encode, mode=mode, seed=stream_seed(configuration), shard=shard,
+                                shards=shards, capacity=capacity, error_rate=error_rate)()
 
 
 # List of valid generator types
@@ -212,6 +599,7 @@ def register_generator(typename, parse_function):
 
 # Try registering a new generator
 register_generator('choice', parse_choice_generator)
+register_generator('unique', parse_unique_generator)
 
 
 def parse_generator(configuration):
@@ -242,9 +630,10 @@ def parse_generator(configuration):
             increment = 1
         else:
             increment = int(increment)
-        return factory_generate_ids(start, increment)()
+        shard, shards = shard_config(configuration)
+        return factory_generate_ids(start, increment, shard=shard, shards=shards)()
     elif gen_type == u'random_int':
-        return generator_random_int32()
+        return generator_random_int32(seed=stream_seed(configuration))
     elif gen_type == u'random_text':
         return parse_random_text_generator(configuration)
     elif gen_type in GENERATOR_TYPES:
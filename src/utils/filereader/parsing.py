@@ -18,11 +18,27 @@ def safe_substitute_unicode_template(templated_string, variable_map):
     """ 用 string.Template 的 safe_substitute 方法将传入的模板string 使用 variable_map进行解析，替换模板变量，返回str """
 
     my_template = string.Template(encode_unicode_bytes(templated_string))
-    my_escaped_dict = dict(map(lambda x: (x[0], encode_unicode_bytes(x[1])), variable_map.items()))
-    templated = my_template.safe_substitute(my_escaped_dict)
+    templated = my_template.safe_substitute(escape_unicode_values(variable_map))
     return templated
 
 
+def template_variables(template_string):
+    """ 返回模板字符串中引用的变量名集合，$$ 转义与非法占位符会被忽略 """
+    names = set()
+    if not isinstance(template_string, basestring):
+        return names
+    for match in string.Template.pattern.finditer(template_string):
+        name = match.group('named') or match.group('braced')
+        if name:
+            names.add(name)
+    return names
+
+
+def escape_unicode_values(variable_map):
+    """ 将 variable_map 中的值都转为 UTF-8 字符串，用于模板替换 """
+    return dict(map(lambda x: (x[0], encode_unicode_bytes(x[1])), variable_map.items()))
+
+
 def safe_to_json(in_obj):
     """ Safely get dict from object if present for json dumping """
     if isinstance(in_obj, bytearray):
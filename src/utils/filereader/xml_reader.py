@@ -49,12 +49,93 @@ ReadXML -- read xml and return api, and api type.
         get_text(tag)
             return tag text.
 
+InterfaceRegistry -- parsed xml files cache shared by all ReadXML instances.
+
+    每个文件只解析一次，并将所有节点的 url/type/method/file/sheet 存入 dict，
+    文件修改时间变化时才重新解析。
+
 """
+import os
+import re
+import threading
 from xml.etree.ElementTree import ElementTree
 from src.utils.config import DefaultConfig
+from src.utils.filereader import data_cache
 from src.utils.utils_exception import DataFileNotAvailableException, DataError
 from src.utils.logger import Logger
 
+INTERFACE_FIELDS = ('type', 'method', 'file', 'sheet')
+_PLAIN_TAG = re.compile(r'^[A-Za-z_][\w\-]*$')
+
+
+class InterfaceRegistry(object):
+    """解析后的接口文件，按节点名索引。
+
+    text[tag] 为根节点下 <tag> 的文本，fields[tag] 为 {'type', 'method', 'file', 'sheet'} 中存在的子节点文本，
+    与 tree.find(tag)、tree.find('.//tag/type') 的结果一致，但查找为 O(1)。
+    """
+    _cache = dict()  # 文件路径 -> InterfaceRegistry
+    _lock = threading.Lock()
+
+    def __init__(self, path, mtime):
+        self.path = path
+        self.mtime = mtime
+        self._tree = None
+        # 索引保存在 data/.cache/ 中，文件没有变化时不必解析 xml；tree 只在使用 xpath 时才解析
+        self.text, self.tags, self.fields = data_cache.load(path, 'xml', self._index)
+
+    @property
+    def tree(self):
+        if self._tree is None:
+            try:
+                self._tree = ElementTree(file=self.path)
+            except IOError as e:
+                raise DataFileNotAvailableException(e)
+        return self._tree
+
+    def _index(self):
+        root = self.tree.getroot()
+        text = dict()
+        tags = list()
+        for element in root:
+            if element.tag not in text:
+                text[element.tag] = element.text.strip() if element.text else None
+            if element.tag != 'Base':
+                tags.append(element.tag)
+
+        fields = dict()
+        for element in root.iter():
+            for field in INTERFACE_FIELDS:
+                child = element.find(field)
+                if child is not None:
+                    element_fields = fields.setdefault(element.tag, dict())
+                    if field not in element_fields:
+                        element_fields[field] = child.text.strip() if child.text else None
+        return text, tags, fields
+
+    @classmethod
+    def get(cls, path):
+        """返回 path 对应的 InterfaceRegistry，文件修改时间变化时才重新解析。"""
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError as e:
+            raise DataFileNotAvailableException(e)
+
+        registry = cls._cache.get(path)
+        if registry is None or registry.mtime != mtime:
+            with cls._lock:
+                registry = cls._cache.get(path)
+                if registry is None or registry.mtime != mtime:
+                    registry = cls(path, mtime)
+                    cls._cache[path] = registry
+        return registry
+
+    @classmethod
+    def clear(cls):
+        """清空缓存。"""
+        with cls._lock:
+            cls._cache.clear()
+
 
 class XMLReader(object):
 
@@ -62,14 +143,17 @@ class XMLReader(object):
         self.logger = Logger(self.__class__.__name__).get_logger()
         self.xml = '{0}\\{1}'.format(DefaultConfig().data_path, xml)
 
-        self.tree = self._tree()
+        InterfaceRegistry.get(self.xml)  # 文件不存在时立即报错
         self.logger.info('read file: {0}'.format(self.xml))
 
-    def _tree(self):
-        try:
-            return ElementTree(file=self.xml)
-        except IOError as e:
-            raise DataFileNotAvailableException(e)
+    @property
+    def registry(self):
+        """每次访问都检查文件修改时间，文件修改后使用重新解析的结果，长期持有的 XMLReader 也能读到新内容。"""
+        return InterfaceRegistry.get(self.xml)
+
+    @property
+    def tree(self):
+        return self.registry.tree
 
     def get_url(self, tag):
         """Get interface url.
@@ -85,11 +169,21 @@ class XMLReader(object):
         :param tag: xml tag name or xpath.
         :return: tag text.
         """
-        tree = self.tree
-        try:
-            return tree.find(tag).text.strip()
-        except AttributeError:
+        if _PLAIN_TAG.match(tag):
+            text = self.registry.text.get(tag)
+        else:
+            element = self.tree.find(tag)
+            text = element.text if element is not None else None
+        if text is None:
             raise DataError('\'{0}\' does not have \'{1}\' element.Check your file.'.format(self.xml, tag))
+        return text.strip()
+
+    def _get_field(self, tag, field):
+        text = self.registry.fields.get(tag, dict()).get(field)
+        if text is None:
+            raise DataError('\'{0}\' does not have \'.//{1}/{2}\' element.Check your file.'.format(
+                self.xml, tag, field))
+        return text
 
     def get_type(self, tag):
         """Get interface type.
@@ -97,7 +191,7 @@ class XMLReader(object):
         :param tag: xml tag name.
         :return: interface type.
         """
-        return self.get_text('.//{0}/type'.format(tag))
+        return self._get_field(tag, 'type')
 
     def get_method(self, tag):
         """Get interface type.
@@ -105,14 +199,14 @@ class XMLReader(object):
         :param tag: xml tag name.
         :return: interface method.
         """
-        return self.get_text('.//{0}/method'.format(tag))
+        return self._get_field(tag, 'method')
 
     # todo: 补齐注释
     def get_file(self, tag):
-        return self.get_text('.//{0}/file'.format(tag))
+        return self._get_field(tag, 'file')
 
     def get_sheet(self, tag):
-        return self.get_text('.//{0}/sheet'.format(tag))
+        return self._get_field(tag, 'sheet')
 
     @property
     def base_url(self):
@@ -120,13 +214,7 @@ class XMLReader(object):
         return self.get_text('Base')
 
     def get_tags(self):
-        base = self.tree.find('Base')
-        tags = list()
-        for element in self.tree.getroot().getchildren():
-            if element != base:
-                tags.append(element.tag)
-        return tags
-
+        return list(self.registry.tags)
 
 if __name__ == '__main__':
     x1 = XMLReader('zhigou.xml')
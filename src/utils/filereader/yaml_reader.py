@@ -1,7 +1,12 @@
 # -*- coding: utf-8 -*-
 
 import yaml
+try:
+    from yaml import CSafeLoader as SafeLoader  # libyaml 可用时使用 C 实现，速度快很多
+except ImportError:
+    from yaml import SafeLoader
 from src.utils.config import DefaultConfig
+from src.utils.filereader import data_cache
 from src.utils.logger import Logger
 
 
@@ -21,8 +26,11 @@ class YamlReader(object):
         return self._yaml
 
     def _read(self):
+        return data_cache.load(self.fpath, 'yaml', self._parse)
+
+    def _parse(self):
         logger.info('read yaml file {}'.format(self.fpath))
         with open(self.fpath, 'r') as f:
-            al = yaml.safe_load_all(f)
+            al = yaml.load_all(f, Loader=SafeLoader)
             y = [x for x in al]
             return y
@@ -0,0 +1,344 @@
+# -*- coding: utf-8 -*-
+"""在一个事件循环（asyncore）中并发发送大量 HTTP 请求。
+
+线程池的并发数受限于线程数，AsyncHTTPClient 在单个线程里用非阻塞 socket 同时处理
+成千上万个请求，同一时刻在途的请求数不超过 concurrency。
+
+For example:
+
+    client = AsyncHTTPClient(concurrency=1000)
+    responses = client.send_all([AsyncRequest('http://host/api/a'),
+                                 AsyncRequest('http://host/api/b', 'POST', body='{}')])
+    for r in responses:
+        print r.status_code, r.content
+
+class:
+
+AsyncRequest -- 一个待发送的请求（method, url, headers, body）
+
+AsyncResponse -- 请求的结果，请求出错时 error 不为 None
+
+AsyncHTTPClient -- 事件循环客户端
+
+    methods:
+
+        send_all(requests)
+            发送所有请求，按传入顺序返回 AsyncResponse 列表。
+
+"""
+import asyncore
+import base64
+import errno
+import socket
+import ssl
+import sys
+import time
+import urlparse
+from collections import deque
+from email import message_from_string
+
+from src.utils.logger import Logger
+from src.utils.utils_exception import UnSupportMethod
+from src.utils.interface.http_client import METHODS
+
+DEFAULT_CONCURRENCY = 1000
+DEFAULT_TIMEOUT = 30
+READ_SIZE = 65536
+
+
+class AsyncRequest(object):
+    """ 一个待发送的请求 """
+
+    def __init__(self, url, method='GET', headers=None, body=None, auth=None, delay=None):
+        """
+        :param headers: dict
+        :param body: str，unicode 会以 utf-8 编码发送
+        :param auth: (username, password)，使用 Basic 认证
+        :param delay: 开始事件循环后等待多少秒再发送
+        """
+        self.url = url
+        self.method = method.upper()
+        self.headers = headers or dict()
+        self.body = body
+        self.auth = auth
+        self.delay = delay
+
+
+class AsyncResponse(object):
+    """ 请求的结果 """
+    url = None
+    status_code = None
+    reason = None
+    headers = None  # [(小写header名, 值), ...]
+    content = None
+    error = None
+    elapsed = None  # 从开始连接到收到完整响应的秒数
+    connect_time = None  # 从开始连接到 TCP 连接建立的秒数
+    starttransfer_time = None  # 从开始连接到收到第一个字节的秒数
+    request_size = None  # 发送的原始请求字节数
+
+    def __init__(self, url):
+        self.url = url
+        self.headers = list()
+
+
+def _decode_chunked(body):
+    """ 解码 Transfer-Encoding: chunked 的 body """
+    output = list()
+    pos = 0
+    while True:
+        line_end = body.index('\r\n', pos)
+        size = int(body[pos:line_end].split(';')[0].strip(), 16)
+        if size == 0:
+            break
+        start = line_end + 2
+        output.append(body[start:start + size])
+        pos = start + size + 2
+    return ''.join(output)
+
+
+def parse_response(url, raw):
+    """ 将收到的原始响应解析成 AsyncResponse """
+    response = AsyncResponse(url)
+    head, sep, body = raw.partition('\r\n\r\n')
+    if not sep:
+        raise ValueError('Incomplete HTTP response from {0}'.format(url))
+
+    status_line, _, header_string = head.partition('\r\n')
+    parts = status_line.split(' ', 2)
+    response.status_code = int(parts[1])
+    response.reason = parts[2] if len(parts) > 2 else ''
+    response.headers = [(k.lower(), v) for k, v in message_from_string(header_string).items()]
+
+    headers = dict(response.headers)
+    if headers.get('transfer-encoding', '').lower() == 'chunked':
+        body = _decode_chunked(body)
+    elif 'content-length' in headers:
+        body = body[:int(headers['content-length'])]
+    response.content = body
+    return response
+
+
+def build_request(request):
+    """ 生成要发送的原始请求 """
+    parsed = urlparse.urlsplit(request.url)
+    path = parsed.path or '/'
+    if parsed.query:
+        path = '{0}?{1}'.format(path, parsed.query)
+
+    body = request.body
+    if isinstance(body, unicode):
+        body = body.encode('utf-8')
+
+    headers = {'Host': parsed.netloc, 'Connection': 'close', 'Accept-Encoding': 'identity',
+               'User-Agent': 'AutoTestFramework'}
+    headers.update(request.headers)
+    if request.auth:
+        headers['Authorization'] = 'Basic ' + base64.b64encode('{0}:{1}'.format(*request.auth))
+    if body is not None or request.method in ('POST', 'PUT'):
+        headers['Content-Length'] = str(len(body or ''))
+
+    lines = ['{0} {1} HTTP/1.1'.format(request.method, path)]
+    lines.extend('{0}: {1}'.format(k, v) for k, v in headers.items())
+    return '\r\n'.join(lines) + '\r\n\r\n' + (body or '')
+
+
+class _RequestDispatcher(asyncore.dispatcher):
+    """ 一个请求对应一个 dispatcher，负责连接、发送请求、接收响应 """
+
+    def __init__(self, request, socket_map, on_done, verify=True):
+        asyncore.dispatcher.__init__(self, map=socket_map)
+        self.request = request
+        self.on_done = on_done
+        self.verify = verify
+        self.started = time.time()
+        self.out_buffer = build_request(request)
+        self.request_size = len(self.out_buffer)
+        self.connected_at = None
+        self.first_byte_at = None
+        self.in_buffer = list()
+        self.finished = False
+        self.handshaking = False
+
+        parsed = urlparse.urlsplit(request.url)
+        self.is_https = parsed.scheme == 'https'
+        self.host = parsed.hostname
+        self.port = parsed.port or (443 if self.is_https else 80)
+
+        self.create_socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            self.connect((self.host, self.port))
+        except socket.error:
+            self.close()  # 从 socket_map 中移除，否则事件循环还会轮询它
+            raise
+
+    def handle_connect(self):
+        self.connected_at = time.time()
+        if self.is_https:
+            context = ssl.create_default_context()
+            if not self.verify:
+                context.check_hostname = False
+                context.verify_mode = ssl.CERT_NONE
+            self.del_channel()
+            self.set_socket(context.wrap_socket(self.socket, server_hostname=self.host,
+                                                do_handshake_on_connect=False))
+            self.handshaking = True
+            self._handshake()
+
+    def _handshake(self):
+        try:
+            self.socket.do_handshake()
+            self.handshaking = False
+        except ssl.SSLError as e:
+            if e.args[0] not in (ssl.SSL_ERROR_WANT_READ, ssl.SSL_ERROR_WANT_WRITE):
+                raise
+
+    def writable(self):
+        return not self.connected or self.handshaking or bool(self.out_buffer)
+
+    def handle_write(self):
+        if self.handshaking:
+            self._handshake()
+            return
+        sent = self.send(self.out_buffer)
+        self.out_buffer = self.out_buffer[sent:]
+
+    def _read_available(self):
+        """ 读取 socket 中当前可读的全部数据，对端关闭连接时返回 True """
+        while True:
+            try:
+                data = self.socket.recv(READ_SIZE)
+            except ssl.SSLError as e:
+                if e.args[0] == ssl.SSL_ERROR_WANT_READ:
+                    return False
+                if e.args[0] in (ssl.SSL_ERROR_EOF, ssl.SSL_ERROR_ZERO_RETURN):
+                    return True
+                raise
+            except socket.error as e:
+                if e.args[0] in (errno.EWOULDBLOCK, errno.EAGAIN):
+                    return False
+                if e.args[0] in (errno.ECONNRESET, errno.ENOTCONN, errno.ESHUTDOWN):
+                    return True
+                raise
+            if not data:
+                return True
+            if self.first_byte_at is None:
+                self.first_byte_at = time.time()
+            self.in_buffer.append(data)
+
+    def handle_read(self):
+        if self.handshaking:
+            self._handshake()
+        elif self._read_available():
+            self.handle_close()
+
+    def handle_close(self):
+        if self.finished:
+            return
+        try:
+            self._read_available()
+        except (socket.error, ssl.SSLError):
+            pass
+        response = AsyncResponse(self.request.url)
+        try:
+            response = parse_response(self.request.url, ''.join(self.in_buffer))
+        except Exception as e:
+            response.error = e
+        self.finish(response)
+
+    def handle_error(self):
+        response = AsyncResponse(self.request.url)
+        response.error = sys.exc_info()[1]
+        self.finish(response)
+
+    def timeout(self):
+        response = AsyncResponse(self.request.url)
+        response.error = socket.timeout('Request to {0} timed out'.format(self.request.url))
+        self.finish(response)
+
+    def finish(self, response):
+        if self.finished:
+            return
+        self.finished = True
+        self.close()
+        response.elapsed = time.time() - self.started
+        response.request_size = self.request_size
+        if self.connected_at is not None:
+            response.connect_time = self.connected_at - self.started
+        if self.first_byte_at is not None:
+            response.starttransfer_time = self.first_byte_at - self.started
+        self.on_done(self, response)
+
+
+class AsyncHTTPClient(object):
+    """ 用一个事件循环发送请求，同一时刻在途的请求不超过 concurrency 个 """
+
+    def __init__(self, concurrency=DEFAULT_CONCURRENCY, timeout=DEFAULT_TIMEOUT, verify=True):
+        """
+        :param concurrency: 最大在途请求数
+        :param timeout: 单个请求的超时秒数
+        :param verify: https 是否校验证书
+        """
+        self.logger = Logger(__name__).get_logger()
+        if concurrency < 1:
+            raise ValueError('Concurrency must be at least 1, got {0}'.format(concurrency))
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.verify = verify
+
+    def send_all(self, requests):
+        """ 发送所有请求，按传入顺序返回 AsyncResponse 列表 """
+        for request in requests:
+            if request.method not in METHODS:
+                raise UnSupportMethod(u'不支持的method:{0}，请检查传入参数！'.format(request.method))
+
+        socket_map = dict()
+        responses = [None] * len(requests)
+        pending = deque(enumerate(requests))
+        delayed = list()
+        running = dict()  # id(dispatcher) -> (dispatcher, 请求下标)
+        loop_start = time.time()
+
+        def on_done(dispatcher, response):
+            index = running.pop(id(dispatcher))[1]
+            responses[index] = response
+            if response.error:
+                self.logger.error('{0} {1} failed: {2}'.format(
+                    requests[index].method, requests[index].url, response.error))
+            else:
+                self.logger.info('{0} {1} -> {2}'.format(
+                    requests[index].method, requests[index].url, response.status_code))
+
+        def start(index, request):
+            try:
+                dispatcher = _RequestDispatcher(request, socket_map, on_done, verify=self.verify)
+            except Exception as e:
+                responses[index] = AsyncResponse(request.url)
+                responses[index].error = e
+                return
+            running[id(dispatcher)] = (dispatcher, index)
+
+        while pending or delayed or running:
+            now = time.time()
+            # 到时间的延迟请求放回待发送队列
+            ready = [item for item in delayed if loop_start + item[1].delay <= now]
+            for item in ready:
+                delayed.remove(item)
+                pending.appendleft(item)
+
+            while pending and len(running) < self.concurrency:
+                index, request = pending.popleft()
+                if request.delay and loop_start + request.delay > now:
+                    delayed.append((index, request))
+                    continue
+                start(index, request)
+
+            for dispatcher in [d for d, _ in running.values() if now - d.started > self.timeout]:
+                dispatcher.timeout()
+
+            if running:
+                asyncore.loop(timeout=0.05, map=socket_map, use_poll=True, count=1)
+            elif delayed:
+                time.sleep(0.01)
+
+        return responses
@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 
-import requests
 import json
+from src.utils.interface.session_pool import PooledSession
 from src.utils.logger import Logger
 from src.utils.utils_exception import UnSupportMethod
 
@@ -19,7 +19,7 @@ class HTTPClient(object):
         self.logger = Logger(__name__).get_logger()
 
         self.url = url
-        self.session = requests.session()
+        self.session = PooledSession()  # cookies/headers 属于本实例，连接来自进程级连接池
         self.method = method.upper()
         self.headers = headers
         self.cookie = cookie
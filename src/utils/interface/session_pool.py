@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""进程级 HTTP 连接池，所有请求共用 keep-alive 连接，避免每次请求都重新建立 TCP/TLS 连接。
+
+连接池按 scheme://host:port 区分，每个 host 一个 requests 的 HTTPAdapter（urllib3 连接池，线程安全）。
+PooledSession 是普通的 requests.Session，cookies 与 headers 仍然属于各自的 session，
+只是发送请求时从进程级连接池中取连接。
+
+配置读取 config.ini 中的 [http] 段，均可不配置：
+
+    [http]
+    pool_size = 10    ; 每个 host 最多保留的连接数
+    max_retries = 0   ; 连接失败时的重试次数
+    keep_alive = 1    ; 为 0 时每次请求后关闭连接
+
+For example:
+
+    session = PooledSession()
+    session.post('http://host/api', data)
+
+    get_session('http://host/').get('http://host/api')  # 同一个 host 共用一个 session
+
+"""
+import threading
+import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.utils.config import DefaultConfig, NoSectionError, NoOptionError
+from src.utils.logger import Logger
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_MAX_RETRIES = 0
+DEFAULT_KEEP_ALIVE = True
+
+logger = Logger(__name__).get_logger()
+
+_lock = threading.RLock()
+_adapters = dict()  # scheme://host:port -> HTTPAdapter
+_sessions = dict()  # scheme://host:port -> PooledSession
+_settings = dict()
+
+
+def _read_setting(option, default):
+    """ 读取 config.ini [http] 段中的配置，没有配置时返回 default """
+    try:
+        return DefaultConfig().getint('http', option)
+    except (NoSectionError, NoOptionError):
+        return default
+
+
+def settings():
+    """ 返回当前的连接池配置 {'pool_size', 'max_retries', 'keep_alive'} """
+    with _lock:
+        if not _settings:
+            _settings['pool_size'] = _read_setting('pool_size', DEFAULT_POOL_SIZE)
+            _settings['max_retries'] = _read_setting('max_retries', DEFAULT_MAX_RETRIES)
+            _settings['keep_alive'] = bool(_read_setting('keep_alive', DEFAULT_KEEP_ALIVE))
+        return dict(_settings)
+
+
+def configure(pool_size=None, max_retries=None, keep_alive=None):
+    """ 修改连接池配置，已建立的连接池会被关闭，之后的请求按新配置重新建立 """
+    current = settings()
+    with _lock:
+        if pool_size is not None:
+            current['pool_size'] = pool_size
+        if max_retries is not None:
+            current['max_retries'] = max_retries
+        if keep_alive is not None:
+            current['keep_alive'] = keep_alive
+        _settings.update(current)
+
+        for adapter in _adapters.values():
+            adapter.close()
+        _adapters.clear()
+        _sessions.clear()
+    logger.info('Configure http pool: {0}'.format(current))
+
+
+def pool_key(url):
+    """ 连接池的 key：scheme://host:port """
+    parsed = urlparse.urlsplit(url)
+    scheme = parsed.scheme.lower()
+    port = parsed.port or (443 if scheme == 'https' else 80)
+    return '{0}://{1}:{2}'.format(scheme, (parsed.hostname or '').lower(), port)
+
+
+def get_adapter(url):
+    """ 返回 url 所在 host 的共享 HTTPAdapter，不存在时按配置新建 """
+    key = pool_key(url)
+    adapter = _adapters.get(key)
+    if adapter is None:
+        config = settings()
+        with _lock:
+            adapter = _adapters.get(key)
+            if adapter is None:
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=config['pool_size'],
+                                      max_retries=config['max_retries'])
+                _adapters[key] = adapter
+                logger.info('Create http pool for {0}, pool size {1}'.format(key, config['pool_size']))
+    return adapter
+
+
+class PooledSession(requests.Session):
+    """ 从进程级连接池取连接的 requests.Session """
+
+    def __init__(self):
+        requests.Session.__init__(self)
+        if not settings()['keep_alive']:
+            self.headers['Connection'] = 'close'
+
+    def get_adapter(self, url):
+        """ 不使用 session 自己的 adapter，而是使用共享的连接池 """
+        return get_adapter(url)
+
+
+def get_session(url):
+    """ 返回 url 所在 host 的共享 PooledSession，同一个 host 的调用方共用 cookies """
+    key = pool_key(url)
+    session = _sessions.get(key)
+    if session is None:
+        with _lock:
+            session = _sessions.get(key)
+            if session is None:
+                session = PooledSession()
+                _sessions[key] = session
+    return session
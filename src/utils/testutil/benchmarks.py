@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+"""Benchmark 是一种特殊的 RestTest，不做校验，而是重复请求同一个接口并统计性能指标。
+
+yaml 中写法：
+
+    - benchmark:
+        - name: "Get person list"
+        - url: "/api/person/"
+        - warmup_runs: 10  # 预热次数，不计入结果
+        - benchmark_runs: 1000
+        - concurrency: 50  # 同时在途的请求数
+        - metrics:
+            - total_time: [mean, p50, p95, p99]
+            - connect_time: median
+            - starttransfer_time: p95
+            - size_download  # 不做聚合，保留每一次的原始数据
+
+可用的指标见 METRICS，可用的聚合方式见 AGGREGATES。
+"""
+
+import math
+
+from src.utils.filereader.parsing import flatten_dictionaries, lowercase_keys
+from src.utils.testutil.tests import RestTest
+
+# 可以统计的指标，与 curl 的同名指标含义一致，时间单位为秒
+METRICS = {
+    'connect_time': u'从开始请求到建立 TCP 连接的时间',
+    'starttransfer_time': u'从开始请求到收到第一个字节的时间（time to first byte）',
+    'total_time': u'从开始请求到收到完整响应的时间',
+    'request_size': u'发送的请求大小（字节）',
+    'size_upload': u'发送的 body 大小（字节）',
+    'size_download': u'收到的 body 大小（字节）'
+}
+METRIC_ALIASES = {'time_to_first_byte': 'starttransfer_time'}
+
+
+def percentile(array, percent):
+    """ 线性插值计算百分位数，percent 取 0 - 100 """
+    ordered = sorted(array)
+    if not ordered:
+        return None
+    rank = (len(ordered) - 1) * percent / 100.0
+    low = int(math.floor(rank))
+    high = int(math.ceil(rank))
+    if low == high:
+        return ordered[low]
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def std_deviation(array):
+    """ 总体标准差 """
+    if not array or len(array) == 1:
+        return 0
+    average = AGGREGATES['mean_arithmetic'](array)
+    variance = sum(map(lambda x: (x - average) ** 2, array)) / len(array)
+    return math.sqrt(variance)
+
+
+# 聚合方式：名称 -> 聚合函数（传入一个数值列表，返回一个数值）
+AGGREGATES = {
+    'mean_arithmetic': lambda x: float(sum(x)) / float(len(x)),
+    'mean': lambda x: float(sum(x)) / float(len(x)),
+    'mean_harmonic': lambda x: float(len(x)) / sum([1.0 / y for y in x]),
+    'median': lambda x: percentile(x, 50),
+    'std_deviation': std_deviation,
+    'sum': lambda x: sum(x),
+    'total': lambda x: sum(x),
+    'min': lambda x: min(x),
+    'max': lambda x: max(x),
+    'p50': lambda x: percentile(x, 50),
+    'p90': lambda x: percentile(x, 90),
+    'p95': lambda x: percentile(x, 95),
+    'p99': lambda x: percentile(x, 99)
+}
+
+
+def register_aggregate(name, function):
+    """ 注册新的聚合方式 """
+    if name in AGGREGATES:
+        raise ValueError('Aggregate named {0} already exists'.format(name))
+    AGGREGATES[name] = function
+
+
+class Benchmark(RestTest):
+    """ 性能测试的配置，在 RestTest 的基础上增加运行次数、并发数与统计指标 """
+    warmup_runs = 10
+    benchmark_runs = 100
+    concurrency = 1
+    raw_metrics = set()  # 不做聚合的指标
+    aggregated_metrics = dict()  # 指标 -> 聚合方式列表
+
+    def add_metric(self, metric_name, aggregate=None):
+        """ 添加一个指标，aggregate 为 None 时保留原始数据，否则按 aggregate 聚合，返回 self 以便链式调用 """
+        clean_metric = metric_name.lower().strip()
+        clean_metric = METRIC_ALIASES.get(clean_metric, clean_metric)
+        if clean_metric not in METRICS:
+            raise ValueError('Metric named {0} is not legal'.format(metric_name))
+
+        if aggregate is None:
+            self.raw_metrics.add(clean_metric)
+        else:
+            clean_aggregate = aggregate.lower().strip()
+            if clean_aggregate not in AGGREGATES:
+                raise ValueError('Aggregate function {0} is not legal'.format(aggregate))
+            aggregates = self.aggregated_metrics.setdefault(clean_metric, list())
+            if clean_aggregate not in aggregates:
+                aggregates.append(clean_aggregate)
+        return self
+
+    @property
+    def metrics(self):
+        """ 所有需要统计的指标 """
+        return self.raw_metrics.union(self.aggregated_metrics.keys())
+
+    def __init__(self):
+        RestTest.__init__(self)
+        self.raw_metrics = set()
+        self.aggregated_metrics = dict()
+
+    def __str__(self):
+        return 'Benchmark {0}: {1} warmup runs, {2} benchmark runs, concurrency {3}, metrics {4}'.format(
+            self.name, self.warmup_runs, self.benchmark_runs, self.concurrency, sorted(self.metrics))
+
+
+class BenchmarkResult(object):
+    """ 一个 Benchmark 的执行结果 """
+    group = None
+    name = u'unnamed'
+    results = None  # 指标 -> 每次请求的原始数据列表
+    aggregates = None  # [(指标, 聚合方式, 聚合结果), ...]
+    failures = None  # 响应码不符合预期或请求出错的次数
+
+    def __init__(self):
+        self.results = dict()
+        self.aggregates = list()
+        self.failures = 0
+
+    def __str__(self):
+        lines = ['Benchmark {0}: {1} failures'.format(self.name, self.failures)]
+        for metric, aggregate, value in self.aggregates:
+            lines.append('    {0} {1}: {2}'.format(metric, aggregate, value))
+        return '\n'.join(lines)
+
+
+def parse_benchmark(base_url, node):
+    """ 解析 yaml 中的 benchmark 节点，返回 Benchmark """
+    node = lowercase_keys(flatten_dictionaries(node))
+    benchmark = RestTest.parse_test(base_url, node, Benchmark())
+
+    for key, value in node.items():
+        if key == u'warmup_runs':
+            benchmark.warmup_runs = int(value)
+        elif key == u'benchmark_runs':
+            benchmark.benchmark_runs = int(value)
+        elif key == u'concurrency':
+            benchmark.concurrency = int(value)
+            if benchmark.concurrency < 1:
+                raise ValueError('Benchmark concurrency must be at least 1')
+        elif key == u'metrics':
+            if isinstance(value, basestring):
+                benchmark.add_metric(value)
+            elif isinstance(value, list) or isinstance(value, dict):
+                # [metric, {metric: aggregate}, {metric: [aggregate, ...]}, ...]
+                metrics = value if isinstance(value, list) else [value]
+                for metric in metrics:
+                    if isinstance(metric, basestring):
+                        benchmark.add_metric(metric)
+                    elif isinstance(metric, dict):
+                        for metric_name, aggregates in metric.items():
+                            if not isinstance(aggregates, list):
+                                aggregates = [aggregates]
+                            for aggregate in aggregates:
+                                benchmark.add_metric(metric_name, aggregate)
+                    else:
+                        raise TypeError('Invalid metric input: {0}'.format(metric))
+            else:
+                raise TypeError('Invalid benchmark metric datatype: {0}'.format(value))
+    return benchmark
+
+
+def analyze_benchmark_results(benchmark_result, benchmark):
+    """ 按 benchmark 的配置聚合原始数据，返回新的 BenchmarkResult，
+        其 results 中只保留不做聚合的指标，aggregates 中为聚合结果 """
+    output = BenchmarkResult()
+    output.name = benchmark_result.name
+    output.group = benchmark_result.group
+    output.failures = benchmark_result.failures
+
+    for metric in benchmark.raw_metrics:
+        output.results[metric] = benchmark_result.results.get(metric, list())
+
+    for metric, aggregates in benchmark.aggregated_metrics.items():
+        values = benchmark_result.results.get(metric)
+        for aggregate in aggregates:
+            value = AGGREGATES[aggregate](values) if values else None
+            output.aggregates.append((metric, aggregate, value))
+    return output
+
+
+def metrics_to_tuples(raw_metrics):
+    """ 将 {指标: [数据...]} 转为表格形式：第一行为按名称排序的指标名，之后每行为一次请求的数据 """
+    if not isinstance(raw_metrics, dict):
+        raise TypeError('Input must be dictionary!')
+
+    metrics = sorted(raw_metrics.keys())
+    arrays = [raw_metrics[metric] for metric in metrics]
+    num_rows = len(arrays[0]) if arrays else 0
+
+    output = list()
+    output.append(tuple(metrics))
+    for row in xrange(0, num_rows):
+        output.append(tuple(array[row] for array in arrays))
+    return output
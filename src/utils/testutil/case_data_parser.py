@@ -1,4 +1,13 @@
 # -*- coding: utf-8 -*-
+from itertools import izip
+
+try:
+    import numpy  # 可选，安装后 int、double 列用 numpy 一次转换
+except ImportError:
+    numpy = None
+
+NUMPY_TYPES = {'int': 'int64', 'double': 'float64'}
+HASH_TYPES = {'sha1': 'SHA1', 'md5': 'MD5'}  # 不用盐加密的列类型 -> 加密方式
 
 
 class DataParser(object):
@@ -43,6 +52,63 @@ class DataParser(object):
 
         return res
 
+    def parse_columns(self, data_list):
+        """按列解析传入的data_list，结果与 parse 相同，数据量大时更快
+
+        每一列按类型一次转换完：int、double 列在安装了 numpy 时整列转换，加密列批量加密，重复的值只加密一次。
+        与 parse 不同的是，加密列不会修改 Encrypt 实例的盐与默认加密方式，encrypt 列总是使用实例原有的设置。
+        """
+        types = data_list[0]
+        datas = data_list[1:]
+        res = [dict() for _ in datas]
+
+        for item, p_type in types.items():
+            if not p_type:
+                continue
+            values = [data[item] for data in datas]
+            parsed = self.parse_column(values, p_type.lower())
+            if parsed is None:  # 不支持的类型，与 parse 一样不输出这一列
+                continue
+            for row, value in izip(res, parsed):
+                row[item] = value
+        return res
+
+    def parse_column(self, values, t):
+        """按类型 t 转换一列数据，返回转换后的列表，类型不支持时返回 None"""
+        if t == 'str':
+            return list(values)
+        elif t in NUMPY_TYPES:
+            return self._convert_column(values, t)
+        elif t in HASH_TYPES or t == 'encrypt':
+            if self.encrypt is None:
+                return list(values)
+            if t == 'encrypt':
+                return self.encrypt.encrypt_many(values)
+            return self.encrypt.encrypt_many(values, salt='', encryway=HASH_TYPES[t])
+        return None
+
+    @staticmethod
+    def _convert_column(values, t):
+        """int、double 列的转换；有无法转换的值时逐个转换，无法转换的值保持原样"""
+        convert = int if t == 'int' else float
+        if numpy is not None and values:
+            try:
+                array = numpy.array(values)
+                converted = array.astype(NUMPY_TYPES[t])
+                # float 转 int64 时 NaN 与超出范围的值不会报错，而是得到错误的值，这时逐个转换
+                if t != 'int' or array.dtype.kind != 'f' or (converted == numpy.trunc(array)).all():
+                    return converted.tolist()
+            except (ValueError, TypeError, OverflowError):
+                pass
+
+        parsed = list()
+        for value in values:
+            try:
+                parsed.append(convert(value))
+            except (ValueError, AttributeError):
+                parsed.append(value)
+        return parsed
+
 
 if __name__ == '__main__':
     d = [{'a': 'int', 'b': 'double', 'c': 'MD5'}, {'a': '1', 'b': '2', 'c': '1.0'}, {'a': 'a', 'b': 'b', 'c': 'c'}]
@@ -5,6 +5,10 @@
 
 """
 
+import hashlib
+import json
+import os
+
 from src.utils.filereader.file_reader import *
 from src.utils.config import DefaultConfig, Config
 from src.utils.logger import Logger
@@ -12,12 +16,98 @@ from src.utils.utils_exception import UnSupportFileType, NoSectionError, NoOptio
 from src.utils.filereader.parsing import *
 from src.utils.filereader.generators import parse_generator
 from src.utils.testutil.tests import RestTest
+from src.utils.testutil.benchmarks import parse_benchmark
 from src.utils.testutil.testset import TestConfig, TestSet
 
 
 DATA_PATH = DefaultConfig().data_path
 logger = Logger(__name__).get_logger()
 
+TESTSETS_CACHE = dict()  # (内容 hash, 引用文件的签名) -> 解析结果，见 parse_testsets
+TESTSETS_CACHE_SIZE = 64
+_REFERENCED_FILES = dict()  # 内容 hash -> 引用的文件
+
+
+def _referenced_files(node, files):
+    """ 收集 node 中 file 标签引用的文件路径 """
+    if isinstance(node, dict):
+        for key, value in node.items():
+            if str(key).lower() == 'file' and isinstance(value, basestring):
+                files.add(value)
+            else:
+                _referenced_files(value, files)
+    elif isinstance(node, list):
+        for value in node:
+            _referenced_files(value, files)
+    return files
+
+
+def _file_signature(path):
+    """ 文件的 (修改时间, 大小)，相对路径也在数据目录中查找，文件不存在时为 None """
+    for candidate in (path, os.path.join(DATA_PATH, path)):
+        try:
+            stat = os.stat(candidate)
+            return stat.st_mtime, stat.st_size
+        except OSError:
+            pass
+    return None
+
+
+def _structure_hash(base_url, test_structure):
+    """ 返回 base_url 与 test_structure 内容的 hash 及其引用的文件，无法序列化时返回 (None, None)
+    每次调用都重新计算内容 hash，引用的文件只由内容决定，按 hash 缓存 """
+    try:
+        content = json.dumps([base_url, test_structure], sort_keys=True, default=repr)
+    except (TypeError, ValueError):
+        return None, None
+    key = hashlib.sha1(content).hexdigest()
+    files = _REFERENCED_FILES.get(key)
+    if files is None:
+        files = sorted(_referenced_files(test_structure, set()))
+        if len(_REFERENCED_FILES) >= TESTSETS_CACHE_SIZE:
+            _REFERENCED_FILES.clear()
+        _REFERENCED_FILES[key] = files
+    return key, files
+
+
+def _cache_key(base_url, test_structure):
+    """ 缓存的 key：内容 hash 加上引用文件的修改时间与大小，文件修改后重新解析 """
+    key, files = _structure_hash(base_url, test_structure)
+    if key is None:
+        return None
+    return key, tuple(_file_signature(path) for path in files)
+
+
+def _compile_testset(base_url, test_set):
+    """ 解析一个 testset 的节点，返回 (config 节点列表, tests, benchmarks) """
+    configs = list()
+    tests_out = list()
+    benchmarks = list()
+
+    for node in test_set:  # 取出每一个节点，进行解析
+
+        if isinstance(node, dict):  # 每一个节点均为一个dict
+            node = lowercase_keys(node)
+
+            for key in node:
+                if key == 'config':
+                    # 如果是 config 标签，每次生成 testset 时再解析，生成器等状态不在多次解析之间共享
+                    configs.append(node[key])
+                elif key == 'url':
+                    mytest = RestTest()
+                    val = node[key]
+                    assert isinstance(val, basestring)
+                    mytest.url = base_url + val
+                    tests_out.append(mytest)
+                elif key == 'test':
+                    child = node[key]
+                    mytest = RestTest.parse_test(base_url, child)
+                    tests_out.append(mytest)
+                elif key == 'benchmark':
+                    benchmark = parse_benchmark(base_url, node[key])
+                    benchmarks.append(benchmark)
+    return configs, tests_out, benchmarks
+
 
 def parse_testsets(base_url, test_structure, vars=None):
     """ 将从YAML里读出来的Python数据结构的数据转化成一个testset列表
@@ -25,41 +115,35 @@ def parse_testsets(base_url, test_structure, vars=None):
         - test
         - simple test（仅仅是一个URL，是一个最小的test）
         - config（所有test的通用配置）
+        - benchmark（性能测试，见 benchmarks 模块）
+
+    解析出的 test 与 benchmark 按 base_url、test_structure 内容的 hash 与引用文件的修改时间缓存，
+    内容与文件都没有变化时不再重复解析。每次调用返回新的 test 与 benchmark 副本（见 RestTest.fresh_copy），
+    只共用解析好的 validator 与 extractor；config 每次都重新解析。
 
     返回一个testsets的列表。
     """
-    testsets = list()
-
-    for test_set in test_structure:
+    key = _cache_key(base_url, test_structure)
+    compiled = TESTSETS_CACHE.get(key) if key else None
+    if compiled is None:
+        compiled = [_compile_testset(base_url, test_set) for test_set in test_structure]
+        if key:
+            if len(TESTSETS_CACHE) >= TESTSETS_CACHE_SIZE:
+                TESTSETS_CACHE.clear()
+            TESTSETS_CACHE[key] = compiled
 
+    testsets = list()
+    for configs, tests_out, benchmarks in compiled:
         test_config = TestConfig()
-        # tests = list()
-        tests_out = list()
-
         if vars and isinstance(vars, dict):
             test_config.variable_binds = vars
+        for config_node in configs:
+            # 如果是 config 标签，对其进行configuration解析
+            test_config = parse_configuration(config_node, base_config=test_config)
 
-        for node in test_set:  # 取出每一个节点，进行解析
-
-            if isinstance(node, dict):  # 每一个节点均为一个dict
-                node = lowercase_keys(node)
-
-                for key in node:
-                    if key == 'config':
-                        # 如果是 config 标签，对其进行configuration解析
-                        test_config = parse_configuration(node[key], base_config=test_config)
-                    elif key == 'url':
-                        mytest = RestTest()
-                        val = node[key]
-                        assert isinstance(val, basestring)
-                        mytest.url = base_url + val
-                        tests_out.append(mytest)
-                    elif key == 'test':
-                        child = node[key]
-                        mytest = RestTest.parse_test(base_url, child)
-                        tests_out.append(mytest)
         testset = TestSet()
-        testset.tests = tests_out
+        testset.tests = [mytest.fresh_copy() for mytest in tests_out]
+        testset.benchmarks = [benchmark.fresh_copy() for benchmark in benchmarks]
         testset.config = test_config
         testsets.append(testset)
     return testsets
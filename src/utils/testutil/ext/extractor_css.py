@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""CSS 选择器提取器，用于 HTML 页面，需要安装 lxml 与 cssselect
+
+返回所有选中元素的文本列表，没有选中时返回空列表：
+
+    - compare: {css: "ul.items > li", comparator: "count_eq", expected: 3}
+
+与 xpath 提取器共用同一个响应解析后的文档；CSS 选择器编译为 XPath 后按查询字符串缓存在 LRU 中。
+"""
+
+from lxml.cssselect import CSSSelector
+
+from src.utils.testutil.ext.lxml_document import element_value, parse_document
+from src.utils.testutil.validators import AbstractExtractor, LRUCache, parse_body, register_extractor
+
+COMPILED = LRUCache(maxsize=512)  # 选择器 -> CSSSelector
+
+
+class CssExtractor(AbstractExtractor):
+    """ Extractor that uses CSS selectors on HTML body, returns a list of text of selected elements """
+    extractor_type = 'css'
+    is_body_extractor = True
+
+    def compile_query(self, query):
+        return COMPILED.get(query, CSSSelector)
+
+    def extract_internal(self, query=None, args=None, body=None, headers=None):
+        try:
+            selector = self._compiled(query)
+            return [element_value(x) for x in selector(parse_body(body, 'lxml', parse_document))]
+        except Exception as e:
+            raise ValueError("Invalid query: " + query + " : " + str(e))
+
+    @classmethod
+    def parse(cls, config):
+        base = CssExtractor()
+        return cls.configure_base(config, base)
+
+
+register_extractor('css', CssExtractor.parse)
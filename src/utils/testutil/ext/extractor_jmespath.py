@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""JMESPath 提取器，需要安装 jmespath
+
+支持通配符、过滤与切片，例如 "items[*].id"、"items[?price > `10`].name"、"items[0:5]"。
+
+    - compare: {jmespath: "items[*].id", comparator: "contains", expected: 3}
+
+未模板化的查询在解析用例时编译一次，模板化的查询在替换变量后编译，编译结果按查询字符串缓存在 LRU 中。
+"""
+
+import jmespath
+
+from src.utils.testutil.validators import AbstractExtractor, LRUCache, parse_json, register_extractor
+
+COMPILED = LRUCache(maxsize=512)  # 查询字符串 -> 编译后的表达式
+
+
+class JMESPathExtractor(AbstractExtractor):
+    """ Extractor that uses JMESPath syntax
+        See http://jmespath.org/specification.html for details
+    """
+    extractor_type = 'jmespath'
+    is_body_extractor = True
+
+    def compile_query(self, query):
+        return COMPILED.get(query, jmespath.compile)
+
+    def extract_internal(self, query=None, args=None, body=None, headers=None):
+        try:
+            return self._compiled(query).search(parse_json(body))
+        except Exception as e:
+            raise ValueError("Invalid query: " + query + " : " + str(e))
+
+    @classmethod
+    def parse(cls, config):
+        base = JMESPathExtractor()
+        return cls.configure_base(config, base)
+
+
+register_extractor('jmespath', JMESPathExtractor.parse)
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""JSONPath 提取器，需要安装 jsonpath-ng（支持过滤），或 jsonpath-rw（不支持过滤）
+
+支持通配符、过滤与切片，例如 "$.items[*].id"、"$.items[?(@.price > 10)].name"、"$.items[0:5]"。
+返回所有匹配值的列表，没有匹配时返回空列表：
+
+    - compare: {jsonpath: "$.items[*].id", comparator: "count_eq", expected: 3}
+
+未模板化的查询在解析用例时编译一次，模板化的查询在替换变量后编译，编译结果按查询字符串缓存在 LRU 中。
+"""
+
+try:
+    from jsonpath_ng.ext import parse as jsonpath_parse
+except ImportError:
+    from jsonpath_rw import parse as jsonpath_parse
+
+from src.utils.testutil.validators import AbstractExtractor, LRUCache, parse_json, register_extractor
+
+COMPILED = LRUCache(maxsize=512)  # 查询字符串 -> 编译后的表达式
+
+
+class JsonPathExtractor(AbstractExtractor):
+    """ Extractor that uses JSONPath syntax, returns a list of all matched values """
+    extractor_type = 'jsonpath'
+    is_body_extractor = True
+
+    def compile_query(self, query):
+        return COMPILED.get(query, jsonpath_parse)
+
+    def extract_internal(self, query=None, args=None, body=None, headers=None):
+        try:
+            return [match.value for match in self._compiled(query).find(parse_json(body))]
+        except Exception as e:
+            raise ValueError("Invalid query: " + query + " : " + str(e))
+
+    @classmethod
+    def parse(cls, config):
+        base = JsonPathExtractor()
+        return cls.configure_base(config, base)
+
+
+register_extractor('jsonpath', JsonPathExtractor.parse)
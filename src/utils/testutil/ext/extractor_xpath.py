@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""XPath 提取器，用于 SOAP 等 XML 响应，也可用于 HTML 页面，需要安装 lxml
+
+body 先按 XML 解析，不是合法的 XML 时按 HTML 解析。返回值：
+
+    - 选中节点时返回列表，元素取其文本，属性与文本节点取其值
+    - 使用 count()、string() 等函数时返回函数的结果
+
+带命名空间前缀的查询需要配置 namespaces：
+
+    - compare: {xpath: {query: "//soap:Body/m:Result/text()",
+                        namespaces: {soap: "http://schemas.xmlsoap.org/soap/envelope/", m: "urn:example"}},
+                expected: ...}
+
+同一个响应的 body 只解析一次，所有 xpath/css 提取器共用；编译后的 XPath 按查询字符串与命名空间缓存在 LRU 中。
+"""
+
+from lxml import etree
+
+from src.utils.testutil.ext.lxml_document import element_value, parse_document
+from src.utils.testutil.validators import AbstractExtractor, LRUCache, parse_body, register_extractor
+
+COMPILED = LRUCache(maxsize=512)  # (查询字符串, 命名空间) -> etree.XPath
+
+
+def _compile(key):
+    query, namespaces = key
+    return etree.XPath(query, namespaces=dict(namespaces) if namespaces else None)
+
+
+class XPathExtractor(AbstractExtractor):
+    """ Extractor that uses XPath on XML or HTML body, nodes are returned as a list of their text values """
+    extractor_type = 'xpath'
+    is_body_extractor = True
+
+    def _namespaces(self):
+        namespaces = (self.args or dict()).get('namespaces')
+        return tuple(sorted(namespaces.items())) if namespaces else None
+
+    def compile_query(self, query):
+        return COMPILED.get((query, self._namespaces()), _compile)
+
+    def extract_internal(self, query=None, args=None, body=None, headers=None):
+        try:
+            result = self._compiled(query)(parse_body(body, 'lxml', parse_document))
+        except Exception as e:
+            raise ValueError("Invalid query: " + query + " : " + str(e))
+
+        if isinstance(result, list):
+            return [element_value(x) for x in result]
+        return element_value(result)
+
+    @classmethod
+    def parse(cls, config):
+        base = XPathExtractor()
+        if isinstance(config, dict) and 'namespaces' in config:
+            config = dict(config)
+            base.args = {'namespaces': config.pop('namespaces')}
+            if 'query' in config:
+                config = config['query']
+        return cls.configure_base(config, base)
+
+
+register_extractor('xpath', XPathExtractor.parse)
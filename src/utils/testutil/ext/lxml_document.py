@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+"""xpath 与 css 提取器共用的 lxml 文档解析，需要安装 lxml
+
+不依赖 validators，extractor_xpath 与 extractor_css 以任意顺序导入都不会产生循环导入。
+"""
+
+from lxml import etree, html
+
+
+def parse_document(body):
+    """ 将 body 解析为 lxml 文档，先按 XML 解析，失败时按 HTML 解析 """
+    try:
+        return etree.fromstring(body)
+    except (etree.XMLSyntaxError, ValueError):
+        return html.fromstring(body)
+
+
+def element_value(value):
+    """ 元素取其文本，lxml 的字符串结果转为普通字符串 """
+    if isinstance(value, etree._Element):
+        return u''.join(value.itertext())
+    elif isinstance(value, basestring):
+        return unicode(value)
+    return value
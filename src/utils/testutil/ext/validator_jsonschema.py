@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""JSON Schema 校验器，需要安装 jsonschema
+
+一条 schema 校验代替多条 compare/extract_test，响应体只解析一次，所有错误一次报告：
+
+    - json_schema: {schema: {file: "schema/user.json"}}
+    - json_schema: {schema: '{"type": "object", "required": ["id"]}'}
+
+schema 可以是 JSON 或 YAML，通过 ContentHandler 读取，支持 file 与 template。
+schema 编译成 jsonschema 的 validator 对象后缓存：文件按路径与修改时间缓存，文件修改后重新编译；
+内联的 schema 在解析用例时编译一次；模板化的内容替换变量后按内容缓存在 LRU 中。
+"""
+import os
+import string
+import threading
+import traceback
+
+import jsonschema
+import yaml
+
+from src.utils.filereader import parsing
+from src.utils.filereader.contenthandling import ContentHandler
+from src.utils.testutil.validators import (AbstractValidator, Failure, LRUCache, parse_json, register_validator,
+                                           FAILURE_VALIDATOR_FAILED, FAILURE_VALIDATOR_EXCEPTION)
+
+_lock = threading.Lock()
+_files = dict()  # schema 文件路径 -> (修改时间, validator)
+COMPILED = LRUCache(maxsize=64)  # 模板化的 schema 内容 -> validator
+
+
+def compile_schema(text):
+    """ 解析 schema 文本并编译，schema 本身不合法时抛出 jsonschema.SchemaError """
+    schema = yaml.safe_load(text)
+    cls = jsonschema.validators.validator_for(schema)
+    cls.check_schema(schema)
+    return cls(schema)
+
+
+def load_schema(path):
+    """ 返回 schema 文件编译后的 validator，文件没有修改时直接使用缓存 """
+    mtime = os.path.getmtime(path)
+    cached = _files.get(path)
+    if cached is None or cached[0] != mtime:
+        with open(path, 'r') as f:
+            validator = compile_schema(f.read())
+        cached = (mtime, validator)
+        with _lock:
+            _files[path] = cached
+    return cached[1]
+
+
+def clear_cache():
+    with _lock:
+        _files.clear()
+    COMPILED.clear()
+
+
+class JsonSchemaValidator(AbstractValidator):
+    """ Validates the JSON body against a JSON Schema, compiled once and reused for every response """
+    name = 'JsonSchemaValidator'
+    config = None
+    schema_context = None  # ContentHandler of the schema
+    compiled = None  # Compiled validator of an inline, untemplated schema
+
+    def get_readable_config(self, context=None):
+        return "JSON schema validation: {0}".format(self.schema_context.content)
+
+    def get_schema(self, context=None):
+        """ Return compiled schema validator, from cache if the schema has not changed """
+        if self.compiled is not None:
+            return self.compiled
+        handler = self.schema_context
+        if handler.is_file and not handler.is_template_content:
+            path = handler.content
+            if handler.is_template_path and context:
+                path = string.Template(path).safe_substitute(context.get_values())
+            return load_schema(path)
+        return COMPILED.get(handler.get_content(context=context), compile_schema)
+
+    def validate(self, body=None, headers=None, context=None):
+        try:
+            schema = self.get_schema(context=context)
+        except Exception as e:
+            trace = traceback.format_exc()
+            return Failure(message="Invalid JSON schema", details=trace, validator=self,
+                           failure_type=FAILURE_VALIDATOR_EXCEPTION)
+        try:
+            data = parse_json(body)
+        except Exception as e:
+            trace = traceback.format_exc()
+            return Failure(message="Response body is not valid JSON", details=trace, validator=self,
+                           failure_type=FAILURE_VALIDATOR_EXCEPTION)
+
+        errors = sorted(schema.iter_errors(data), key=lambda error: list(error.path))
+        if not errors:
+            return True
+        details = ['{0}: {1}'.format('/'.join(str(p) for p in error.path) or '(root)', error.message)
+                   for error in errors]
+        return Failure(message="JSON Schema Validation Failed, {0} error(s)".format(len(errors)),
+                       details=os.linesep.join(details), validator=self, failure_type=FAILURE_VALIDATOR_FAILED)
+
+    @classmethod
+    def parse(cls, config):
+        validator = JsonSchemaValidator()
+        config = parsing.lowercase_keys(parsing.flatten_dictionaries(config))
+        if 'schema' not in config:
+            raise ValueError("Cannot create schema validator without a 'schema' configuration element!")
+        validator.schema_context = ContentHandler.parse_content(config['schema'])
+        if not validator.schema_context.is_file and not validator.schema_context.is_dynamic():
+            validator.compiled = compile_schema(validator.schema_context.content)
+        return validator
+
+
+register_validator('json_schema', JsonSchemaValidator.parse)
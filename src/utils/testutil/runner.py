@@ -0,0 +1,382 @@
+# -*- coding: utf-8 -*-
+"""执行由 case_generator.parse_testsets 解析出来的 TestSet。
+
+TestSet 中互不影响的 RestTest 会被放到线程池中并发执行，会修改 context 的 test（带有
+variable_binds、generator_binds、extract_binds 的）则按照用例文件中的顺序串行执行，
+从而保证后面的 test 能拿到前面 test 绑定的变量。
+
+For example:
+
+    testsets = parse_testsets(base_url, YamlReader('test.yaml').yaml)
+    results = TestRunner(workers=16).run(testsets)
+    failures = [r for r in results if not r.passed]
+
+"""
+
+import threading
+import time
+from multiprocessing.pool import ThreadPool
+
+from src.utils.filereader.binding import Context
+from src.utils.interface.async_http_client import AsyncHTTPClient, AsyncRequest, DEFAULT_CONCURRENCY
+from src.utils.interface.session_pool import PooledSession
+from src.utils.logger import Logger
+from src.utils.testutil import validators
+from src.utils.testutil.benchmarks import BenchmarkResult, analyze_benchmark_results
+from src.utils.testutil.testset import TestConfig
+
+logger = Logger(__name__).get_logger()
+
+DEFAULT_WORKERS = 8
+
+
+class TestResponse(object):
+    """ 一个 test 的执行结果 """
+    test = None
+    passed = False
+    response_code = None
+    body = None
+    response_headers = None
+    failures = None
+
+    def __init__(self, test=None):
+        self.test = test
+        self.failures = list()
+
+    def __str__(self):
+        return 'TestResponse: {0} {1} -> {2}, failures: {3}'.format(
+            self.test.group, self.test.name, self.passed, len(self.failures))
+
+
+def build_context(test_config):
+    """ 根据 TestConfig 中的 variable_binds 与 generators 创建这个 TestSet 使用的 Context """
+    context = Context()
+    if test_config.variable_binds:
+        context.bind_variables(test_config.variable_binds)
+    if test_config.generators:
+        for name, generator in test_config.generators.items():
+            context.add_generator(name, generator)
+    return context
+
+
+def prepare_request(mytest, test_config=None, context=None):
+    """ 执行 test 的前置 context 绑定并完成模板替换，返回 (method, url, body, headers, auth) """
+    if test_config is None:
+        test_config = TestConfig()
+    mytest.update_context_before(context)
+    templated_test = mytest.realize(context)
+
+    headers = dict()
+    if test_config.headers:
+        headers.update(test_config.headers)
+    if templated_test.get_headers(context=context):
+        headers.update(templated_test.get_headers(context=context))
+
+    return (templated_test.method, templated_test.get_url(context=context),
+            templated_test.get_body(context=context), headers, _get_auth(templated_test))
+
+
+def check_response(result, context=None):
+    """ 检查 result 中的响应码，运行 validators 与 extract_binds，设置 result.passed """
+    mytest = result.test
+    if result.response_code not in mytest.expected_status:
+        result.failures.append(validators.Failure(
+            message='Invalid HTTP response code: response code {0} not in expected codes [{1}]'.format(
+                result.response_code, mytest.expected_status),
+            details=None, failure_type=validators.FAILURE_INVALID_RESPONSE))
+        return result
+
+    # 所有 validators 与 extract_binds 共用同一个 body，JSON 只解析一次
+    body = validators.ResponseBody.wrap(result.body)
+    if mytest.validators is not None:
+        for validator in mytest.validators:
+            validate_result = validator.validate(body=body, headers=result.response_headers,
+                                                 context=context)
+            if not validate_result:
+                result.failures.append(validate_result)
+
+    try:
+        mytest.update_context_after(body, result.response_headers, context)
+    except Exception as e:
+        logger.exception(e)
+        result.failures.append(validators.Failure(message='Extractor threw exception: {0}'.format(e),
+                                                  details=str(e),
+                                                  failure_type=validators.FAILURE_EXTRACTOR_EXCEPTION))
+
+    result.passed = not result.failures
+    return result
+
+
+def request_failed(result, error):
+    """ 请求本身出错（连接失败、超时等）时记录到 result 中 """
+    result.failures.append(validators.Failure(message='Request threw exception: {0}'.format(error),
+                                              details=str(error),
+                                              failure_type=validators.FAILURE_TEST_EXCEPTION))
+    return result
+
+
+def run_test(mytest, test_config=None, context=None, session=None):
+    """ 执行一个 RestTest，返回 TestResponse
+
+    :param mytest: RestTest 实例
+    :param test_config: 所在 TestSet 的配置，用到其中的通用 headers
+    :param context: 所在 TestSet 的 Context，None 则不做模板替换
+    :param session: requests.Session，None 则新建一个 PooledSession
+    """
+    if test_config is None:
+        test_config = TestConfig()
+    my_context = context
+    if my_context is None:
+        my_context = Context()
+
+    method, url, body, headers, auth = prepare_request(mytest, test_config, my_context)
+    result = TestResponse(mytest)
+
+    if session is None:
+        session = PooledSession()
+
+    try:
+        response = session.request(method=method, url=url, data=body, headers=headers, auth=auth)
+    except Exception as e:
+        logger.exception(e)
+        return request_failed(result, e)
+
+    result.response_code = response.status_code
+    result.body = response.content
+    result.response_headers = [(k.lower(), v) for k, v in response.headers.items()]
+    logger.info('{0} {1} -> {2}'.format(method, response.url, response.status_code))
+    return check_response(result, my_context)
+
+
+def run_benchmark(benchmark, test_config=None, context=None):
+    """ 执行一个 Benchmark，返回聚合后的 BenchmarkResult
+
+    不修改 context 的 benchmark 只用 realize_partial 做一次模板替换与文件读取，
+    之后每次请求都复用同一个请求；修改 context 的 benchmark 每次请求前重新绑定并替换模板。
+    """
+    if test_config is None:
+        test_config = TestConfig()
+    my_context = context
+    if my_context is None:
+        my_context = Context()
+
+    result = BenchmarkResult()
+    result.name = benchmark.name
+    result.group = benchmark.group
+    for metric in benchmark.metrics:
+        result.results[metric] = list()
+
+    def build_requests(runs):
+        if benchmark.is_context_modifier():
+            prepared = [prepare_request(benchmark, test_config, my_context) for _ in xrange(runs)]
+        else:
+            partial = benchmark.realize_partial(my_context)
+            prepared = [prepare_request(partial, test_config, my_context)] * runs
+        return [AsyncRequest(url, method, headers=headers, body=body, auth=auth)
+                for method, url, body, headers, auth in prepared]
+
+    client = AsyncHTTPClient(concurrency=benchmark.concurrency)
+    logger.info('Benchmark {0}: {1} warmup runs'.format(benchmark.name, benchmark.warmup_runs))
+    client.send_all(build_requests(benchmark.warmup_runs))
+
+    logger.info('Benchmark {0}: {1} benchmark runs, concurrency {2}'.format(
+        benchmark.name, benchmark.benchmark_runs, benchmark.concurrency))
+    benchmark_requests = build_requests(benchmark.benchmark_runs)
+    for request, response in zip(benchmark_requests, client.send_all(benchmark_requests)):
+        if response.error or response.status_code not in benchmark.expected_status:
+            result.failures += 1
+        if response.error:
+            continue
+        values = {
+            'connect_time': response.connect_time,
+            'starttransfer_time': response.starttransfer_time,
+            'total_time': response.elapsed,
+            'request_size': response.request_size,
+            'size_upload': len(request.body or ''),
+            'size_download': len(response.content or '')
+        }
+        for metric, measurements in result.results.items():
+            measurements.append(values[metric])
+
+    analyzed = analyze_benchmark_results(result, benchmark)
+    logger.info(str(analyzed))
+    return analyzed
+
+
+def _get_auth(mytest):
+    """ 如果 test 配置了 auth_username/auth_password，返回 requests 用的 auth 元组 """
+    username = getattr(mytest, 'auth_username', None)
+    if username:
+        return username, getattr(mytest, 'auth_password', None)
+    return None
+
+
+class TestRunner(object):
+    """ 用线程池并发执行 TestSet 列表
+
+    - 不修改 context 的 test 并发执行
+    - 修改 context 的 test 等它之前的 test 全部完成后单独执行，执行完再继续后面的 test
+    - 设置了 stop_on_failure 的 test 失败后，不再执行该 TestSet 中它后面的 test
+    - 设置了 delay 的 test 在发送请求前等待 delay 秒
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS):
+        """
+        :param workers: 线程池大小，即同一时刻最多有多少个请求在执行
+        """
+        if workers < 1:
+            raise ValueError('Runner needs at least 1 worker, got {0}'.format(workers))
+        self.workers = workers
+        self.benchmark_results = list()
+        self._local = threading.local()
+
+    def _session(self):
+        """ 每个线程一个 Session，避免线程间共享 cookies；连接来自进程级连接池，线程间共享 """
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = PooledSession()
+            self._local.session = session
+        return session
+
+    def _run_one(self, args):
+        mytest, test_config, context = args
+        delay = getattr(mytest, 'delay', None)
+        if delay:
+            time.sleep(delay)
+        try:
+            return run_test(mytest, test_config=test_config, context=context, session=self._session())
+        except Exception as e:
+            logger.exception(e)
+            result = TestResponse(mytest)
+            result.failures.append(validators.Failure(message='Test threw exception: {0}'.format(e),
+                                                      details=str(e),
+                                                      failure_type=validators.FAILURE_TEST_EXCEPTION))
+            return result
+
+    @staticmethod
+    def batches(tests):
+        """ 将 tests 按顺序切分成若干批，同一批中的 test 可以并发执行
+
+        修改 context 的 test 单独成一批；stop_on_failure 的 test 是所在批的最后一个。
+        """
+        batch = list()
+        for mytest in tests:
+            if mytest.is_context_modifier():
+                if batch:
+                    yield batch
+                    batch = list()
+                yield [mytest]
+            else:
+                batch.append(mytest)
+                if mytest.stop_on_failure:
+                    yield batch
+                    batch = list()
+        if batch:
+            yield batch
+
+    def run_testset(self, testset, pool, context):
+        """ 执行一个 TestSet，按 test 的定义顺序返回 TestResponse 列表 """
+        test_config = testset.config
+        results = list()
+
+        for batch in self.batches(testset.tests):
+            batch_results = pool.map(self._run_one, [(t, test_config, context) for t in batch])
+            results.extend(batch_results)
+
+            stopped = [r for r in batch_results if not r.passed and r.test.stop_on_failure]
+            if stopped:
+                logger.error('Test {0} failed with stop_on_failure, skip the rest of testset'.format(
+                    stopped[0].test.name))
+                break
+        return results
+
+    def run(self, testsets):
+        """ 依次执行 testsets，返回所有 TestResponse 组成的列表
+
+        每个 TestSet 的 test 执行完后执行它的 benchmarks，结果保存在 self.benchmark_results 中。
+        """
+        results = list()
+        pool = ThreadPool(self.workers)
+        try:
+            for testset in testsets:
+                if not testset.config.run:
+                    logger.info('Skip testset {0}'.format(testset.config.test))
+                    continue
+                context = build_context(testset.config)
+                results.extend(self.run_testset(testset, pool, context))
+                for benchmark in testset.benchmarks:
+                    self.benchmark_results.append(run_benchmark(benchmark, testset.config, context))
+        finally:
+            pool.close()
+            pool.join()
+
+        failures = len([r for r in results if not r.passed])
+        logger.info('Run {0} tests, {1} failed.'.format(len(results), failures))
+        return results
+
+
+class AsyncRunner(TestRunner):
+    """ 在一个事件循环中执行 TestSet，可同时有成千上万个请求在途
+
+    与 TestRunner 的调度规则相同，只是同一批的 test 由 AsyncHTTPClient 在单个线程中发送，
+    模板替换与校验在调用线程中完成。
+    """
+
+    def __init__(self, concurrency=DEFAULT_CONCURRENCY, timeout=30, verify=True):
+        """
+        :param concurrency: 最大在途请求数
+        :param timeout: 单个请求的超时秒数
+        :param verify: https 是否校验证书
+        """
+        TestRunner.__init__(self, workers=1)
+        self.client = AsyncHTTPClient(concurrency=concurrency, timeout=timeout, verify=verify)
+
+    def run_batch(self, batch, test_config, context):
+        """ 并发发送一批 test 的请求，按顺序返回 TestResponse 列表 """
+        results = list()
+        requests_out = list()
+        for mytest in batch:
+            result = TestResponse(mytest)
+            try:
+                method, url, body, headers, auth = prepare_request(mytest, test_config, context)
+            except Exception as e:
+                logger.exception(e)
+                results.append((request_failed(result, e), False))
+                continue
+            requests_out.append(AsyncRequest(url, method, headers=headers, body=body, auth=auth,
+                                             delay=getattr(mytest, 'delay', None)))
+            results.append((result, True))
+
+        responses = iter(self.client.send_all(requests_out))
+        for result, sent in results:
+            if not sent:
+                continue
+            response = next(responses)
+            if response.error:
+                request_failed(result, response.error)
+                continue
+            result.response_code = response.status_code
+            result.body = response.content
+            result.response_headers = response.headers
+            try:
+                check_response(result, context)
+            except Exception as e:
+                logger.exception(e)
+                request_failed(result, e)
+        return [result for result, _ in results]
+
+    def run_testset(self, testset, pool, context):
+        """ 执行一个 TestSet，按 test 的定义顺序返回 TestResponse 列表 """
+        test_config = testset.config
+        results = list()
+
+        for batch in self.batches(testset.tests):
+            batch_results = self.run_batch(batch, test_config, context)
+            results.extend(batch_results)
+
+            stopped = [r for r in batch_results if not r.passed and r.test.stop_on_failure]
+            if stopped:
+                logger.error('Test {0} failed with stop_on_failure, skip the rest of testset'.format(
+                    stopped[0].test.name))
+                break
+        return results
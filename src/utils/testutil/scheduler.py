@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""根据 test 之间的变量依赖关系调度执行 TestSet。
+
+每个 RestTest 会产生一些变量（variable_binds、generator_binds、extract_binds 的 key），
+也会在模板（url、headers、body、validator 和 extractor 的模板）中以 $var 的形式使用一些变量。
+DependencyRunner 为每个 TestSet 建一个 DAG：
+
+    - 使用变量 v 的 test 依赖于它前面最后一个产生 v 的 test
+    - 产生变量 v 的 test 依赖于它前面最后一个产生 v 的 test，以及之后所有使用 v 的 test
+    - 使用同一个生成器的 test 按顺序执行
+    - stop_on_failure 的 test 之后的 test 都依赖于它
+
+一个 test 依赖的 test 全部执行完之后立即提交到线程池，而不必等待整个文件按顺序执行。
+
+For example:
+
+    results = DependencyRunner(workers=16).run(testsets)
+
+"""
+
+import Queue
+import os
+
+from src.utils.filereader.contenthandling import ContentHandler
+from src.utils.filereader.parsing import template_variables
+from src.utils.logger import Logger
+from src.utils.testutil import validators
+from src.utils.testutil.runner import TestRunner
+
+logger = Logger(__name__).get_logger()
+
+
+def _extractor_variables(extractor):
+    """ extractor 的查询语句是模板时，返回其中的变量名 """
+    if isinstance(extractor, validators.AbstractExtractor) and extractor.is_templated:
+        return template_variables(extractor.query)
+    return set()
+
+
+def _validator_variables(validator):
+    """ 返回 validator 用到的变量名；不认识的 validator 类型返回 None，表示可能用到任何变量 """
+    if isinstance(validator, validators.ComparatorValidator):
+        names = _extractor_variables(validator.extractor)
+        if isinstance(validator.expected, validators.AbstractExtractor):
+            names.update(_extractor_variables(validator.expected))
+        elif validator.isTemplateExpected:
+            names.update(template_variables(validator.expected))
+        return names
+    elif isinstance(validator, validators.ExtractTestValidator):
+        return _extractor_variables(validator.extractor)
+    return None
+
+
+def _body_variables(body):
+    """ 返回 body 用到的变量名；模板路径指向模板文件时无法预知，返回 None """
+    if not isinstance(body, ContentHandler) or not body.is_dynamic():
+        return set()
+    if not body.is_file:
+        return template_variables(body.content)
+
+    names = set()
+    if body.is_template_path:
+        if body.is_template_content:
+            return None
+        names.update(template_variables(body.content))
+    elif body.is_template_content and os.path.exists(body.content):
+        with open(body.content, 'r') as f:
+            names.update(template_variables(f.read()))
+    return names
+
+
+def consumed_variables(mytest):
+    """ 返回 test 用到的变量名集合，无法确定时返回 None """
+    names = set()
+    templates = mytest.templates or dict()
+    if mytest.NAME_URL in templates:
+        names.update(template_variables(mytest._url))
+    if mytest.NAME_HEADERS in templates:
+        for key, value in mytest._headers.items():
+            names.update(template_variables(str(key)))
+            names.update(template_variables(str(value)))
+
+    body_names = _body_variables(mytest._body)
+    if body_names is None:
+        return None
+    names.update(body_names)
+
+    for validator in mytest.validators or list():
+        validator_names = _validator_variables(validator)
+        if validator_names is None:
+            return None
+        names.update(validator_names)
+
+    for extractor in (mytest.extract_binds or dict()).values():
+        names.update(_extractor_variables(extractor))
+    return names
+
+
+def produced_variables(mytest):
+    """ 返回 test 会绑定到 context 中的变量名集合 """
+    names = set()
+    for binds in (mytest.variable_binds, mytest.generator_binds, mytest.extract_binds):
+        if binds:
+            names.update(str(key) for key in binds.keys())
+    return names
+
+
+def build_graph(tests):
+    """ 建立 tests 的依赖图，返回列表，第 i 项为第 i 个 test 所依赖的 test 的下标集合 """
+    graph = list()
+    last_writer = dict()  # 变量名 -> 最后一个产生它的 test
+    readers = dict()  # 变量名 -> 最后一次产生之后使用它的 test 列表
+    unknown_readers = list()  # 无法确定用到哪些变量的 test
+    last_generator_user = dict()  # 生成器名 -> 最后一个使用它的 test
+    last_stop = None  # 最后一个 stop_on_failure 的 test
+
+    for index, mytest in enumerate(tests):
+        deps = set()
+        if last_stop is not None:
+            deps.add(last_stop)
+
+        consumed = consumed_variables(mytest)
+        produced = produced_variables(mytest)
+
+        if consumed is None:
+            deps.update(last_writer.values())
+        else:
+            deps.update(last_writer[name] for name in consumed if name in last_writer)
+
+        for name in produced:
+            if name in last_writer:
+                deps.add(last_writer[name])
+            deps.update(readers.get(name, ()))
+            deps.update(unknown_readers)
+
+        for generator_name in (mytest.generator_binds or dict()).values():
+            if generator_name in last_generator_user:
+                deps.add(last_generator_user[generator_name])
+            last_generator_user[generator_name] = index
+
+        if consumed is None:
+            unknown_readers.append(index)
+        else:
+            for name in consumed:
+                readers.setdefault(name, list()).append(index)
+        for name in produced:
+            last_writer[name] = index
+            readers[name] = list()
+        if mytest.stop_on_failure:
+            last_stop = index
+
+        deps.discard(index)
+        graph.append(deps)
+    return graph
+
+
+class DependencyRunner(TestRunner):
+    """ 按依赖图调度的 TestRunner，一个 test 所依赖的 test 完成后立即开始执行 """
+
+    def run_testset(self, testset, pool, context):
+        """ 执行一个 TestSet，按 test 的定义顺序返回执行了的 test 的 TestResponse 列表 """
+        tests = testset.tests
+        test_config = testset.config
+
+        graph = build_graph(tests)
+        waiting = [set(deps) for deps in graph]
+        dependents = [list() for _ in tests]
+        for index, deps in enumerate(graph):
+            for dep in deps:
+                dependents[dep].append(index)
+
+        done = Queue.Queue()
+        results = [None] * len(tests)
+
+        def submit(index):
+            pool.apply_async(self._run_one, ((tests[index], test_config, context),),
+                             callback=lambda result: done.put((index, result)))
+
+        in_flight = 0
+        for index, deps in enumerate(waiting):
+            if not deps:
+                submit(index)
+                in_flight += 1
+
+        stop_index = len(tests)  # 失败的 stop_on_failure test 的下标，在它之后定义的 test 不再执行
+        while in_flight:
+            index, result = done.get()
+            in_flight -= 1
+            results[index] = result
+
+            if not result.passed and tests[index].stop_on_failure and index < stop_index:
+                logger.error('Test {0} failed with stop_on_failure, skip the rest of testset'.format(
+                    tests[index].name))
+                stop_index = index
+
+            # 与顺序执行一致，定义在失败 test 之前的 test 仍然执行
+            for dependent in dependents[index]:
+                waiting[dependent].discard(index)
+                if not waiting[dependent] and dependent < stop_index:
+                    submit(dependent)
+                    in_flight += 1
+
+        return [result for result in results if result is not None]
@@ -72,12 +72,16 @@ class RestTest(Test):
     failures = None
 
     templates = None  # Dictionary of template to compiled template
+    _header_templates = None  # (headers dict, [(key template, value template)...]), compiled on first use
+    _realized = None  # (context, context.mod_count, realized test), reused while the context is unchanged
+    _realized_fields = None  # Field name -> (context, versions of its variables, realized value)
+    _field_variables = None  # Field name -> (template source, names of variables it uses)
 
     # Bind variables, generators, and contexts
     variable_binds = None
     generator_binds = None  # Dict of variable name and then generator name
     extract_binds = None  # Dict of variable name and extract function to run
-    datafile_variable_binds = None
+    datafile_variable_binds = None  # File info of the data file, rows are read by datafile_rows when bound
 
     @staticmethod
     def has_contains():
@@ -87,22 +91,48 @@ class RestTest(Test):
         """ Optimization: limited copy of test object, for realize() methods
             This only copies fields changed vs. class, and keeps methods the same
         """
-        output = Test()
+        output = self.__class__()
         myvars = vars(self)
         output.__dict__ = myvars.copy()
+        output._realized = None
+        output._realized_fields = None
+        output._field_variables = None
         return output
 
+    def fresh_copy(self):
+        """ Copy of a parsed test that can be run and modified without affecting the original
+            Containers and the body handler are copied, parsed validators and extractors are shared,
+            values cached by realize are dropped """
+        output = self.__class__()
+        myvars = vars(self).copy()
+        for name, value in myvars.items():
+            if isinstance(value, (dict, list, set, ContentHandler)):
+                myvars[name] = copy.copy(value)
+        output.__dict__ = myvars
+        output._realized = None
+        output._realized_fields = None
+        output._field_variables = None
+        output._header_templates = None
+        return output
+
+    def clear_realized(self):
+        """ Drop realized values cached by realize, called whenever a templated field is changed """
+        self._realized = None
+        self._realized_fields = None
+
     # Template handling logic
     def set_template(self, variable_name, template_string):
         """ Add a templating instance for variable given """
         if self.templates is None:
             self.templates = dict()
         self.templates[variable_name] = string.Template(template_string)
+        self.clear_realized()
 
     def del_template(self, variable_name):
         """ Remove template instance, so we no longer use one for this test """
         if self.templates is not None and variable_name in self.templates:
             del self.templates[variable_name]
+        self.clear_realized()
 
     def realize_template(self, variable_name, context):
         """ Realize a templated value, using variables from context
@@ -116,6 +146,7 @@ class RestTest(Test):
     def set_body(self, value):
         """ Set body, directly """
         self._body = value
+        self.clear_realized()
 
     def get_body(self, context=None):
         """ Read body from file, applying template if pertinent """
@@ -165,13 +196,15 @@ class RestTest(Test):
         if not context or not self.templates or self.NAME_HEADERS not in self.templates:
             return self._headers
 
-        # We need to apply templating to both keys and values
-        vals = context.get_values()
+        # We need to apply templating to both keys and values, templates are compiled once per headers dict
+        compiled = self._header_templates
+        if compiled is None or compiled[0] is not self._headers:
+            compiled = (self._headers, [(string.Template(str(key)), string.Template(str(value)))
+                                        for key, value in self._headers.items()])
+            self._header_templates = compiled
 
-        def template_tuple(tuple_input):
-            return (string.Template(str(tuple_item)).safe_substitute(vals) for tuple_item in tuple_input)
-
-        return dict(map(template_tuple, self._headers.items()))
+        vals = context.get_values()
+        return dict((key.safe_substitute(vals), value.safe_substitute(vals)) for key, value in compiled[1])
 
     headers = property(get_headers, set_headers, None,
                        'Headers dictionary for request')
@@ -184,6 +217,13 @@ class RestTest(Test):
             for key, value in self.generator_binds.items():
                 context.bind_generator_next(key, value)
 
+    def datafile_rows(self):
+        """ Read rows of datafile_variable_binds, opening the file on every call
+            With 'stream': True in the file info, rows are yielded lazily one at a time """
+        if not self.datafile_variable_binds:
+            return list()
+        return FileReader(self.datafile_variable_binds).read()
+
     def update_context_after(self, response_body, headers, context):
         """ Run the extraction routines to update variables based on HTTP response body """
         if self.extract_binds:
@@ -205,20 +245,85 @@ class RestTest(Test):
             return True
         return False
 
+    def field_variables(self, field):
+        """ Names of the variables used by a templated field (url, headers or body), parsed once per template
+            Returns None if they can't be known without reading a file """
+        if field == self.NAME_URL:
+            source = (self.templates or dict()).get(self.NAME_URL), self._url
+        elif field == self.NAME_HEADERS:
+            source = (self.templates or dict()).get(self.NAME_HEADERS), self._headers
+        else:
+            body = self._body
+            source = body, getattr(body, 'content', None)
+
+        if self._field_variables is None:
+            self._field_variables = dict()
+        cached = self._field_variables.get(field)
+        if cached is not None and cached[0][0] is source[0] and cached[0][1] is source[1]:
+            return cached[1]
+
+        if source[0] is None:
+            names = set()
+        elif field == self.NAME_URL:
+            names = template_variables(self._url)
+        elif field == self.NAME_HEADERS:
+            names = set()
+            for key, value in self._headers.items():
+                names.update(template_variables(str(key)))
+                names.update(template_variables(str(value)))
+        elif not isinstance(body, ContentHandler) or not body.is_dynamic():
+            names = set()
+        elif not body.is_file:
+            names = template_variables(body.content)
+        elif not body.is_template_content:
+            names = template_variables(body.content)  # Only the path is templated
+        else:
+            names = None  # Templated file content
+        self._field_variables[field] = (source, names)
+        return names
+
+    def _realize_field(self, field, context, render):
+        """ Return realized value of a field, rendering it again only if one of its variables changed """
+        names = self.field_variables(field)
+        if names is None:
+            versions = context.mod_count
+        else:
+            versions = tuple(context.get_version(name) for name in sorted(names))
+
+        if self._realized_fields is None:
+            self._realized_fields = dict()
+        cached = self._realized_fields.get(field)
+        if cached is not None and cached[0] is context and cached[1] == versions:
+            return cached[2]
+        value = render()
+        self._realized_fields[field] = (context, versions, value)
+        return value
+
     def realize(self, context=None):
         """ Return a fully-templated test object
             Warning: this is a SHALLOW copy, mutation of fields will cause problems!
-            Can accept a None context """
+            Can accept a None context
+            The realized test is cached and reused until context.mod_count changes (variables rebound),
+            then only the fields using a changed variable are templated again """
         if not self.is_dynamic() or context is None:
             return self
-        else:
-            selfcopy = self.ninja_copy()
-            selfcopy.templates = None
-            if isinstance(self._body, ContentHandler):
-                selfcopy._body = self._body.get_content(context)
-            selfcopy._url = self.get_url(context=context)
-            selfcopy._headers = self.get_headers(context=context)
-            return selfcopy
+
+        cached = self._realized
+        if cached is not None and cached[0] is context and cached[1] == context.mod_count:
+            return cached[2]
+
+        mod_count = context.mod_count
+        selfcopy = self.ninja_copy()
+        selfcopy.templates = None
+        if isinstance(self._body, ContentHandler):
+            selfcopy._body = self._realize_field(
+                'body', context, lambda: self._body.get_content(context))
+        selfcopy._url = self._realize_field(
+            self.NAME_URL, context, lambda: self.get_url(context=context))
+        selfcopy._headers = self._realize_field(
+            self.NAME_HEADERS, context, lambda: self.get_headers(context=context))
+        self._realized = (context, mod_count, selfcopy)
+        return selfcopy
 
     def realize_partial(self, context=None):
         """ Attempt to template out what is static if possible, and load files.
@@ -392,7 +497,7 @@ class RestTest(Test):
                 mytest.generator_binds = output2
 
             elif configelement == u'datafile_variable_binds':
-                mytest.datafile_variable_binds = FileReader(configvalue).read()
+                mytest.datafile_variable_binds = configvalue
 
         # For non-GET requests, accept additional response codes indicating success
         # (but only if not expected statuses are not explicitly specified)
@@ -36,11 +36,13 @@ class TestConfig(object):
 class TestSet(object):
     """ 一组TestCase，以及这组case的配置 """
     tests = list()
+    benchmarks = list()
     config = TestConfig()
 
     def __init__(self):
         self.config = TestConfig()
         self.tests = list()
+        self.benchmarks = list()
 
     def __str__(self):
         return json.dumps(self, default=safe_to_json)
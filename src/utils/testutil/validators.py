@@ -1,9 +1,23 @@
+import importlib
 import json
 import operator
 import traceback
 import string
 import os
 import re
+import threading
+from collections import OrderedDict
+from cStringIO import StringIO
+from decimal import Decimal
+
+try:
+    import ijson  # Optional, used by jsonpath_mini stream mode
+except ImportError:
+    ijson = None
+try:
+    import numpy  # Optional, used to vectorize numeric comparisons in batch validation
+except ImportError:
+    numpy = None
 
 # Local module imports
 from src.utils.filereader import parsing
@@ -50,11 +64,24 @@ COMPARATORS = {
     'greater_than': operator.gt,
     'contains': lambda x, y: x and operator.contains(x, y),  # is y in x
     'contained_by': lambda x, y: y and operator.contains(y, x),  # is x in y
-    'regex': lambda x, y: regex_compare(str(x), str(y)),
+    'regex': lambda x, y: regex_compare(_as_text(x), y if hasattr(y, 'search') else _as_text(y)),
     'type': lambda x, y: test_type(x, y)
 }
 COMPARATORS['length_eq'] = COMPARATORS['count_eq']
 
+# Comparator function -> numpy ufunc, for comparing numeric arrays in one call
+NUMPY_COMPARATORS = dict()
+if numpy is not None:
+    NUMPY_COMPARATORS.update({
+        operator.lt: numpy.less,
+        operator.le: numpy.less_equal,
+        operator.eq: numpy.equal,
+        operator.ne: numpy.not_equal,
+        operator.ge: numpy.greater_equal,
+        operator.gt: numpy.greater
+    })
+NUMPY_KINDS = 'biuf'  # numpy dtype kinds that can be compared vectorized: bool, int, unsigned, float
+
 # Allow for testing basic types in comparators
 TYPES = {
     'null': type(None),
@@ -110,8 +137,56 @@ def safe_length(var):
     return output
 
 
+def _as_text(value):
+    """ Strings as is, anything else converted with str """
+    if isinstance(value, basestring):
+        return value
+    return str(value)
+
+
+def compile_regex(regex):
+    """ Return compiled regex, from the cache if compiled before; already compiled patterns are returned as is """
+    if hasattr(regex, 'search'):
+        return regex
+    return REGEX_CACHE.get(regex, re.compile)
+
+
 def regex_compare(input, regex):
-    return bool(re.search(regex, input))
+    return bool(compile_regex(regex).search(input))
+
+
+def _match_string_type(extracted_val, expected_val):
+    """ Handle a bytes-based body and a unicode expected value seamlessly, by encoding the expected value """
+    if isinstance(extracted_val, str) and isinstance(expected_val, unicode):
+        return expected_val.encode('utf-8')
+    return expected_val
+
+
+def compare_values(comparator, extracted_values, expected_values):
+    """ Apply comparator to each pair of values, returns a numpy bool array if numpy is installed, else a list
+        Numeric values with a basic comparison operator are compared in one vectorized numpy call """
+    if len(extracted_values) != len(expected_values):
+        raise ValueError('Got {0} extracted values but {1} expected values'.format(
+            len(extracted_values), len(expected_values)))
+    ufunc = NUMPY_COMPARATORS.get(comparator)
+    if ufunc is not None and len(extracted_values):
+        left = numpy.asarray(extracted_values)
+        right = numpy.asarray(expected_values)
+        if (left.ndim == 1 and right.ndim == 1 and
+                left.dtype.kind in NUMPY_KINDS and right.dtype.kind in NUMPY_KINDS):
+            return ufunc(left, right)
+
+    passed = [bool(comparator(x, y)) for x, y in zip(extracted_values, expected_values)]
+    if numpy is not None:
+        return numpy.array(passed, dtype=bool)
+    return passed
+
+
+def failed_indexes(passed):
+    """ Indexes of the rows that did not pass in a batch result array """
+    if numpy is not None and isinstance(passed, numpy.ndarray):
+        return numpy.flatnonzero(~passed).tolist()
+    return [index for index, ok in enumerate(passed) if not ok]
 
 # Validator Failure Reasons
 FAILURE_INVALID_RESPONSE = 'Invalid HTTP Response Code'
@@ -150,6 +225,120 @@ class Failure(object):
         self.failure_type = failure_type
 
 
+class BatchResult(object):
+    """ Result of validating many rows at once
+        passed is an array of booleans, one per row, failures maps the index of each failed row to its Failure
+    """
+
+    def __init__(self, passed, failures=None):
+        self.passed = passed
+        self.failures = failures if failures is not None else dict()
+
+    def __len__(self):
+        return len(self.passed)
+
+    def __nonzero__(self):
+        """ True only if every row passed """
+        return not self.failures
+
+    def __bool__(self):
+        return not self.failures
+
+
+def _per_row(values, count, name):
+    """ Check a per-row argument of batch validation, None means None for every row """
+    if values is None:
+        return [None] * count
+    if len(values) != count:
+        raise ValueError('Got {0} {1} for {2} rows'.format(len(values), name, count))
+    return values
+
+
+class LRUCache(object):
+    """ Thread-safe least-recently-used cache, used for compiled query expressions """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, factory):
+        """ Return cached value for key, calling factory(key) and caching the result on a miss """
+        with self._lock:
+            try:
+                value = self._items.pop(key)
+                self._items[key] = value  # Move to most recently used
+                return value
+            except KeyError:
+                pass
+        value = factory(key)
+        with self._lock:
+            self._items[key] = value
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+        return value
+
+    def __len__(self):
+        return len(self._items)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+REGEX_CACHE = LRUCache(maxsize=256)  # Regex string -> compiled pattern, for templated regexes
+REGEX_COMPARATORS = ('regex',)  # Comparators whose static expected value is compiled once at parse time
+
+
+class ResponseBody(str):
+    """ Response body which caches its parsed forms (JSON tree, XML/HTML document...)
+        It is a str, so extractors and validators using the raw text work unchanged,
+        while extractors parsing the body share one parse per response through parse_body
+    """
+
+    @classmethod
+    def wrap(cls, body):
+        """ Wrap a byte string body, other values are returned as is """
+        if type(body) is str:
+            return cls(body)
+        return body
+
+    def parsed(self, key, parse_function):
+        """ Return parse_function(self), parsing only on first call for key; parse errors are cached too """
+        cache = self.__dict__.setdefault('_parsed', dict())
+        try:
+            is_error, value = cache[key]
+        except KeyError:
+            try:
+                is_error, value = False, parse_function(self)
+            except Exception as e:
+                is_error, value = True, e
+            cache[key] = (is_error, value)
+        if is_error:
+            raise value
+        return value
+
+    def is_parsed(self, key):
+        """ True if the body is already parsed (or failed to parse) for key """
+        return key in self.__dict__.get('_parsed', ())
+
+    def json(self):
+        """ Return parsed JSON, parsing only on first call """
+        return self.parsed('json', json.loads)
+
+
+def parse_body(body, key, parse_function):
+    """ Parse body with parse_function, reusing the result if body is a ResponseBody already parsed for key """
+    if isinstance(body, ResponseBody):
+        return body.parsed(key, parse_function)
+    return parse_function(body)
+
+
+def parse_json(body):
+    """ Parse body as JSON, reusing the parsed tree if body is a ResponseBody """
+    return parse_body(body, 'json', json.loads)
+
+
 class AbstractExtractor(object):
     """ Basic extractor, you only need to implement full_extract """
 
@@ -159,6 +348,7 @@ class AbstractExtractor(object):
     is_body_extractor = False  # Uses response body
     is_header_extractor = False  # Uses response headers
     args = None
+    compiled_query = None  # Result of compile_query for a static query, set by configure_base
 
     def __str__(self):
         return "Extractor type: {0}, query: {1}, is_templated: {2}, args: {3}".format(self.extractor_type, self.query, self.is_templated, self.args)
@@ -173,6 +363,16 @@ class AbstractExtractor(object):
         args = self.args
         return self.extract_internal(query=query, body=body, headers=headers, args=self.args)
 
+    def compile_query(self, query):
+        """ Pre-process a static query once at configure time, None if the extractor doesn't compile queries """
+        return None
+
+    def _compiled(self, query):
+        """ Compiled form of query: the one made at configure time for the static query, else compile_query """
+        if query is self.query and self.compiled_query is not None:
+            return self.compiled_query
+        return self.compile_query(query)
+
     def templated_query(self, context=None):
         query = self.query
         if context and self.is_templated:
@@ -207,51 +407,179 @@ class AbstractExtractor(object):
         elif isinstance(config, basestring):
             extractor_base.query = config
             extractor_base.is_templated = False
+            extractor_base.compiled_query = extractor_base.compile_query(config)
         else:
             raise TypeError(
                 "Base extractor must have a string or {template: querystring} configuration node!")
         return extractor_base
 
 
+def _json_events(stream):
+    """ ijson basic_parse events, with numbers as json.loads gives them """
+    for event, value in ijson.basic_parse(stream):
+        if isinstance(value, Decimal):
+            value = float(value)
+        yield event, value
+
+
+def _skip_json_value(events, event):
+    """ Consume the rest of the value starting with event """
+    if event in ('start_map', 'start_array'):
+        depth = 1
+        for event, value in events:
+            if event in ('start_map', 'start_array'):
+                depth += 1
+            elif event in ('end_map', 'end_array'):
+                depth -= 1
+                if depth == 0:
+                    return
+
+
+def _build_json_value(events, event, value):
+    """ Build the value starting with event from the following events """
+    if event not in ('start_map', 'start_array'):
+        return value
+    builder = ijson.common.ObjectBuilder()
+    builder.event(event, value)
+    depth = 1
+    for event, value in events:
+        builder.event(event, value)
+        if event in ('start_map', 'start_array'):
+            depth += 1
+        elif event in ('end_map', 'end_array'):
+            depth -= 1
+            if depth == 0:
+                break
+    return builder.value
+
+
+def _find_json_value(events, event, value, steps):
+    """ Follow steps from the value starting with event, None if the path does not exist """
+    if not steps:
+        return _build_json_value(events, event, value)
+    step = steps[0]
+    if event == 'start_map' and isinstance(step, basestring):
+        for event, key in events:
+            if event == 'end_map':
+                return None
+            event, value = next(events)
+            if key == step:
+                return _find_json_value(events, event, value, steps[1:])
+            _skip_json_value(events, event)
+    elif event == 'start_array' and isinstance(step, (int, long)) and step >= 0:
+        index = 0
+        for event, value in events:
+            if event == 'end_array':
+                return None
+            if index == step:
+                return _find_json_value(events, event, value, steps[1:])
+            _skip_json_value(events, event)
+            index += 1
+    return None
+
+
+def stream_json_query(steps, stream):
+    """ Incrementally parse JSON from a file-like stream and return the value at the compiled jsonpath_mini steps
+        Stops reading as soon as the value is found, without building the rest of the document
+    """
+    steps = [step.decode('utf-8') if isinstance(step, str) else step for step in steps]
+    events = _json_events(stream)
+    try:
+        event, value = next(events)
+    except StopIteration:
+        raise ValueError("Not legal JSON!")
+    return _find_json_value(events, event, value, steps)
+
+
 class MiniJsonExtractor(AbstractExtractor):
     """ Extractor that uses jsonpath_mini syntax
         IE key.key or array_index.key extraction
+
+        With {query: 'key.key', stream: true} config the body is parsed incrementally (needs ijson),
+        reading only up to the requested value; the body may also be a file-like object in this mode
     """
     extractor_type = 'jsonpath_mini'
     is_body_extractor = True
 
+    @property
+    def is_stream(self):
+        return bool(self.args and self.args.get('stream'))
+
+    def extract_stream(self, steps, body):
+        """ Extract without parsing the whole body, unless it is already parsed """
+        if isinstance(body, ResponseBody) and body.is_parsed('json'):
+            return self.query_steps(steps, body.json())
+        if any(isinstance(step, (int, long)) and step < 0 for step in steps):
+            return self.query_steps(steps, parse_json(body))  # Negative index needs the whole array
+
+        if hasattr(body, 'read'):
+            stream = body
+        elif isinstance(body, unicode):
+            stream = StringIO(body.encode('utf-8'))
+        else:
+            stream = StringIO(body)
+        try:
+            return stream_json_query(steps, stream)
+        except ijson.JSONError:
+            raise ValueError("Not legal JSON!")
+
     def extract_internal(self, query=None, args=None, body=None, headers=None):
 
         try:
-            body = json.loads(body)
-            return self.query_dictionary(query, body)
+            if self.is_stream and ijson is not None:
+                return self.extract_stream(self._compiled(query), body)
+            return self.query_steps(self._compiled(query), parse_json(body))
         except ValueError:
             raise ValueError("Not legal JSON!")
 
+    def compile_query(self, query):
+        return self.compile_steps(query)
+
+    @staticmethod
+    def compile_steps(query, delimiter='.'):
+        """ Split a query into a tuple of path steps, ints for segments that are valid indexes """
+        steps = list()
+        stripped_query = query.strip(delimiter)
+        if stripped_query:
+            for x in stripped_query.split(delimiter):
+                try:
+                    steps.append(int(x))
+                except ValueError:
+                    steps.append(x)
+        return tuple(steps)
+
+    @staticmethod
+    def query_steps(steps, dictionary):
+        """ Follow compiled path steps through the dictionary, None if any step is missing """
+        try:
+            for step in steps:
+                dictionary = dictionary[step]
+        except:
+            return None
+        return dictionary
+
     @staticmethod
     def query_dictionary(query, dictionary, delimiter='.'):
         """ Do an xpath-like query with dictionary, using a template if relevant """
         # Based on
         # http://stackoverflow.com/questions/7320319/xpath-like-query-for-nested-python-dictionaries
-
         try:
-            stripped_query = query.strip(delimiter)
-            if stripped_query:
-                for x in stripped_query.split(delimiter):
-                    try:
-                        x = int(x)
-                        dictionary = dictionary[x]
-                    except ValueError:
-                        dictionary = dictionary[x]
+            steps = MiniJsonExtractor.compile_steps(query, delimiter)
         except:
             return None
-        return dictionary
+        return MiniJsonExtractor.query_steps(steps, dictionary)
 
     @classmethod
     def parse(cls, config):
         base = MiniJsonExtractor()
+        if isinstance(config, dict) and 'stream' in config:
+            config = dict(config)
+            base.args = {'stream': parsing.safe_to_bool(config.pop('stream'))}
+            if 'query' in config:
+                config = config['query']
+            if base.is_stream and ijson is None:
+                logger.warning('ijson is not installed, jsonpath_mini stream mode will parse the whole body')
         return cls.configure_base(config, base)
-        return base
 
 
 class HeaderExtractor(AbstractExtractor):
@@ -292,6 +620,31 @@ class RawBodyExtractor(AbstractExtractor):
         return base
 
 
+class RegexAllExtractor(AbstractExtractor):
+    """ Extractor that returns all matches of a regex in the body, found in one pass (like re.findall) """
+    extractor_type = 'regex_all'
+    is_body_extractor = True
+
+    def compile_query(self, query):
+        return compile_regex(query)
+
+    def extract_internal(self, query=None, args=None, body=None, headers=None):
+        return self._compiled(query).findall(body)
+
+    @classmethod
+    def parse(cls, config):
+        base = cls()
+        return cls.configure_base(config, base)
+
+
+class RegexCountExtractor(RegexAllExtractor):
+    """ Extractor that returns the number of matches of a regex in the body """
+    extractor_type = 'regex_count'
+
+    def extract_internal(self, query=None, args=None, body=None, headers=None):
+        return sum(1 for _ in self._compiled(query).finditer(body))
+
+
 def _get_extractor(config_dict):
     """ Utility function, get an extract function for a single valid extractor name in config
         and error if more than one or none """
@@ -314,6 +667,27 @@ class AbstractValidator(object):
         """ Run the validation function, return true or a Failure """
         pass
 
+    def validate_batch(self, bodies, headers=None, contexts=None):
+        """ Validate many responses, return a BatchResult with Failures only for failed rows
+            headers is None or a list with one entry per body, contexts is one Context for all rows or a list
+        """
+        count = len(bodies)
+        headers = _per_row(headers, count, 'headers')
+        if not isinstance(contexts, (list, tuple)):
+            contexts = [contexts] * count
+        contexts = _per_row(contexts, count, 'contexts')
+
+        passed = list()
+        failures = dict()
+        for index in xrange(count):
+            result = self.validate(body=bodies[index], headers=headers[index], context=contexts[index])
+            passed.append(bool(result))
+            if not result:
+                failures[index] = result
+        if numpy is not None:
+            passed = numpy.array(passed, dtype=bool)
+        return BatchResult(passed, failures)
+
 
 class ComparatorValidator(AbstractValidator):
     """ Does extract and compare from request body   """
@@ -324,6 +698,8 @@ class ComparatorValidator(AbstractValidator):
     comparator = None
     comparator_name = ""
     expected = None
+    compiled_expected = None  # Pre-compiled static expected value, for regex comparators
+    compiled_expected_bytes = None  # Same pattern compiled from utf-8 bytes, used for str extracted values
     isTemplateExpected = False
 
     def get_readable_config(self, context=None):
@@ -339,7 +715,16 @@ class ComparatorValidator(AbstractValidator):
                 'Expected is templated, raw value: {0}'.format(self.expected))
         return os.linesep.join(string_frags)
 
-    def validate(self, body=None, headers=None, context=None):
+    def expected_value(self, context=None):
+        """ Expected value when it does not depend on the body: static or templated """
+        if isinstance(self.expected, AbstractExtractor):
+            raise ValueError('Expected value is extracted from each body')
+        elif self.isTemplateExpected and context:
+            return string.Template(self.expected).safe_substitute(context.get_values())
+        return self.expected
+
+    def extract_values(self, body=None, headers=None, context=None):
+        """ Return (extracted value, expected value), or a Failure if an extractor threw an exception """
         try:
             extracted_val = self.extractor.extract(
                 body=body, headers=headers, context=context)
@@ -348,7 +733,6 @@ class ComparatorValidator(AbstractValidator):
             return Failure(message="Extractor threw exception", details=trace, validator=self, failure_type=FAILURE_EXTRACTOR_EXCEPTION)
 
         # Compute expected output, either templating or using expected value
-        expected_val = None
         if isinstance(self.expected, AbstractExtractor):
             try:
                 expected_val = self.expected.extract(
@@ -356,27 +740,105 @@ class ComparatorValidator(AbstractValidator):
             except Exception as e:
                 trace = traceback.format_exc()
                 return Failure(message="Expected value extractor threw exception", details=trace, validator=self, failure_type=FAILURE_EXTRACTOR_EXCEPTION)
-        elif self.isTemplateExpected and context:
-            expected_val = string.Template(
-                self.expected).safe_substitute(context.get_values())
         else:
-            expected_val = self.expected
+            expected_val = self.expected_value(context)
+
+        return extracted_val, _match_string_type(extracted_val, expected_val)
 
-        # Handle a bytes-based body and a unicode expected value seamlessly
-        if isinstance(extracted_val, binary_type) and isinstance(expected_val, text_type):
-            expected_val = expected_val.encode('utf-8')
-        comparison = self.comparator(extracted_val, expected_val)
+    def compiled_pattern(self, extracted_val):
+        """ Pre-compiled expected regex for extracted_val, the utf-8 bytes pattern for a str value
+            so a bytes-based body matches a unicode expected value, like extract_values does """
+        if isinstance(extracted_val, str):
+            return self.compiled_expected_bytes
+        return self.compiled_expected
+
+    def comparison_failure(self, extracted_val, expected_val, context=None):
+        failure = Failure(validator=self)
+        failure.message = "Comparison failed, evaluating {0}({1}, {2}) returned False".format(
+            self.comparator_name, extracted_val, expected_val)
+        failure.details = self.get_readable_config(context=context)
+        failure.failure_type = FAILURE_VALIDATOR_FAILED
+        return failure
+
+    def validate(self, body=None, headers=None, context=None):
+        values = self.extract_values(body=body, headers=headers, context=context)
+        if isinstance(values, Failure):
+            return values
+        extracted_val, expected_val = values
+
+        if self.compiled_expected is not None:
+            comparison = self.comparator(extracted_val, self.compiled_pattern(extracted_val))
+        else:
+            comparison = self.comparator(extracted_val, expected_val)
 
         if not comparison:
-            failure = Failure(validator=self)
-            failure.message = "Comparison failed, evaluating {0}({1}, {2}) returned False".format(
-                self.comparator_name, extracted_val, expected_val)
-            failure.details = self.get_readable_config(context=context)
-            failure.failure_type = FAILURE_VALIDATOR_FAILED
-            return failure
+            return self.comparison_failure(extracted_val, expected_val, context=context)
         else:
             return True
 
+    def compare_batch(self, extracted_values, expected_values=None, context=None):
+        """ Compare many extracted values at once, return a BatchResult
+            expected_values is a list with one value per row, or None to compare every row with the
+            validator's own (static or templated) expected value
+        """
+        if expected_values is None:
+            expected_val = self.expected_value(context)
+            expected_values = [_match_string_type(value, expected_val) for value in extracted_values]
+            if self.compiled_expected is not None:
+                compared = [self.compiled_pattern(value) for value in extracted_values]
+            else:
+                compared = expected_values
+        else:
+            compared = expected_values
+
+        passed = compare_values(self.comparator, extracted_values, compared)
+        failures = dict()
+        for index in failed_indexes(passed):
+            failures[index] = self.comparison_failure(
+                extracted_values[index], expected_values[index], context=context)
+        return BatchResult(passed, failures)
+
+    def validate_batch(self, bodies, headers=None, contexts=None):
+        """ Extract from each body, then compare all rows at once; see AbstractValidator.validate_batch """
+        count = len(bodies)
+        headers = _per_row(headers, count, 'headers')
+        if not isinstance(contexts, (list, tuple)):
+            contexts = [contexts] * count
+        contexts = _per_row(contexts, count, 'contexts')
+
+        rows = list()
+        extracted_values = list()
+        expected_values = list()
+        failures = dict()
+        for index in xrange(count):
+            values = self.extract_values(body=bodies[index], headers=headers[index], context=contexts[index])
+            if isinstance(values, Failure):
+                failures[index] = values
+            else:
+                rows.append(index)
+                extracted_values.append(values[0])
+                expected_values.append(values[1])
+
+        if self.compiled_expected is not None:
+            compared = [self.compiled_pattern(value) for value in extracted_values]
+        else:
+            compared = expected_values
+        compared_passed = compare_values(self.comparator, extracted_values, compared)
+        for position in failed_indexes(compared_passed):
+            index = rows[position]
+            failures[index] = self.comparison_failure(
+                extracted_values[position], expected_values[position], context=contexts[index])
+
+        if len(rows) == count:
+            passed = compared_passed
+        else:
+            passed = [False] * count
+            for position, index in enumerate(rows):
+                passed[index] = bool(compared_passed[position])
+            if numpy is not None:
+                passed = numpy.array(passed, dtype=bool)
+        return BatchResult(passed, failures)
+
     @staticmethod
     def parse(config):
         """ Create a validator that does an extract from body and applies a comparator,
@@ -418,6 +880,12 @@ class ComparatorValidator(AbstractValidator):
 
         if isinstance(expected, basestring) or isinstance(expected, (int, long, float, complex)):
             output.expected = expected
+            if output.comparator_name in REGEX_COMPARATORS:
+                pattern = _as_text(expected)
+                output.compiled_expected = compile_regex(pattern)
+                if isinstance(pattern, unicode):
+                    pattern = pattern.encode('utf-8')
+                output.compiled_expected_bytes = compile_regex(pattern)
         elif isinstance(expected, dict):
             expected = parsing.lowercase_keys(expected)
             template = expected.get('template')
@@ -583,13 +1051,42 @@ def register_comparator(comparator_name, comparator_function):
 register_extractor('jsonpath_mini', MiniJsonExtractor.parse)
 register_extractor('header', HeaderExtractor.parse)
 register_extractor('raw_body', RawBodyExtractor.parse)
-# ENHANCEME: add JsonPath-rw support for full JsonPath syntax
-# ENHANCEME: add elementree support for xpath extract on XML, very simple no?
-# See: https://docs.python.org/2/library/xml.etree.elementtree.html,
-# findall syntax
+register_extractor('regex_all', RegexAllExtractor.parse)
+register_extractor('regex_count', RegexCountExtractor.parse)
+
 
 register_validator('comparator', ComparatorValidator.parse)
 register_validator('compare', ComparatorValidator.parse)
 register_validator('assertEqual', ComparatorValidator.parse)
 register_validator('extract_test', ExtractTestValidator.parse)
 register_validator('assertTrue', ExtractTestValidator.parse)
+
+# Extensions with optional dependencies: module, then the third-party libraries it needs
+# Each entry of the libraries is a tuple of alternatives, any one of them being installed is enough
+EXTENSIONS = [
+    ('src.utils.testutil.ext.extractor_jmespath', (('jmespath',),)),
+    ('src.utils.testutil.ext.extractor_jsonpath', (('jsonpath_ng', 'jsonpath_rw'),)),
+    ('src.utils.testutil.ext.extractor_xpath', (('lxml',),)),
+    ('src.utils.testutil.ext.extractor_css', (('lxml',), ('cssselect',))),
+    ('src.utils.testutil.ext.validator_jsonschema', (('jsonschema',),)),
+]
+
+
+def _is_installed(alternatives):
+    for name in alternatives:
+        try:
+            importlib.import_module(name)
+            return True
+        except ImportError:
+            pass
+    return False
+
+
+def register_extensions():
+    """ Import the extension modules whose libraries are installed, each one registers itself when imported
+        Only a missing third-party library skips an extension, errors in the extension module itself are raised """
+    for module_name, requirements in EXTENSIONS:
+        if all(_is_installed(alternatives) for alternatives in requirements):
+            importlib.import_module(module_name)
+
+register_extensions()
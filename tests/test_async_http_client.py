@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+import json
+import time
+import unittest
+
+from src.utils.interface.async_http_client import AsyncHTTPClient, AsyncRequest, parse_response
+from src.utils.utils_exception import UnSupportMethod
+from tests.test_runner import start_stub_server
+
+
+class AsyncHTTPClientTest(unittest.TestCase):
+    """ Tests for event loop http client """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server, cls.base_url = start_stub_server()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_parse_response(self):
+        raw = 'HTTP/1.1 200 OK\r\nContent-Type: text/plain\r\nTransfer-Encoding: chunked\r\n\r\n' \
+              '5\r\nhello\r\n6\r\n world\r\n0\r\n\r\n'
+        response = parse_response('http://x', raw)
+        self.assertEqual(200, response.status_code)
+        self.assertEqual('OK', response.reason)
+        self.assertEqual('hello world', response.content)
+        self.assertTrue(('content-type', 'text/plain') in response.headers)
+
+        self.assertRaises(ValueError, parse_response, 'http://x', 'HTTP/1.1 200 OK\r\n')
+
+    def test_send_all(self):
+        requests = [AsyncRequest(self.base_url + '/echo?a=1'),
+                    AsyncRequest(self.base_url + '/person/', 'POST', body=u'{"name": "汉"}'),
+                    AsyncRequest(self.base_url + '/status/404')]
+        responses = AsyncHTTPClient().send_all(requests)
+
+        self.assertEqual([200, 201, 404], [r.status_code for r in responses])
+        self.assertEqual('/echo?a=1', json.loads(responses[0].content)['path'])
+        self.assertTrue('id' in json.loads(responses[1].content))
+        self.assertTrue(all(r.error is None for r in responses))
+
+    def test_concurrency(self):
+        requests = [AsyncRequest(self.base_url + '/slow') for x in range(50)]
+
+        start = time.time()
+        responses = AsyncHTTPClient(concurrency=50).send_all(requests)
+        self.assertTrue(time.time() - start < 50 * 0.2 / 4)
+        self.assertTrue(all(r.status_code == 200 for r in responses))
+
+        start = time.time()
+        AsyncHTTPClient(concurrency=1).send_all(requests[:5])
+        self.assertTrue(time.time() - start >= 5 * 0.2)
+
+    def test_errors(self):
+        responses = AsyncHTTPClient(timeout=0.1).send_all([AsyncRequest(self.base_url + '/slow'),
+                                                           AsyncRequest('http://127.0.0.1:1/')])
+        self.assertTrue(responses[0].error is not None)
+        self.assertTrue(responses[1].error is not None)
+        self.assertRaises(UnSupportMethod, AsyncHTTPClient().send_all, [AsyncRequest(self.base_url, 'FOO')])
+
+    def test_delay(self):
+        start = time.time()
+        responses = AsyncHTTPClient().send_all([AsyncRequest(self.base_url + '/echo', delay=0.3)])
+        self.assertEqual(200, responses[0].status_code)
+        self.assertTrue(time.time() - start >= 0.3)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
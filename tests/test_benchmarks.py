@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from src.utils.testutil.benchmarks import AGGREGATES, Benchmark, BenchmarkResult, analyze_benchmark_results, \
+    metrics_to_tuples, parse_benchmark, percentile
+from src.utils.testutil.case_generator import parse_testsets
+from src.utils.testutil.runner import TestRunner, run_benchmark
+from tests.test_runner import start_stub_server
+
+
+class BenchmarksTest(unittest.TestCase):
+    """ Tests for benchmark parsing, aggregation and running """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server, cls.base_url = start_stub_server()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_percentile(self):
+        self.assertEqual(None, percentile([], 50))
+        self.assertEqual(3, percentile([5, 1, 3], 50))
+        self.assertEqual(2.5, percentile([1, 2, 3, 4], 50))
+        self.assertEqual(100, percentile(range(1, 101), 100))
+        self.assertAlmostEqual(99.01, percentile(range(1, 101), 99))
+        self.assertAlmostEqual(2.0, AGGREGATES['std_deviation']([2, 4, 4, 4, 5, 5, 7, 9]))
+
+    def test_parse_benchmark(self):
+        node = {'url': '/api/person/', 'name': 'person list', 'warmup_runs': 5,
+                'benchmark_runs': '100', 'concurrency': 10,
+                'metrics': ['size_download',
+                            {'total_time': ['mean', 'p95', 'p99']},
+                            {'time_to_first_byte': 'median'}]}
+        benchmark = parse_benchmark('http://host', node)
+        self.assertTrue(isinstance(benchmark, Benchmark))
+        self.assertEqual('http://host/api/person/', benchmark.url)
+        self.assertEqual(5, benchmark.warmup_runs)
+        self.assertEqual(100, benchmark.benchmark_runs)
+        self.assertEqual(10, benchmark.concurrency)
+        self.assertEqual(set(['size_download']), benchmark.raw_metrics)
+        self.assertEqual(['mean', 'p95', 'p99'], benchmark.aggregated_metrics['total_time'])
+        self.assertEqual(['median'], benchmark.aggregated_metrics['starttransfer_time'])
+
+        self.assertRaises(ValueError, parse_benchmark, '', {'url': '/', 'metrics': 'not_a_metric'})
+        self.assertRaises(ValueError, parse_benchmark, '', {'url': '/', 'metrics': {'total_time': 'nope'}})
+
+    def test_parse_testsets_benchmark(self):
+        testsets = parse_testsets('', [[{'test': {'url': '/a'}},
+                                        {'benchmark': {'url': '/b', 'metrics': 'total_time'}}]])
+        self.assertEqual(1, len(testsets[0].tests))
+        self.assertEqual(1, len(testsets[0].benchmarks))
+
+    def test_analyze_benchmark(self):
+        benchmark_result = BenchmarkResult()
+        benchmark = Benchmark()
+        benchmark.add_metric('request_size').add_metric('request_size', 'median')
+        benchmark.add_metric('connect_time')
+        benchmark.add_metric('total_time', 'mean_harmonic')
+        benchmark.add_metric('total_time', 'std_deviation')
+
+        benchmark_result.results = {
+            'connect_time': [1, 4, 7],
+            'request_size': [7, 8, 10],
+            'total_time': [0.5, 0.7, 0.9]
+        }
+
+        analyzed = analyze_benchmark_results(benchmark_result, benchmark)
+        self.assertEqual(2, len(analyzed.results.keys()))
+        self.assertEqual(2, len(set([x[0] for x in analyzed.aggregates])))
+        self.assertEqual(3, len(set([x[1] for x in analyzed.aggregates])))
+        self.assertTrue(('request_size', 'median', 8) in analyzed.aggregates)
+
+    def test_metrics_to_tuples(self):
+        metrics = {'foo': [1, 2], 'bar': [3, 4]}
+        self.assertEqual([('bar', 'foo'), (3, 1), (4, 2)], metrics_to_tuples(metrics))
+        self.assertRaises(TypeError, metrics_to_tuples, [])
+
+    def test_run_benchmark(self):
+        benchmark = parse_benchmark(self.base_url, {
+            'url': '/echo', 'warmup_runs': 2, 'benchmark_runs': 20, 'concurrency': 5,
+            'metrics': ['size_download', {'total_time': ['p50', 'p95', 'p99']},
+                        {'connect_time': 'mean'}, {'starttransfer_time': 'max'}]})
+        result = run_benchmark(benchmark)
+
+        self.assertEqual(0, result.failures)
+        self.assertEqual(20, len(result.results['size_download']))
+        aggregates = dict(((x[0], x[1]), x[2]) for x in result.aggregates)
+        self.assertEqual(5, len(aggregates))
+        self.assertTrue(aggregates[('total_time', 'p50')] <= aggregates[('total_time', 'p99')])
+        self.assertTrue(aggregates[('connect_time', 'mean')] <= aggregates[('total_time', 'p99')])
+
+    def test_run_benchmark_templated(self):
+        testsets = parse_testsets(self.base_url, [[
+            {'config': {'generators': [{'ids': {'type': 'number_sequence', 'start': 10}}]}},
+            {'benchmark': {'url': {'template': '/person/$id'}, 'generator_binds': {'id': 'ids'},
+                           'warmup_runs': 0, 'benchmark_runs': 5, 'metrics': ['size_download']}},
+            {'benchmark': {'url': '/status/500', 'warmup_runs': 0, 'benchmark_runs': 3,
+                           'metrics': [{'total_time': 'mean'}]}}
+        ]])
+        runner = TestRunner()
+        runner.run(testsets)
+        self.assertEqual(2, len(runner.benchmark_results))
+        self.assertEqual(0, runner.benchmark_results[0].failures)
+        self.assertEqual([len('{"id": 10}')] * 5, runner.benchmark_results[0].results['size_download'])
+        self.assertEqual(3, runner.benchmark_results[1].failures)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -1,4 +1,6 @@
+import threading
 import unittest
+from src.utils.filereader import generators
 from src.utils.filereader.binding import Context
 
 
@@ -63,5 +65,76 @@ class BindingTest(unittest.TestCase):
         self.assertEqual(1, context.get_value('foo'))
         self.assertEqual(2, context.mod_count)
 
+    def test_variable_versions(self):
+        """ Each variable records the mod_count at which it was last altered """
+        context = Context()
+        context.add_generator('gen', count_gen())
+        self.assertEqual(0, context.get_version('foo'))
+        context.bind_variables({'foo': 'a'})
+        context.bind_variable('bar', 'b')
+        self.assertEqual(1, context.get_version('foo'))
+        self.assertEqual(2, context.get_version('bar'))
+        context.bind_variable('foo', 'a')  # Unchanged value
+        self.assertEqual(1, context.get_version('foo'))
+        context.bind_generator_next('foo', 'gen')
+        self.assertEqual(3, context.get_version('foo'))
+        self.assertEqual(2, context.get_version('bar'))
+
+    def test_child_context(self):
+        """ Child context reads parent variables, writes only to itself """
+        base = Context()
+        base.bind_variables({'host': 'a', 'id': 1})
+        child = base.child()
+        other = base.child()
+        self.assertEqual('a', child.get_value('host'))
+        self.assertEqual(base.mod_count, child.mod_count)
+
+        child.bind_variable('id', 2)
+        self.assertEqual(2, child.get_value('id'))
+        self.assertEqual(1, base.get_value('id'))
+        self.assertEqual(1, other.get_value('id'))
+        self.assertEqual({'host': 'a', 'id': 2}, child.get_values())
+        self.assertEqual({'host': 'a', 'id': 1}, other.get_values())
+        self.assertTrue(child.get_version('id') > other.get_version('id'))
+
+        # Parent changes are visible and counted in the child mod_count
+        mod_count = child.mod_count
+        base.bind_variable('host', 'b')
+        self.assertTrue(child.mod_count > mod_count)
+        self.assertEqual('b', child.get_values()['host'])
+        self.assertEqual(2, child.get_values()['id'])
+        grandchild = child.child()
+        self.assertEqual({'host': 'b', 'id': 2}, grandchild.get_values())
+
+    def test_child_generators(self):
+        """ Children share the parent generators, which are advanced thread-safely """
+        base = Context()
+        base.add_generator('gen', count_gen())
+        children = [base.child() for _ in range(8)]
+        self.assertTrue(children[0].get_generator('gen') is base.get_generator('gen'))
+        self.assertTrue('gen' in children[0].get_generators())
+
+        values = list()
+
+        def worker(context):
+            for _ in range(500):
+                values.append(context.bind_generator_next('foo', 'gen'))
+
+        threads = [threading.Thread(target=worker, args=(child,)) for child in children]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(range(1, 4001), sorted(values))
+        self.assertTrue(base.get_value('foo') is None)
+    def test_generator_bind_buffered(self):
+        """ Values of batched generators come from the prefetched buffer """
+        context = Context()
+        gen = generators.batched_generator(lambda n: range(n), batch_size=10)
+        context.add_generator('gen', gen)
+        self.assertEqual(0, context.bind_generator_next('foo', 'gen'))
+        self.assertEqual(1, next(gen))
+        self.assertEqual(2, context.bind_generator_next('foo', 'gen'))
+
 if __name__ == '__main__':
     unittest.main(verbosity=2)
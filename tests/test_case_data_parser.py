@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import unittest
+
+from src.utils.encrypt import Encrypt
+from src.utils.testutil import case_data_parser
+from src.utils.testutil.case_data_parser import DataParser
+
+
+class DataParserTest(unittest.TestCase):
+
+    def setUp(self):
+        self.data = [{'a': 'int', 'b': 'double', 'c': 'MD5', 'd': 'sha1', 'e': 'str', 'f': '', 'g': 'list'},
+                     {'a': '1', 'b': '2', 'c': '1.0', 'd': 'x', 'e': 'e1', 'f': 'f1', 'g': 'g1'},
+                     {'a': 'a', 'b': '2.5', 'c': 'c', 'd': 'x', 'e': 'e2', 'f': 'f2', 'g': 'g2'},
+                     {'a': '30', 'b': 'b', 'c': '1.0', 'd': 'y', 'e': 'e3', 'f': 'f3', 'g': 'g3'}]
+
+    def test_parse_columns(self):
+        expected = DataParser(Encrypt()).parse([dict(row) for row in self.data])
+        parsed = DataParser(Encrypt()).parse_columns(self.data)
+        self.assertEqual(expected, parsed)
+        self.assertEqual([1, 'a', 30], [row['a'] for row in parsed])
+        self.assertEqual([2.0, 2.5, 'b'], [row['b'] for row in parsed])
+        self.assertEqual(hashlib.sha1('x').hexdigest(), parsed[1]['d'])
+        self.assertFalse('f' in parsed[0] or 'g' in parsed[0])
+
+        # xlrd reads numbers as float, out of int64 range and NaN are converted like parse does
+        data = [{'a': 'int'}, {'a': 1e20}, {'a': 1.0}, {'a': 2.5}]
+        parsed = DataParser().parse_columns(data)
+        self.assertEqual(DataParser().parse([dict(row) for row in data]), parsed)
+        self.assertEqual([10 ** 20, 1, 2], [row['a'] for row in parsed])
+        nan = float('nan')
+        parsed = DataParser().parse_columns([{'a': 'int'}, {'a': nan}, {'a': 1.0}])
+        self.assertTrue(parsed[0]['a'] is nan)
+        self.assertEqual(1, parsed[1]['a'])
+
+    def test_parse_columns_without_numpy(self):
+        numpy = case_data_parser.numpy
+        case_data_parser.numpy = None
+        try:
+            self.assertEqual(DataParser().parse([dict(row) for row in self.data]),
+                             DataParser().parse_columns(self.data))
+        finally:
+            case_data_parser.numpy = numpy
+
+    def test_encrypt_column(self):
+        """ encrypt column uses the instance salt and way, which parse_columns does not change """
+        encrypt = Encrypt(salt='111111')
+        parsed = DataParser(encrypt).parse_columns([{'p': 'encrypt'}, {'p': 'pwd'}, {'p': 'pwd'}])
+        self.assertEqual([hashlib.md5('pwd111111').hexdigest()] * 2, [row['p'] for row in parsed])
+        self.assertEqual('111111', encrypt.salt)
+
+
+class EncryptTest(unittest.TestCase):
+
+    def test_encrypt_many(self):
+        encrypt = Encrypt(salt='s')
+        values = ['a', 'b', 'a']
+        self.assertEqual([hashlib.md5(v + 's').hexdigest() for v in values], encrypt.encrypt_many(values))
+        self.assertEqual([hashlib.sha1(v).hexdigest() for v in values],
+                         encrypt.encrypt_many(values, salt='', encryway='sha1'))
+        self.assertEqual('s', encrypt.salt)
+        self.assertEqual('MD5', encrypt.encrypt_way)
+        self.assertEqual([None, None], encrypt.encrypt_many(values[:2], encryway='SHA256'))
+
+    def test_encrypt(self):
+        encrypt = Encrypt(salt='111111')
+        self.assertEqual(hashlib.md5('100000307111111').hexdigest(), encrypt.encrypt('100000307'))
+        self.assertEqual(hashlib.sha1('100000307').hexdigest(), encrypt.encrypt('100000307', '', 'SHA1'))
+        self.assertEqual('SHA1', encrypt.encrypt_way)
+        self.assertTrue(encrypt.encrypt('x', encryway='SHA256') is None)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
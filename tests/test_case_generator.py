@@ -1,6 +1,10 @@
 # -*- coding: utf-8 -*-
 
+import os
+import tempfile
+import time
 import unittest
+from src.utils.testutil import case_generator
 from src.utils.testutil.case_generator import parse_testsets
 from src.utils.filereader.file_reader import FileReader
 
@@ -19,6 +23,60 @@ class TestParseTestsets(unittest.TestCase):
                 print 'Test:\t'
                 print j
 
+    def test_parse_testsets_cached(self):
+        structure = [[{'config': {'generators': [{'ids': {'type': 'number_sequence'}}]}},
+                      {'test': {'url': '/a', 'validators': [{'compare': {'jsonpath_mini': 'id', 'expected': 1}}]}},
+                      {'url': '/b'}]]
+        first = parse_testsets('http://host', structure)
+        second = parse_testsets('http://host', structure)
+        self.assertEqual(2, len(second[0].tests))
+        self.assertFalse(first[0].tests[0] is second[0].tests[0])
+        self.assertTrue(first[0].tests[0].validators[0] is second[0].tests[0].validators[0])
+        self.assertFalse(first[0].config.generators['ids'] is second[0].config.generators['ids'])
+        self.assertEqual(1, next(second[0].config.generators['ids']))
+
+        other = parse_testsets('http://other', structure)
+        self.assertEqual('http://other/a', other[0].tests[0].url)
+
+    def test_parse_testsets_cached_copies(self):
+        """ Tests returned from the cache don't share per-test state """
+        structure = [[{'test': {'url': {'template': '/$id'}, 'headers': {'template': {'X-Id': '$id'}}}}]]
+        first = parse_testsets('', structure)[0].tests[0]
+        first.set_url('/changed/$id', isTemplate=True)
+        first.headers['X-Other'] = '1'
+        second = parse_testsets('', structure)[0].tests[0]
+        self.assertEqual('/$id', second.get_url())
+        self.assertEqual({'X-Id': '$id'}, second.headers)
+        self.assertTrue(second._realized is None)
+
+    def test_parse_testsets_structure_changed(self):
+        """ Editing the structure in place is picked up, the cache is keyed on content """
+        structure = [[{'url': '/a'}]]
+        self.assertEqual('/a', parse_testsets('', structure)[0].tests[0].url)
+        structure[0][0]['url'] = '/b'
+        self.assertEqual('/b', parse_testsets('', structure)[0].tests[0].url)
+
+    def test_parse_testsets_file_changed(self):
+        """ Cached result is not used after a referenced file changes """
+        fd, path = tempfile.mkstemp(suffix='.json')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write('{}')
+            structure = [[{'test': {'url': '/a', 'body': {'file': path}}}]]
+            first = case_generator._cache_key('', structure)
+            self.assertEqual(first, case_generator._cache_key('', structure))
+            with open(path, 'w') as f:
+                f.write('{"changed": true}')
+            os.utime(path, (time.time() + 10, time.time() + 10))
+            self.assertNotEqual(first, case_generator._cache_key('', structure))
+        finally:
+            os.remove(path)
+
+    def test_parse_testsets_vars(self):
+        structure = [[{'config': {'variable_binds': {'a': 1}}}, {'url': '/a'}]]
+        self.assertEqual({'a': 1, 'b': 2}, parse_testsets('', structure, vars={'b': 2})[0].config.variable_binds)
+        self.assertEqual({'a': 1}, parse_testsets('', structure)[0].config.variable_binds)
+
 
 if __name__ == '__main__':
     unittest.main(verbosity=0)
@@ -28,6 +28,20 @@ class ContentHandlerTest(unittest.TestCase):
         self.assertEqual(body, handler.get_content())
         self.assertEqual(templated_body, handler.get_content(context))
 
+    def test_template_compiled_once(self):
+        """ Inline template is compiled once and recompiled when content changes """
+        handler = ContentHandler()
+        handler.setup('$variable value', is_template_content=True)
+        context = Context()
+        context.bind_variable('variable', 'bar')
+        template = handler.get_template()
+        self.assertEqual('bar value', handler.get_content(context))
+        self.assertTrue(template is handler.get_template())
+
+        handler.setup('$variable other', is_template_content=True)
+        self.assertFalse(template is handler.get_template())
+        self.assertEqual('bar other', handler.get_content(context))
+
     def test_unicode_templating(self):
         """ A couple combination of templating using Unicode data """
         handler = ContentHandler()
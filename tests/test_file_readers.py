@@ -1,8 +1,16 @@
 # -*- coding: utf-8 -*-
 
+import os
+import tempfile
 import unittest
 import pprint
+from src.utils.config import DefaultConfig
+from src.utils.filereader import data_cache
+from src.utils.filereader.excel_reader import ExcelReader
+from src.utils.filereader.file_reader import FileReader, select_rows
+from src.utils.filereader.xml_reader import InterfaceRegistry, XMLReader
 from src.utils.filereader.yaml_reader import YamlReader
+from src.utils.utils_exception import DataError
 
 
 class TestYamlReader(unittest.TestCase):
@@ -14,5 +22,157 @@ class TestYamlReader(unittest.TestCase):
             pprint.pprint(node)
 
 
+class TestExcelReader(unittest.TestCase):
+
+    def test_excel_reader(self):
+        phone = ExcelReader('phone.xlsx', 0)
+        self.assertEqual([u'phone', u'name'], phone.title)
+        self.assertEqual(71, phone.nums)
+        self.assertEqual(71, len(phone.data))
+        self.assertTrue(phone.data is phone.data)
+        self.assertEqual(set(['phone', 'name']), set(phone.data[0].keys()))
+
+    def test_workbook_cached(self):
+        self.assertTrue(ExcelReader('zhigou.xlsx', 'CheckCode').book is ExcelReader('zhigou.xlsx', 'CheckName').book)
+        book = ExcelReader('phone.xlsx').book
+        ExcelReader.clear_cache()
+        self.assertFalse(book is ExcelReader('phone.xlsx').book)
+
+    def test_file_reader_iteration(self):
+        data = ExcelReader('zhigou.xlsx', 'CheckCode').data
+        rows = FileReader({'file': 'zhigou.xlsx', 'sheet': 'CheckCode', 'iteration': [3, 10]}).read()
+        self.assertEqual([data[0], data[3:11]], rows)
+        rows = FileReader({'file': 'zhigou.xlsx', 'sheet': 'CheckCode', 'iteration': (1, 4)}).read()
+        self.assertEqual([data[0], data[1], data[4]], rows)
+
+    def test_stream(self):
+        phone = ExcelReader('phone.xlsx', 0)
+        streamed = ExcelReader('phone.xlsx', 0, stream=True)
+        self.assertTrue(streamed.book is None)
+        self.assertEqual(phone.title, streamed.title)
+        self.assertEqual(phone.nums, streamed.nums)
+        self.assertEqual(phone.data, list(streamed.iter_rows()))
+        self.assertEqual(phone.data, streamed.data)
+
+        rows = FileReader({'file': 'phone.xlsx', 'stream': True}).read()
+        self.assertFalse(isinstance(rows, list))
+        self.assertEqual(phone.data[0], next(rows))
+
+    def test_select_rows_lazily(self):
+        consumed = list()
+
+        def rows():
+            for index in range(1000):
+                consumed.append(index)
+                yield index
+
+        self.assertEqual([0, [3, 4, 5]], select_rows(rows(), [3, 5]))
+        self.assertEqual(6, len(consumed))
+        del consumed[:]
+        self.assertEqual([0, 7, 2], select_rows(rows(), (7, 2)))
+        self.assertEqual(8, len(consumed))
+        self.assertEqual([0, 999], select_rows(rows(), (-1,)))
+
+
+class TestXMLReader(unittest.TestCase):
+
+    def test_xml_reader(self):
+        xml = XMLReader('zhigou1.xml')
+        self.assertEqual('http://192.168.7.227:8080/zhigou/', xml.base_url)
+        self.assertEqual('http://192.168.7.227:8080/zhigou/P_Merchant__CheckCode', xml.get_url('CheckCode'))
+        self.assertEqual('rest', xml.get_type('CheckCode'))
+        self.assertEqual('POST', xml.get_method('CheckCode'))
+        self.assertEqual('check.xlsx', xml.get_file('CheckCode'))
+        self.assertEqual('P_Merchant__CheckCode', xml.get_sheet('CheckCode'))
+        self.assertEqual('rest', xml.get_text('.//CheckCode/type'))
+        self.assertTrue('CheckName' in xml.get_tags())
+        self.assertFalse('Base' in xml.get_tags())
+        self.assertRaises(DataError, xml.get_type, 'CheckName')
+        self.assertRaises(DataError, xml.get_text, 'NotExists')
+
+    def test_registry_cached(self):
+        self.assertTrue(XMLReader('zhigou1.xml').registry is XMLReader('zhigou1.xml').registry)
+
+    def test_registry_reload(self):
+        fd, path = tempfile.mkstemp(suffix='.xml')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write('<urls><Base>http://a/</Base><Api>v1<method>GET</method></Api></urls>')
+            registry = InterfaceRegistry.get(path)
+            self.assertEqual('v1', registry.text['Api'])
+            self.assertTrue(registry is InterfaceRegistry.get(path))
+
+            with open(path, 'w') as f:
+                f.write('<urls><Base>http://a/</Base><Api>v2<method>POST</method></Api></urls>')
+            os.utime(path, (registry.mtime + 10, registry.mtime + 10))
+            registry = InterfaceRegistry.get(path)
+            self.assertEqual('v2', registry.text['Api'])
+            self.assertEqual('POST', registry.fields['Api']['method'])
+        finally:
+            os.remove(path)
+
+
+    def test_reader_reload(self):
+        """ A long-lived XMLReader sees the edited file """
+        fd, path = tempfile.mkstemp(suffix='.xml', dir=DefaultConfig().data_path)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write('<urls><Base>http://a/</Base><Api>v1</Api></urls>')
+            xml = XMLReader(os.path.basename(path))
+            self.assertEqual('http://a/v1', xml.get_url('Api'))
+
+            mtime = os.path.getmtime(path)
+            with open(path, 'w') as f:
+                f.write('<urls><Base>http://a/</Base><Api>v2</Api></urls>')
+            os.utime(path, (mtime + 10, mtime + 10))
+            self.assertEqual('http://a/v2', xml.get_url('Api'))
+        finally:
+            os.remove(path)
+
+class TestDataCache(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.yaml')
+        with os.fdopen(fd, 'w') as f:
+            f.write('a: 1')
+        self.calls = list()
+
+    def tearDown(self):
+        os.remove(self.path)
+        for key in ('yaml', 'other'):
+            if os.path.exists(data_cache.cache_file(self.path, key)):
+                os.remove(data_cache.cache_file(self.path, key))
+
+    def _loader(self):
+        self.calls.append(1)
+        return {'rows': [1, 2, 3]}
+
+    def test_cache_hit(self):
+        self.assertEqual({'rows': [1, 2, 3]}, data_cache.load(self.path, 'yaml', self._loader))
+        self.assertEqual({'rows': [1, 2, 3]}, data_cache.load(self.path, 'yaml', self._loader))
+        self.assertEqual(1, len(self.calls))
+        data_cache.load(self.path, 'other', self._loader)
+        self.assertEqual(2, len(self.calls))
+
+    def test_source_changed(self):
+        data_cache.load(self.path, 'yaml', self._loader)
+        mtime = os.path.getmtime(self.path)
+        os.utime(self.path, (mtime + 10, mtime + 10))
+        data_cache.load(self.path, 'yaml', self._loader)
+        self.assertEqual(2, len(self.calls))
+
+    def test_broken_cache(self):
+        data_cache.load(self.path, 'yaml', self._loader)
+        with open(data_cache.cache_file(self.path, 'yaml'), 'wb') as f:
+            f.write('not a pickle')
+        self.assertEqual({'rows': [1, 2, 3]}, data_cache.load(self.path, 'yaml', self._loader))
+        self.assertEqual(2, len(self.calls))
+
+    def test_file_reader_from_cache(self):
+        data = ExcelReader('phone.xlsx').data
+        self.assertEqual(data, FileReader({'file': 'phone.xlsx'}).read())
+        self.assertEqual(data, FileReader({'file': 'phone.xlsx'}).read())
+
+
 if __name__ == '__main__':
     unittest.main(verbosity=0)
\ No newline at end of file
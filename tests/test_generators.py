@@ -1,3 +1,4 @@
+import random
 import unittest
 import string
 import os
@@ -149,6 +150,37 @@ class GeneratorTest(unittest.TestCase):
         self.assertTrue(len(
             lengths) > 1, "Variable length string generator did not generate multiple string lengths")
 
+    def test_take(self):
+        """ Batched generators return values in bulk, after the buffered ones """
+        gen = generators.factory_generate_text(legal_characters='abc', min_length=3, max_length=5)()
+        first = next(gen)
+        values = list(generators.take(gen, 5000))
+        self.assertEqual(5000, len(values))
+        self.assertTrue(all(3 <= len(v) <= 5 and set(v) <= set('abc') for v in [first] + values))
+        self.assertEqual(set([3, 4, 5]), set(len(v) for v in values))
+
+        ints = list(generators.take(generators.generator_random_int32(), 2000))
+        self.assertEqual(2000, len(ints))
+        self.assertTrue(all(0 <= v <= generators.INT32_MAX_VALUE for v in ints))
+        self.assertTrue(len(set(ints)) > 1)
+
+        # Plain generators are read one by one
+        self.assertEqual([1, 2, 3], generators.take(generators.generator_basic_ids(), 3))
+
+    def test_batch_buffer(self):
+        calls = list()
+
+        def take_batch(n):
+            calls.append(n)
+            return range(n)
+
+        gen = generators.batched_generator(take_batch, batch_size=4)
+        self.assertTrue(isinstance(gen, types.GeneratorType))
+        self.assertEqual([0, 1], [next(gen), generators.next_value(gen)])
+        self.assertEqual([2, 3, 0, 1, 2], list(generators.take(gen, 5)))
+        self.assertEqual([3, 0], [next(gen), next(gen)])
+        self.assertEqual([4, 4, 4], calls)
+
     def test_character_sets(self):
         """ Verify all charsets are valid """
         sets = generators.CHARACTER_SETS
@@ -206,6 +238,106 @@ class GeneratorTest(unittest.TestCase):
         self.generator_basic_test(
             gen, value_test_function=lambda x: len(x) >= 9 and len(x) <= 12)
 
+    def test_seeded_generators(self):
+        """ Same seed gives the same values, shards get independent streams """
+        for config in ({'type': 'random_text', 'seed': 42, 'min_length': 4, 'max_length': 12},
+                       {'type': 'random_int', 'seed': 'run-1'},
+                       {'type': 'choice', 'seed': 7, 'values': range(100)}):
+            first = next(generators.parse_generator(config))
+            values = list(generators.take(generators.parse_generator(config), 50))
+            self.assertEqual(values, list(generators.take(generators.parse_generator(config), 50)))
+            self.assertEqual(first, values[0])
+
+            sharded = dict(config, shards=2, shard=1)
+            self.assertNotEqual(values, list(generators.take(generators.parse_generator(sharded), 50)))
+            self.assertEqual(list(generators.take(generators.parse_generator(sharded), 50)),
+                             list(generators.take(generators.parse_generator(sharded), 50)))
+
+        self.assertNotEqual(list(generators.take(generators.generator_random_int32(), 20)),
+                            list(generators.take(generators.generator_random_int32(), 20)))
+
+    def test_seeded_without_numpy(self):
+        """ Seeded streams give the same values with and without numpy """
+        configs = ({'type': 'random_text', 'seed': 42, 'min_length': 4, 'max_length': 12},
+                   {'type': 'random_text', 'seed': 42, 'length': 8},
+                   {'type': 'random_int', 'seed': 'run-1'},
+                   {'type': 'random_int', 'seed': 3, 'shards': 2, 'shard': 1},
+                   {'type': 'unique', 'min': 1, 'max': 100, 'seed': u'\u79cd\u5b50'})
+        expected = [list(generators.take(generators.parse_generator(config), 50)) for config in configs]
+        numpy = generators.numpy
+        generators.numpy = None
+        try:
+            for config, values in zip(configs, expected):
+                self.assertEqual(values, list(generators.take(generators.parse_generator(config), 50)))
+        finally:
+            generators.numpy = numpy
+
+    def test_sharded_ids(self):
+        """ Shards of a number sequence never hand out the same id """
+        config = {'type': 'number_sequence', 'start': 10, 'increment': 2, 'shards': 3}
+        ids = list()
+        for shard in range(3):
+            ids.extend(generators.take(generators.parse_generator(dict(config, shard=shard)), 100))
+        self.assertEqual(300, len(set(ids)))
+        self.assertEqual(range(10, 610, 2), sorted(ids))
+
+        generators.set_shard(1, 3)
+        try:
+            gen = generators.parse_generator({'type': 'number_sequence', 'start': 10, 'increment': 2})
+            self.assertEqual([12, 18], generators.take(gen, 2))
+        finally:
+            generators.set_shard()
+        self.assertRaises(ValueError, generators.set_shard, 3, 3)
+        self.assertRaises(ValueError, generators.parse_generator, dict(config, shard=5))
+
+    def test_unique_random(self):
+        """ Unique values until the whole value space is used """
+        gen = generators.parse_generator(
+            {'type': 'unique', 'prefix': '138', 'character_set': 'digits', 'length': 3, 'seed': 1})
+        values = generators.take(gen, 1000)
+        self.assertEqual(1000, len(set(values)))
+        self.assertTrue(all(len(v) == 6 and v.startswith('138') and v.isdigit() for v in values))
+        self.assertRaises(ValueError, next, gen)
+
+        config = {'type': 'unique', 'min': 10, 'max': 29, 'shards': 2}
+        values = list()
+        for shard in range(2):
+            values.extend(generators.take(generators.parse_generator(dict(config, shard=shard)), 10))
+        self.assertEqual(range(10, 30), sorted(values))
+
+    def test_unique_permutation(self):
+        """ Permutation mode covers the space in a seeded order """
+        config = {'type': 'unique', 'min': 1, 'max': 1000, 'mode': 'permutation', 'seed': 5}
+        values = generators.take(generators.parse_generator(config), 1000)
+        self.assertEqual(range(1, 1001), sorted(values))
+        self.assertNotEqual(range(1, 1001), values)
+        self.assertEqual(values, generators.take(generators.parse_generator(config), 1000))
+
+        big = generators.parse_generator(
+            {'type': 'unique', 'character_set': 'alphanumeric', 'length': 16, 'mode': 'permutation'})
+        self.assertEqual(100, len(set(generators.take(big, 100))))
+        self.assertRaises(ValueError, generators.parse_generator, dict(config, mode='sorted'))
+        self.assertRaises(ValueError, generators.parse_generator, {'type': 'unique', 'min': 1})
+
+        # Not a stride: differences between consecutive values vary
+        self.assertTrue(len(set(b - a for a, b in zip(values, values[1:]))) > 100)
+        for size in (1, 2, 3, 17, 64, 1000):
+            permutation = generators.FeistelPermutation(size, random.Random(size))
+            self.assertEqual(range(size), sorted(permutation(x) for x in range(size)))
+
+    def test_unique_filter(self):
+        """ Values of another generator are deduplicated """
+        gen = generators.parse_generator(
+            {'type': 'unique', 'generator': {'type': 'choice', 'values': range(50)}, 'capacity': 100})
+        self.assertEqual(range(50), sorted(generators.take(gen, 50)))
+        self.assertRaises(ValueError, next, gen)
+
+        bloom = generators.BloomFilter(capacity=1000, error_rate=0.001)
+        self.assertTrue(all(bloom.add(value) for value in range(1000)))
+        self.assertFalse(bloom.add(5))
+        self.assertTrue(999 in bloom)
+        self.assertTrue(sum(1 for value in range(1000, 11000) if value in bloom) < 50)
+
     def test_parse_basic(self):
         """ Test basic parsing, simple cases that should succeed or throw known errors """
         config = {'type': 'unsupported'}
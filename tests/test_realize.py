@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+import mock
+
+from src.utils.filereader.binding import Context
+from src.utils.filereader.contenthandling import ContentHandler
+from src.utils.testutil.tests import RestTest
+
+
+class RealizeTest(unittest.TestCase):
+    """ Tests for caching of realized (templated) RestTest objects """
+
+    def test_realize_cached(self):
+        """ Realized test is reused until context variables change """
+        test = RestTest()
+        test.set_url('/$cheese', isTemplate=True)
+        test.set_headers({'X-$key': '$val'}, isTemplate=True)
+        context = Context()
+        context.bind_variables({'cheese': 'stilton', 'key': 'Cheese', 'val': 'gouda'})
+
+        realized = test.realize(context)
+        self.assertTrue(realized is test.realize(context))
+        self.assertEqual('/stilton', realized.url)
+        self.assertEqual({'X-Cheese': 'gouda'}, realized.headers)
+
+        context.bind_variable('cheese', 'stilton')  # Same value, context not modified
+        self.assertTrue(realized is test.realize(context))
+        context.bind_variable('cheese', 'brie')
+        realized = test.realize(context)
+        self.assertEqual('/brie', realized.url)
+        self.assertTrue(realized is test.realize(context))
+
+        # Other context or changed test is realized again
+        other = Context()
+        other.bind_variables({'cheese': 'cheddar', 'key': 'Cheese', 'val': 'feta'})
+        self.assertEqual('/cheddar', test.realize(other).url)
+        test.set_url('/v2/$cheese', isTemplate=True)
+        self.assertEqual('/v2/cheddar', test.realize(other).url)
+
+    def test_realize_incremental(self):
+        """ Only fields using a changed variable are templated again """
+        test = RestTest()
+        test.set_url('/$id', isTemplate=True)
+        handler = ContentHandler()
+        handler.setup('{"login": "$login"}', is_template_content=True)
+        test.set_body(handler)
+        self.assertEqual(set(['id']), test.field_variables('url'))
+        self.assertEqual(set(['login']), test.field_variables('body'))
+        self.assertEqual(set(), test.field_variables('headers'))
+
+        # Count how often each field is templated
+        get_url = mock.Mock(wraps=test.get_url)
+        get_content = mock.Mock(wraps=handler.get_content)
+        test.get_url = get_url
+        handler.get_content = get_content
+
+        context = Context()
+        context.bind_variables({'id': 1, 'login': 'kvothe'})
+        body = test.realize(context).body
+        self.assertEqual('{"login": "kvothe"}', body)
+        self.assertEqual((1, 1), (get_url.call_count, get_content.call_count))
+
+        context.bind_variable('id', 2)
+        realized = test.realize(context)
+        self.assertEqual('/2', realized.url)
+        self.assertTrue(body is realized.body)  # Body doesn't use id, not templated again
+        self.assertEqual((2, 1), (get_url.call_count, get_content.call_count))
+
+        context.bind_variable('login', 'denna')
+        realized = test.realize(context)
+        self.assertEqual('{"login": "denna"}', realized.body)
+        self.assertEqual('/2', realized.url)
+        self.assertEqual((2, 2), (get_url.call_count, get_content.call_count))
+
+        context.bind_variable('other', 'value')  # Used by no field, nothing templated again
+        test.realize(context)
+        self.assertEqual((2, 2), (get_url.call_count, get_content.call_count))
+
+    def test_datafile_rows(self):
+        """ Data file is read when rows are requested, a new stream for every call """
+        test = RestTest.parse_test('', {'url': '/ping',
+                                        'datafile_variable_binds': {'file': 'phone.xlsx', 'stream': True}})
+        self.assertEqual({'file': 'phone.xlsx', 'stream': True}, test.datafile_variable_binds)
+        rows = list(test.datafile_rows())
+        self.assertTrue(rows)
+        self.assertEqual(rows, list(test.datafile_rows()))
+        self.assertEqual(rows, list(test.realize().datafile_rows()))
+        self.assertEqual([], RestTest().datafile_rows())
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
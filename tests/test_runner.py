@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+import json
+import threading
+import time
+import unittest
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from SocketServer import ThreadingMixIn
+
+from src.utils.testutil.case_generator import parse_testsets
+from src.utils.testutil.runner import AsyncRunner, TestRunner, run_test
+from src.utils.testutil.tests import RestTest
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """ 测试用的 HTTP 服务：
+        POST /person      -> 创建一个 person，返回 {"id": n}
+        GET  /person/<id> -> 返回 {"id": id}
+        GET  /slow        -> 等待 0.2 秒后返回
+        GET  /status/<n>  -> 返回状态码 n
+    """
+    persons = list()
+    lock = threading.Lock()
+
+    def _reply(self, code, body):
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.startswith('/person/'):
+            self._reply(200, json.dumps({'id': int(self.path.split('/')[2])}))
+        elif self.path == '/slow':
+            time.sleep(0.2)
+            self._reply(200, '{}')
+        elif self.path.startswith('/status/'):
+            self._reply(int(self.path.split('/')[2]), '{}')
+        else:
+            self._reply(200, json.dumps({'path': self.path}))
+
+    def do_POST(self):
+        length = int(self.headers.getheader('Content-Length', 0))
+        self.rfile.read(length)
+        with self.lock:
+            self.persons.append(length)
+            new_id = len(self.persons)
+        self._reply(201, json.dumps({'id': new_id}))
+
+    def log_message(self, *args):
+        pass
+
+
+class StubServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+def start_stub_server():
+    """ 启动测试服务，返回 (server, base_url) """
+    server = StubServer(('127.0.0.1', 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return server, 'http://127.0.0.1:{0}'.format(server.server_address[1])
+
+
+class TestRunnerTest(unittest.TestCase):
+    """ Tests for concurrent TestSet runner """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server, cls.base_url = start_stub_server()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_run_test(self):
+        mytest = RestTest.parse_test(self.base_url, {'url': '/echo', 'name': 'echo'})
+        result = run_test(mytest)
+        self.assertTrue(result.passed)
+        self.assertEqual(200, result.response_code)
+        self.assertEqual('/echo', json.loads(result.body)['path'])
+
+    def test_run_test_bad_status(self):
+        mytest = RestTest.parse_test(self.base_url, {'url': '/status/500'})
+        result = run_test(mytest)
+        self.assertFalse(result.passed)
+        self.assertEqual(500, result.response_code)
+        self.assertEqual(1, len(result.failures))
+
+    def test_batches(self):
+        structure = [[
+            {'test': {'url': '/slow', 'name': 'a'}},
+            {'test': {'url': '/slow', 'name': 'b', 'stop_on_failure': True}},
+            {'test': {'url': '/person/', 'method': 'POST', 'name': 'c',
+                      'extract_binds': [{'id': {'jsonpath_mini': 'id'}}]}},
+            {'test': {'url': '/slow', 'name': 'd'}},
+            {'test': {'url': '/slow', 'name': 'e'}},
+        ]]
+        tests = parse_testsets(self.base_url, structure)[0].tests
+        batches = [[t.name for t in batch] for batch in TestRunner.batches(tests)]
+        self.assertEqual([[u'a', u'b'], [u'c'], [u'd', u'e']], batches)
+
+    def test_concurrent_run(self):
+        structure = [[{'test': {'url': '/slow', 'name': 'slow{0}'.format(x)}} for x in range(8)]]
+        testsets = parse_testsets(self.base_url, structure)
+
+        start = time.time()
+        results = TestRunner(workers=8).run(testsets)
+        elapsed = time.time() - start
+
+        self.assertEqual(8, len(results))
+        self.assertTrue(all(r.passed for r in results))
+        self.assertEqual([u'slow{0}'.format(x) for x in range(8)], [r.test.name for r in results])
+        self.assertTrue(elapsed < 8 * 0.2, 'Tests did not run concurrently, took {0}s'.format(elapsed))
+
+    def test_context_modifier_in_order(self):
+        structure = [[
+            {'test': {'url': '/person/', 'method': 'POST', 'name': 'create',
+                      'extract_binds': [{'id': {'jsonpath_mini': 'id'}}]}},
+            {'test': {'url': {'template': '/person/$id'}, 'name': 'get',
+                      'validators': [{'compare': {'jsonpath_mini': 'id', 'comparator': 'str_eq',
+                                                  'expected': {'template': '$id'}}}]}},
+        ]]
+        results = TestRunner(workers=4).run(parse_testsets(self.base_url, structure))
+        self.assertEqual(2, len(results))
+        self.assertTrue(results[0].passed)
+        self.assertTrue(results[1].passed, [str(f) for f in results[1].failures])
+
+    def test_stop_on_failure(self):
+        structure = [[
+            {'test': {'url': '/status/404', 'name': 'fail', 'stop_on_failure': True}},
+            {'test': {'url': '/echo', 'name': 'skipped'}},
+        ], [
+            {'test': {'url': '/echo', 'name': 'next_testset'}},
+        ]]
+        results = TestRunner(workers=2).run(parse_testsets(self.base_url, structure))
+        self.assertEqual([u'fail', u'next_testset'], [r.test.name for r in results])
+        self.assertFalse(results[0].passed)
+
+    def test_delay(self):
+        structure = [[{'test': {'url': '/echo', 'delay': 1}}]]
+        start = time.time()
+        TestRunner(workers=1).run(parse_testsets(self.base_url, structure))
+        self.assertTrue(time.time() - start >= 1)
+
+    def test_skip_testset(self):
+        structure = [[{'config': {'run': False}}, {'test': {'url': '/echo'}}]]
+        self.assertEqual([], TestRunner().run(parse_testsets(self.base_url, structure)))
+
+    def test_async_runner(self):
+        structure = [[
+            {'test': {'url': '/person/', 'method': 'POST', 'name': 'create',
+                      'extract_binds': [{'id': {'jsonpath_mini': 'id'}}]}},
+            {'test': {'url': {'template': '/person/$id'}, 'name': 'get',
+                      'validators': [{'compare': {'jsonpath_mini': 'id', 'comparator': 'str_eq',
+                                                  'expected': {'template': '$id'}}}]}},
+            {'test': {'url': '/status/404', 'name': 'fail'}},
+        ] + [{'test': {'url': '/slow', 'name': 'slow{0}'.format(x)}} for x in range(20)]]
+
+        start = time.time()
+        results = AsyncRunner(concurrency=100).run(parse_testsets(self.base_url, structure))
+        elapsed = time.time() - start
+
+        self.assertEqual(23, len(results))
+        self.assertTrue(results[0].passed)
+        self.assertTrue(results[1].passed, [str(f) for f in results[1].failures])
+        self.assertFalse(results[2].passed)
+        self.assertTrue(all(r.passed for r in results[3:]))
+        self.assertTrue(elapsed < 20 * 0.2, 'Tests did not run concurrently, took {0}s'.format(elapsed))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
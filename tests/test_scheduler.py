@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+import time
+import unittest
+
+from src.utils.testutil.case_generator import parse_testsets
+from src.utils.testutil.scheduler import DependencyRunner, build_graph, consumed_variables, \
+    produced_variables, template_variables
+from tests.test_runner import start_stub_server
+
+
+def parse_tests(structure, base_url=''):
+    return parse_testsets(base_url, [structure])[0].tests
+
+
+class SchedulerTest(unittest.TestCase):
+    """ Tests for dependency-graph scheduling """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server, cls.base_url = start_stub_server()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_template_variables(self):
+        self.assertEqual(set(['id', 'name']), template_variables('/api/$id/${name}/$$escaped'))
+        self.assertEqual(set(), template_variables('no variables'))
+        self.assertEqual(set(), template_variables(None))
+
+    def test_consumed_and_produced(self):
+        mytest = parse_tests([{'test': {
+            'url': {'template': '/person/$id'},
+            'headers': {'template': {'X-Token': '$token'}},
+            'body': {'template': '{"name": "$name"}'},
+            'generator_binds': {'name': 'gen'},
+            'extract_binds': [{'new_id': {'jsonpath_mini': {'template': '$field'}}}],
+            'validators': [{'compare': {'jsonpath_mini': 'id', 'expected': {'template': '$expected'}}}]
+        }}])[0]
+        self.assertEqual(set(['id', 'token', 'name', 'field', 'expected']), consumed_variables(mytest))
+        self.assertEqual(set(['name', 'new_id']), produced_variables(mytest))
+
+    def test_build_graph(self):
+        tests = parse_tests([
+            {'test': {'url': '/person/', 'method': 'POST', 'extract_binds': [{'id': {'jsonpath_mini': 'id'}}]}},
+            {'test': {'url': '/person/', 'method': 'POST', 'extract_binds': [{'id2': {'jsonpath_mini': 'id'}}]}},
+            {'test': {'url': {'template': '/person/$id'}}},
+            {'test': {'url': {'template': '/person/$id2'}}},
+            {'test': {'url': '/independent'}},
+            {'test': {'url': '/person/', 'method': 'POST', 'extract_binds': [{'id': {'jsonpath_mini': 'id'}}]}},
+            {'test': {'url': {'template': '/person/$id'}}},
+        ])
+        graph = build_graph(tests)
+        self.assertEqual(set(), graph[0])
+        self.assertEqual(set(), graph[1])
+        self.assertEqual(set([0]), graph[2])
+        self.assertEqual(set([1]), graph[3])
+        self.assertEqual(set(), graph[4])
+        self.assertEqual(set([0, 2]), graph[5])  # wait for previous writer and reader of $id
+        self.assertEqual(set([5]), graph[6])
+
+    def test_build_graph_generators_and_stop(self):
+        tests = parse_tests([
+            {'test': {'url': '/a', 'generator_binds': {'x': 'gen'}}},
+            {'test': {'url': '/b', 'generator_binds': {'y': 'gen'}}},
+            {'test': {'url': '/c', 'stop_on_failure': True}},
+            {'test': {'url': '/d'}},
+        ])
+        graph = build_graph(tests)
+        self.assertEqual(set([0]), graph[1])
+        self.assertEqual(set(), graph[2])
+        self.assertEqual(set([2]), graph[3])
+
+    def test_run_chains_overlap(self):
+        chain = [
+            {'test': {'url': '/person/', 'method': 'POST', 'name': 'create',
+                      'extract_binds': [{'id': {'jsonpath_mini': 'id'}}]}},
+            {'test': {'url': {'template': '/person/$id'}, 'name': 'get',
+                      'validators': [{'compare': {'jsonpath_mini': 'id', 'comparator': 'str_eq',
+                                                  'expected': {'template': '$id'}}}]}},
+        ]
+        slow = [{'test': {'url': '/slow', 'name': 'slow{0}'.format(x)}} for x in range(4)]
+        testsets = parse_testsets(self.base_url, [slow + chain])
+
+        start = time.time()
+        results = DependencyRunner(workers=8).run(testsets)
+        elapsed = time.time() - start
+
+        self.assertEqual(6, len(results))
+        self.assertTrue(all(r.passed for r in results), [str(r) for r in results])
+        self.assertTrue(elapsed < 0.4, 'Tests did not overlap, took {0}s'.format(elapsed))
+
+    def test_run_stop_on_failure(self):
+        testsets = parse_testsets(self.base_url, [[
+            {'test': {'url': '/status/500', 'name': 'fail', 'stop_on_failure': True}},
+            {'test': {'url': '/echo', 'name': 'skipped'}},
+        ]])
+        results = DependencyRunner(workers=2).run(testsets)
+        self.assertEqual([u'fail'], [r.test.name for r in results])
+
+    def test_run_stop_on_failure_runs_earlier_tests(self):
+        """ Tests defined before the failed stop_on_failure test still run, even if they become ready after it """
+        testsets = parse_testsets(self.base_url, [[
+            {'test': {'url': '/slow', 'name': 'set_id', 'variable_binds': {'id': 7}}},
+            {'test': {'url': {'template': '/person/$id'}, 'name': 'get'}},
+            {'test': {'url': '/status/500', 'name': 'fail', 'stop_on_failure': True}},
+            {'test': {'url': '/echo', 'name': 'skipped'}},
+        ]])
+        results = DependencyRunner(workers=4).run(testsets)
+        self.assertEqual([u'set_id', u'get', u'fail'], [r.test.name for r in results])
+        self.assertTrue(results[1].passed)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+import threading
+import unittest
+
+from src.utils.interface import session_pool
+from src.utils.interface.http_client import HTTPClient
+from src.utils.interface.session_pool import PooledSession, get_adapter, get_session, pool_key
+from tests.test_runner import StubHandler, StubServer
+
+
+class KeepAliveHandler(StubHandler):
+    """ 支持 keep-alive 的测试服务，记录每个请求所用连接的客户端地址 """
+    protocol_version = 'HTTP/1.1'
+    clients = list()
+
+    def do_GET(self):
+        self.clients.append(self.client_address)
+        StubHandler.do_GET(self)
+
+
+class SessionPoolTest(unittest.TestCase):
+    """ Tests for process-wide http connection pool """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = StubServer(('127.0.0.1', 0), KeepAliveHandler)
+        thread = threading.Thread(target=cls.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        cls.base_url = 'http://127.0.0.1:{0}'.format(cls.server.server_address[1])
+
+    @classmethod
+    def tearDownClass(cls):
+        session_pool.configure()
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        session_pool.configure(pool_size=10, max_retries=0, keep_alive=True)
+        del KeepAliveHandler.clients[:]
+
+    def test_pool_key(self):
+        self.assertEqual('http://host:80', pool_key('http://HOST/a/b?c=1'))
+        self.assertEqual('https://host:443', pool_key('https://host/'))
+        self.assertEqual('http://host:8080', pool_key('http://host:8080/a'))
+
+    def test_shared_adapter(self):
+        self.assertTrue(get_adapter('http://host/a') is get_adapter('http://host:80/b'))
+        self.assertFalse(get_adapter('http://host/a') is get_adapter('https://host/a'))
+        self.assertTrue(get_session('http://host/a') is get_session('http://host/b'))
+        self.assertTrue(PooledSession().get_adapter('http://host/') is get_adapter('http://host/'))
+
+    def test_connection_reused_across_sessions(self):
+        for _ in range(3):
+            self.assertEqual(200, PooledSession().get(self.base_url + '/echo').status_code)
+        HTTPClient(self.base_url + '/echo').send()
+        self.assertEqual(4, len(KeepAliveHandler.clients))
+        self.assertEqual(1, len(set(KeepAliveHandler.clients)))
+
+    def test_sessions_keep_own_cookies(self):
+        first = PooledSession()
+        first.cookies.set('user', 'a')
+        self.assertEqual(0, len(PooledSession().cookies))
+
+    def test_keep_alive_off(self):
+        session_pool.configure(keep_alive=False)
+        session = PooledSession()
+        self.assertEqual('close', session.headers['Connection'])
+        for _ in range(2):
+            session.get(self.base_url + '/echo')
+        self.assertEqual(2, len(set(KeepAliveHandler.clients)))
+
+    def test_configure(self):
+        adapter = get_adapter(self.base_url)
+        session_pool.configure(pool_size=3, max_retries=2)
+        new_adapter = get_adapter(self.base_url)
+        self.assertFalse(adapter is new_adapter)
+        self.assertEqual(3, new_adapter._pool_maxsize)
+        self.assertEqual(2, new_adapter.max_retries.total)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
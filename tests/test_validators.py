@@ -1,10 +1,17 @@
 # -*- coding: utf-8 -*-
+import operator
+import os
+import subprocess
+import sys
+import tempfile
 import unittest
 
-from . import validators
-from .validators import register_extractor
-from . import binding
-from .binding import Context
+from src.utils.testutil import validators
+from src.utils.testutil.validators import register_extractor
+from src.utils.filereader import binding
+from src.utils.filereader.binding import Context
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 class ValidatorsTest(unittest.TestCase):
     """ Testing for validators and extract functions """
@@ -535,7 +542,7 @@ class ValidatorsTest(unittest.TestCase):
         """ Test parsing for jmespath extract test """
         try:
            import jmespath
-           from ext.extractor_jmespath import JMESPathExtractor
+           from src.utils.testutil.ext.extractor_jmespath import JMESPathExtractor
            if not validators.EXTRACTORS.get('jmespath'):
                register_extractor('jmespath', JMESPathExtractor.parse)
            config = {
@@ -559,6 +566,228 @@ class ValidatorsTest(unittest.TestCase):
            pass  # Doesn't run JMESPath test if can't import library
 
 
+    def test_jmespath_extractor(self):
+        """ Test JMESPath wildcards, filters and slices with compiled expression cache """
+        try:
+            from src.utils.testutil.ext import extractor_jmespath
+        except ImportError:
+            return  # Doesn't run JMESPath test if can't import library
+        body = '{"items": [{"id": 1, "price": 5}, {"id": 2, "price": 20}, {"id": 3, "price": 30}]}'
+        self.assertEqual([1, 2, 3], validators.parse_extractor('jmespath', 'items[*].id').extract(body=body))
+        self.assertEqual([2, 3], validators.parse_extractor(
+            'jmespath', 'items[?price > `10`].id').extract(body=body))
+        self.assertEqual([1, 2], validators.parse_extractor('jmespath', 'items[0:2].id').extract(body=body))
+
+        templated = validators.parse_extractor('jmespath', {'template': 'items[$idx].id'})
+        context = Context()
+        context.bind_variable('idx', 2)
+        self.assertEqual(3, templated.extract(body=body, context=context))
+        compiled = len(extractor_jmespath.COMPILED)
+        templated.extract(body=body, context=context)
+        self.assertEqual(compiled, len(extractor_jmespath.COMPILED))
+
+        validator = validators.ComparatorValidator.parse(
+            {'jmespath': 'items[*].id', 'comparator': 'count_eq', 'expected': 3})
+        self.assertTrue(validator.validate(body=body))
+
+    def test_jsonpath_extractor(self):
+        """ Test JSONPath extractor returns all matched values """
+        try:
+            from src.utils.testutil.ext import extractor_jsonpath
+        except ImportError:
+            return  # Doesn't run JSONPath test if can't import library
+        body = '{"items": [{"id": 1, "price": 5}, {"id": 2, "price": 20}, {"id": 3, "price": 30}]}'
+        self.assertEqual([1, 2, 3], validators.parse_extractor('jsonpath', '$.items[*].id').extract(body=body))
+        self.assertEqual([1, 2], validators.parse_extractor('jsonpath', '$.items[0:2].id').extract(body=body))
+        self.assertEqual([], validators.parse_extractor('jsonpath', '$.missing').extract(body=body))
+
+    def test_xpath_extractor(self):
+        """ Test XPath on a SOAP envelope, parsed once for all validators """
+        try:
+            from src.utils.testutil.ext import extractor_xpath
+        except ImportError:
+            return  # Doesn't run XPath test if can't import lxml
+        body = validators.ResponseBody.wrap(
+            '<?xml version="1.0" encoding="utf-8"?>'
+            '<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/">'
+            '<soap:Body><Result code="0"><item>a</item><item>b</item></Result></soap:Body></soap:Envelope>')
+        namespaces = {'soap': 'http://schemas.xmlsoap.org/soap/envelope/'}
+        extractor = validators.parse_extractor(
+            'xpath', {'query': '//soap:Body/Result/item', 'namespaces': namespaces})
+        self.assertEqual([u'a', u'b'], extractor.extract(body=body))
+        self.assertEqual([u'0'], validators.parse_extractor('xpath', '//Result/@code').extract(body=body))
+        self.assertEqual(2.0, validators.parse_extractor('xpath', 'count(//item)').extract(body=body))
+
+        document = body.parsed('lxml', extractor_xpath.parse_document)
+        validator = validators.ComparatorValidator.parse(
+            {'xpath': '//item', 'comparator': 'count_eq', 'expected': 2})
+        self.assertTrue(validator.validate(body=body))
+        self.assertTrue(document is body.parsed('lxml', extractor_xpath.parse_document))
+
+        templated = validators.parse_extractor('xpath', {'template': '//item[$idx]'})
+        context = Context()
+        context.bind_variable('idx', 2)
+        self.assertEqual([u'b'], templated.extract(body=body, context=context))
+
+    def test_css_extractor(self):
+        """ Test CSS selectors on an HTML page """
+        try:
+            from src.utils.testutil.ext import extractor_css
+        except ImportError:
+            return  # Doesn't run CSS test if can't import lxml and cssselect
+        body = '<html><body><ul class="items"><li>a</li><li>b <b>c</b></li></ul><p>x<p>y</body></html>'
+        self.assertEqual([u'a', u'b c'], validators.parse_extractor('css', 'ul.items > li').extract(body=body))
+        self.assertEqual([], validators.parse_extractor('css', 'div').extract(body=body))
+        self.assertEqual([u'x', u'y'], validators.parse_extractor('xpath', '//p').extract(body=body))
+
+    def test_json_schema_validator(self):
+        """ Test JSON schema validator, compiled schema is cached until the file changes """
+        try:
+            from src.utils.testutil.ext import validator_jsonschema
+        except ImportError:
+            return  # Doesn't run JSON schema test if can't import jsonschema
+        schema = '{"type": "object", "required": ["id"], "properties": {"id": {"type": "integer"}}}'
+        fd, path = tempfile.mkstemp(suffix='.json')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(schema)
+            validator = validators.parse_validator('json_schema', {'schema': {'file': path}})
+            self.assertTrue(validator.validate(body='{"id": 1}'))
+            failure = validator.validate(body='{"id": "a"}')
+            self.assertFalse(failure)
+            self.assertEqual(validators.FAILURE_VALIDATOR_FAILED, failure.failure_type)
+            self.assertTrue(failure.details.startswith('id: '))
+            self.assertFalse(validator.validate(body='not json'))
+
+            compiled = validator.get_schema()
+            self.assertTrue(compiled is validators.parse_validator(
+                'json_schema', {'schema': {'file': path}}).get_schema())
+            with open(path, 'w') as f:
+                f.write('{"type": "array"}')
+            mtime = os.path.getmtime(path)
+            os.utime(path, (mtime + 10, mtime + 10))
+            self.assertFalse(compiled is validator.get_schema())
+            self.assertTrue(validator.validate(body='[]'))
+        finally:
+            os.remove(path)
+
+        inline = validators.parse_validator('json_schema', {'schema': schema})
+        self.assertTrue(inline.compiled is not None)
+        self.assertTrue(inline.validate(body='{"id": 2}'))
+
+        templated = validators.parse_validator(
+            'json_schema', {'schema': {'template': '{"type": "object", "required": ["$key"]}'}})
+        context = Context()
+        context.bind_variable('key', 'name')
+        self.assertTrue(templated.validate(body='{"name": "a"}', context=context))
+        self.assertFalse(templated.validate(body='{"id": 1}', context=context))
+
+    def test_lru_cache(self):
+        cache = validators.LRUCache(maxsize=2)
+        calls = list()
+
+        def factory(key):
+            calls.append(key)
+            return key.upper()
+
+        self.assertEqual('A', cache.get('a', factory))
+        self.assertEqual('B', cache.get('b', factory))
+        self.assertEqual('A', cache.get('a', factory))
+        self.assertEqual('C', cache.get('c', factory))  # Evicts b, least recently used
+        self.assertEqual(2, len(cache))
+        cache.get('a', factory)
+        cache.get('b', factory)
+        self.assertEqual(['a', 'b', 'c', 'b'], calls)
+
+    def test_regex_comparator_compiled(self):
+        """ Static regex is compiled once at parse, templated ones go through the regex cache """
+        config = {'raw_body': '', 'comparator': 'regex', 'expected': r'id=\d+'}
+        comp = validators.ComparatorValidator.parse(config)
+        self.assertTrue(hasattr(comp.compiled_expected, 'search'))
+        self.assertTrue(comp.validate(body='user id=42'))
+        failure = comp.validate(body='user id=x')
+        self.assertFalse(failure)
+        self.assertTrue('id=\\d+' in failure.message)
+        self.assertTrue(validators.COMPARATORS['regex'](42, '4'))
+
+        config['expected'] = {'template': '$key=\\d+'}
+        comp = validators.ComparatorValidator.parse(config)
+        self.assertTrue(comp.compiled_expected is None)
+        context = Context()
+        context.bind_variable('key', 'id')
+        validators.REGEX_CACHE.clear()
+        self.assertTrue(comp.validate(body='user id=42', context=context))
+        self.assertTrue(comp.validate(body='user id=43', context=context))
+        self.assertEqual(1, len(validators.REGEX_CACHE))
+
+    def test_regex_comparator_non_ascii(self):
+        """ Compiled unicode expected regex matches both a utf-8 bytes body and a unicode body """
+        comp = validators.parse_validator('compare', {'raw_body': '', 'comparator': 'regex', 'expected': u'成功'})
+        body = u'{"msg": "成功"}'
+        self.assertTrue(comp.validate(body=body.encode('utf-8')))
+        self.assertTrue(comp.validate(body=body))
+        self.assertFalse(comp.validate(body=u'{"msg": "失败"}'.encode('utf-8')))
+        self.assertEqual([True, True, False], list(comp.compare_batch(
+            [body.encode('utf-8'), body, u'失败'.encode('utf-8')]).passed))
+        self.assertEqual([True, True], list(comp.validate_batch([body.encode('utf-8'), body]).passed))
+
+    def test_compare_values(self):
+        self.assertEqual([True, False, False], list(validators.compare_values(operator.lt, [1, 2, 3.5], [2, 2, 2])))
+        self.assertEqual([True, False], list(validators.compare_values(operator.eq, ['a', 1], ['a', '1'])))
+        self.assertEqual([], list(validators.compare_values(operator.eq, [], [])))
+        self.assertRaises(ValueError, validators.compare_values, operator.eq, [1], [1, 2])
+        if validators.numpy is not None:
+            result = validators.compare_values(operator.ge, range(10000), [5000] * 10000)
+            self.assertEqual(5000, int(result.sum()))
+
+    def test_compare_batch(self):
+        comp = validators.ComparatorValidator.parse({'jsonpath_mini': 'id', 'comparator': 'gt', 'expected': 2})
+        result = comp.compare_batch([1, 3, 5, 2])
+        self.assertEqual([False, True, True, False], list(result.passed))
+        self.assertEqual([0, 3], sorted(result.failures.keys()))
+        self.assertFalse(result.failures[0])
+        self.assertTrue('gt(1, 2)' in result.failures[0].message)
+        self.assertFalse(result)
+        self.assertTrue(comp.compare_batch([3, 4]))
+        self.assertEqual([True, False], list(comp.compare_batch([3, 4], [1, 9]).passed))
+
+    def test_validate_batch(self):
+        config = {'jsonpath_mini': 'id', 'comparator': 'eq', 'expected': {'template': '$id'}}
+        comp = validators.ComparatorValidator.parse(config)
+        bodies = ['{"id": "1"}', '{"id": "2"}', 'not json', '{"id": "4"}']
+        contexts = list()
+        for value in ('1', '3', '3', '4'):
+            context = Context()
+            context.bind_variable('id', value)
+            contexts.append(context)
+        result = comp.validate_batch(bodies, contexts=contexts)
+        self.assertEqual(4, len(result))
+        self.assertEqual([True, False, False, True], list(result.passed))
+        self.assertEqual(validators.FAILURE_VALIDATOR_FAILED, result.failures[1].failure_type)
+        self.assertEqual(validators.FAILURE_EXTRACTOR_EXCEPTION, result.failures[2].failure_type)
+
+        # Same results as validating one by one, also for validators without a batch implementation
+        test_validator = validators.parse_validator('extract_test', {'jsonpath_mini': 'id', 'test': 'exists'})
+        result = test_validator.validate_batch(['{"id": 1}', '{}'])
+        self.assertEqual([True, False], list(result.passed))
+        self.assertEqual([1], list(result.failures.keys()))
+        self.assertRaises(ValueError, comp.validate_batch, bodies, contexts=contexts[:2])
+
+    def test_regex_all_count_extractors(self):
+        body = '<li>a1</li><li>b2</li><li>c3</li>'
+        extractor = validators.parse_extractor('regex_all', r'<li>(\w)\d</li>')
+        self.assertTrue(extractor.compiled_query is not None)
+        self.assertEqual(['a', 'b', 'c'], extractor.extract(body=body))
+        extractor = validators.parse_extractor('regex_count', '<li>')
+        self.assertEqual(3, extractor.extract(body=body))
+        self.assertEqual(0, extractor.extract(body='none'))
+
+        config = {'regex_count': {'template': '<$tag>'}, 'comparator': 'eq', 'expected': 3}
+        comp = validators.ComparatorValidator.parse(config)
+        context = Context()
+        context.bind_variable('tag', 'li')
+        self.assertTrue(comp.validate(body=body, context=context))
+
     def test_parse_validator_jsonpath_mini_extracttest(self):
         """ Test parsing for jsonpath_mini extract test """
         config = {
@@ -577,5 +806,106 @@ class ValidatorsTest(unittest.TestCase):
         self.assertEqual(validation_result.message,
                          "Extract and test validator failed on test: exists(None)")
 
+    def test_jsonpath_mini_compiled(self):
+        """ Static queries are compiled once, templated queries at extract time """
+        extractor = validators.MiniJsonExtractor.parse('.key.0.val.')
+        self.assertEqual(('key', 0, 'val'), extractor.compiled_query)
+        self.assertEqual(('a', -1), validators.MiniJsonExtractor.compile_steps('a.-1'))
+        self.assertEqual((), validators.MiniJsonExtractor.compile_steps('.'))
+        self.assertEqual(5, extractor.extract(body='{"key": [{"val": 5}]}'))
+        self.assertEqual(None, extractor.extract(body='{"key": {"val": 5}}'))
+
+        templated = validators.MiniJsonExtractor.parse({'template': 'key.$idx'})
+        self.assertEqual(None, templated.compiled_query)
+        context = Context()
+        context.bind_variable('idx', 1)
+        self.assertEqual('b', templated.extract(body='{"key": ["a", "b"]}', context=context))
+        self.assertEqual(None, validators.HeaderExtractor.parse('content-type').compiled_query)
+
+    def test_jsonpath_mini_stream(self):
+        """ Stream mode gives the same results as the default mode """
+        body = '{"id": 3, "key": {"val": [1, 2.5, {"x": null}]}, "tail": "ignored"}'
+        for query in ('id', 'key', 'key.val', 'key.val.1', 'key.val.2', 'key.val.-1',
+                      'key.val.2.x', 'missing', 'key.val.10', 'id.0', 'key.val.a', '.'):
+            extractor = validators.MiniJsonExtractor.parse({'query': query, 'stream': 'true'})
+            self.assertTrue(extractor.is_stream)
+            self.assertEqual(validators.MiniJsonExtractor.parse(query).extract(body=body),
+                             extractor.extract(body=body), query)
+
+        templated = validators.MiniJsonExtractor.parse({'template': 'key.val.$idx', 'stream': True})
+        context = Context()
+        context.bind_variable('idx', 1)
+        self.assertEqual(2.5, templated.extract(body=body, context=context))
+        self.assertFalse(validators.MiniJsonExtractor.parse({'query': 'id', 'stream': False}).is_stream)
+
+    def test_jsonpath_mini_stream_stops_early(self):
+        """ Stream mode reads the body only up to the requested value """
+        if validators.ijson is None:
+            return  # Doesn't run streaming test if can't import ijson
+        from StringIO import StringIO
+        head = '{"id": 3, "items": ['
+        stream = StringIO(head + ', '.join(['{"a": 1}'] * 100000) + ']}')
+        extractor = validators.MiniJsonExtractor.parse({'query': 'items.1.a', 'stream': True})
+        self.assertEqual(1, extractor.extract(body=stream))
+        self.assertTrue(stream.tell() < 100000)
+
+        invalid = validators.MiniJsonExtractor.parse({'query': 'id', 'stream': True})
+        self.assertRaises(ValueError, invalid.extract, body='{"id": ')
+
+    def test_response_body_parsed_once(self):
+        """ Test that validators and extractors share one parsed JSON tree """
+        body = validators.ResponseBody.wrap('{"id": 3, "key": {"val": 3}}')
+        self.assertEqual('{"id": 3, "key": {"val": 3}}', body)
+        self.assertTrue(body.json() is body.json())
+
+        parsed = list()
+        original_loads = validators.json.loads
+
+        def counting_loads(*args, **kwargs):
+            parsed.append(1)
+            return original_loads(*args, **kwargs)
+
+        validators.json.loads = counting_loads
+        try:
+            body = validators.ResponseBody.wrap('{"id": 3, "key": {"val": 3}}')
+            for query in ('id', 'key.val', 'key'):
+                validator = validators.ExtractTestValidator.parse({'jsonpath_mini': query, 'test': 'exists'})
+                self.assertTrue(validator.validate(body=body))
+            self.assertEqual(3, validators.MiniJsonExtractor.parse('key.val').extract(body=body))
+            self.assertEqual(1, len(parsed))
+        finally:
+            validators.json.loads = original_loads
+
+    def test_response_body_invalid_json(self):
+        body = validators.ResponseBody.wrap('{"id": 3')
+        self.assertRaises(ValueError, body.json)
+        self.assertRaises(ValueError, body.json)
+        self.assertTrue(validators.ResponseBody.wrap(None) is None)
+        self.assertEqual(u'{}', validators.ResponseBody.wrap(u'{}'))
+        self.assertFalse(isinstance(validators.ResponseBody.wrap(u'{}'), validators.ResponseBody))
+
+    def assert_registered_when_imported_first(self, module_name, registry, name):
+        """ Importing an extension module before validators, in a fresh interpreter, still registers it """
+        requirements = dict(validators.EXTENSIONS)[module_name]
+        if not all(validators._is_installed(alternatives) for alternatives in requirements):
+            return  # Library not installed, extension is not registered
+        script = ('import {0}\n'
+                  'from src.utils.testutil import validators\n'
+                  'assert {1!r} in validators.{2}, sorted(validators.{2})').format(module_name, name, registry)
+        self.assertEqual(0, subprocess.call([sys.executable, '-c', script], cwd=ROOT))
+
+    def test_register_extensions_import_order(self):
+        self.assert_registered_when_imported_first(
+            'src.utils.testutil.ext.extractor_jmespath', 'EXTRACTORS', 'jmespath')
+        self.assert_registered_when_imported_first(
+            'src.utils.testutil.ext.extractor_jsonpath', 'EXTRACTORS', 'jsonpath')
+        self.assert_registered_when_imported_first(
+            'src.utils.testutil.ext.extractor_xpath', 'EXTRACTORS', 'xpath')
+        self.assert_registered_when_imported_first(
+            'src.utils.testutil.ext.extractor_css', 'EXTRACTORS', 'css')
+        self.assert_registered_when_imported_first(
+            'src.utils.testutil.ext.validator_jsonschema', 'VALIDATORS', 'json_schema')
+
+
 if __name__ == '__main__':
     unittest.main()